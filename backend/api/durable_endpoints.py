@@ -3,6 +3,8 @@ from flask_cors import cross_origin
 from services.simple_ai_service import SimpleAIService
 from services.sloka_guru_service import SlokaGuruService
 from services.spiritual_service import SpiritualService
+from services.response_cache import get_response_cache, response_cache_key
+from services.rate_limiter import get_rate_limiter, request_user_id
 from models.database import db, UserSession
 import json
 from datetime import datetime
@@ -29,6 +31,16 @@ def get_spiritual_guidance():
                 'success': False,
                 'message': 'Both guru type and question are required'
             }), 400
+        
+        # Shed load before any session write or model call
+        limiter = get_rate_limiter()
+        decision = limiter.check(guru_type, request.remote_addr, request_user_id()) if limiter else None
+        if decision is not None and not decision.allowed:
+            return jsonify({
+                'success': False,
+                'message': 'Too many requests, please try again shortly',
+                'retry_after': int(decision.headers()['Retry-After'])
+            }), 429, decision.headers()
             
         # Create an anonymous session
         session = UserSession(
@@ -39,14 +51,25 @@ def get_spiritual_guidance():
         db.session.add(session)
         db.session.commit()
         
+        # Widget starter questions repeat constantly, so answers are cached per guru and language
+        cache = get_response_cache()
+        cache_key = response_cache_key(
+            model=None, system_prompt=None, temperature=None, max_tokens=None, question=question,
+            endpoint='spiritual-guidance', guru_type=guru_type, language=language
+        )
+        response = cache.get(cache_key) if cache else None
+        
         # Get guidance based on guru type
-        response = None
-        if guru_type == 'sloka':
-            response = sloka_guru.get_guidance(question, language=language)
-        elif guru_type == 'spiritual':
-            response = spiritual_service.get_guidance(question, language=language)
-        else:
-            response = simple_ai.get_response(question, guru_type, language)
+        if response is None:
+            if guru_type == 'sloka':
+                response = sloka_guru.get_guidance(question, language=language)
+            elif guru_type == 'spiritual':
+                response = spiritual_service.get_guidance(question, language=language)
+            else:
+                response = simple_ai.get_response(question, guru_type, language)
+            failed = isinstance(response, dict) and response.get('success') is False
+            if cache and response and not failed:
+                cache.set(cache_key, response)
             
         return jsonify({
             'success': True,
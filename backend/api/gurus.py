@@ -1,9 +1,16 @@
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify
 import openai
 import os
-import asyncio
-import json
 from services.ai_service import AIService
+from services.response_cache import get_response_cache
+from services.semantic_cache import get_semantic_cache
+from services.single_flight import get_single_flight
+from services.rate_limiter import get_rate_limiter, request_user_id
+from services.upstream_scheduler import get_upstream_scheduler
+from services.upstream_health import circuit_stats
+from services.provider_router import get_provider_router
+from utils.async_bridge import get_async_bridge, run_async
+from utils.sse import sse_event, sse_response, sse_stream
 from workflow_assignment import ChatGPTWorkflowManager
 
 gurus_bp = Blueprint('gurus', __name__)
@@ -62,6 +69,21 @@ SPIRITUAL_GURUS = {
     }
 }
 
+def _rate_limited(guru_type):
+    """429 response when the client is over its API or workflow rate limit, else None"""
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return None
+    decision = limiter.check(guru_type, request.remote_addr, request_user_id())
+    if decision.allowed:
+        return None
+    return jsonify({
+        'success': False,
+        'error': 'Rate limit exceeded, please try again later',
+        'limit': decision.limit,
+        'retry_after': int(decision.headers()['Retry-After'])
+    }), 429, decision.headers()
+
 @gurus_bp.route('/', methods=['GET'])
 def get_all_gurus():
     return jsonify({
@@ -92,17 +114,18 @@ def ask_guru():
     if guru_type not in SPIRITUAL_GURUS:
         return jsonify({'success': False, 'error': 'Invalid guru type'}), 400
     
+    limited = _rate_limited(guru_type)
+    if limited:
+        return limited
+    
     if not ai_service:
         return jsonify({'success': False, 'error': 'AI service not available'}), 503
     
     try:
-        # Get AI response using the AI service
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        response_data = loop.run_until_complete(
+        # Get AI response on the worker's long-lived event loop (pooled clients are reused)
+        response_data = run_async(
             ai_service.get_spiritual_guidance(guru_type, question, user_context)
         )
-        loop.close()
         
         if response_data.get('success'):
             return jsonify({
@@ -113,8 +136,14 @@ def ask_guru():
                 'response': response_data['response'],
                 'specialization': SPIRITUAL_GURUS[guru_type]['specialization'],
                 'tokens_used': response_data.get('tokens_used'),
-                'model': response_data.get('model')
+                'model': response_data.get('model'),
+                'cached': response_data.get('cached', False),
+                'cache_match': response_data.get('cache_match'),
+                'fallback': response_data.get('fallback', False)
             })
+        elif response_data.get('error_type') in ('QueueFullError', 'DeadlineExceededError'):
+            # Shed by the upstream scheduler; nothing was sent to the model
+            return jsonify({'success': False, 'error': 'Guru service is busy, please try again shortly'}), 503, {'Retry-After': '1'}
         else:
             return jsonify({'success': False, 'error': 'Failed to get AI response'}), 500
             
@@ -134,33 +163,26 @@ def ask_guru_stream():
     if guru_type not in SPIRITUAL_GURUS:
         return jsonify({'success': False, 'error': 'Invalid guru type'}), 400
     
+    limited = _rate_limited(guru_type)
+    if limited:
+        return limited
+    
     if not ai_service:
         return jsonify({'success': False, 'error': 'AI service not available'}), 503
     
     def generate():
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            async def stream_response():
-                async for chunk in ai_service.get_spiritual_guidance_stream(
-                    guru_type, question, user_context
-                ):
-                    yield f"data: {json.dumps({'chunk': chunk})}\n\n"
-                yield "data: [DONE]\n\n"
-            
-            gen = stream_response()
-            while True:
-                try:
-                    chunk = loop.run_until_complete(gen.__anext__())
-                    yield chunk
-                except StopAsyncIteration:
-                    break
-            loop.close()
+            # Tokens are flushed as they arrive, with heartbeats while the model is silent. A client
+            # disconnect surfaces as a failed write, which closes this generator and cancels the upstream stream
+            yield from sse_stream(
+                ai_service.get_spiritual_guidance_stream(guru_type, question, user_context),
+                lambda chunk: sse_event({'chunk': chunk})
+            )
+            yield sse_event('[DONE]')
         except Exception as e:
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield sse_event({'error': str(e), 'error_type': type(e).__name__}, event='error')
     
-    return Response(generate(), mimetype='text/plain')
+    return sse_response(generate())
 
 # Add new endpoint for spiritual guidance (matching frontend expectations)
 @gurus_bp.route('/spiritual/guidance', methods=['POST'])
@@ -171,6 +193,34 @@ def spiritual_guidance():
 def spiritual_guidance_stream():
     return ask_guru_stream()
 
+@gurus_bp.route('/cache/stats', methods=['GET'])
+def get_response_cache_stats():
+    """Hit/miss metrics of the guru response caches (exact and semantic) and request coalescing for this worker"""
+    cache = get_response_cache()
+    semantic_cache = get_semantic_cache()
+    body = {
+        'success': True,
+        'enabled': cache is not None,
+        'semantic_enabled': semantic_cache is not None,
+        'in_flight': get_single_flight().stats(),
+    }
+    if cache is not None:
+        body['cache'] = cache.stats()
+    if semantic_cache is not None:
+        body['semantic_cache'] = semantic_cache.stats()
+    return jsonify(body)
+
+@gurus_bp.route('/upstream/stats', methods=['GET'])
+def get_upstream_stats():
+    """Concurrency, queue depth, wait times, circuit state and provider routing of upstream model calls for this worker"""
+    scheduler = get_upstream_scheduler(get_async_bridge().loop)
+    return jsonify({
+        'success': True,
+        'scheduler': scheduler.stats(),
+        'circuits': circuit_stats(),
+        'providers': get_provider_router().stats()
+    })
+
 @gurus_bp.route('/workflows', methods=['GET'])
 def get_available_workflows():
     """Get all available AI Guru workflows and their ChatGPT configurations"""
@@ -187,6 +237,8 @@ def get_available_workflows():
             'model': config['chatgpt_model'],
             'workflow_type': config['workflow_type'],
             'priority': config['priority'],
+            'provider': config.get('provider', 'openai'),
+            'fallback_provider': config.get('fallback_provider'),
             'streaming_available': config.get('streaming', False)
         }
     
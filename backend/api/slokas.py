@@ -1,10 +1,128 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import hashlib
+import threading
 from services.sloka_guru_service import SlokaGuruService
 from models.slokas_database import sloka_db
 
 slokas_bp = Blueprint('slokas', __name__)
 sloka_guru = SlokaGuruService()
 
+# Search results returned when the client does not pass ?limit=
+DEFAULT_SEARCH_LIMIT = 50
+
+# Page size bounds for /all
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 500
+
+# Pre-serialized single-sloka responses kept per worker
+SLOKA_RESPONSE_CACHE_SIZE = 1024
+
+class _ResponseBodyCache:
+    """
+    LRU of pre-serialized bodies keyed by (snapshot version, ...).
+
+    Bodies are built from the snapshot whose version is in the key, never
+    from whatever sloka_db.snapshot is by then, so a reload between reading
+    the version and building the body cannot cache a newer corpus under an
+    older version.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._bodies:
+                self._bodies.move_to_end(key)
+                return self._bodies[key]
+        body = build()
+        with self._lock:
+            self._bodies[key] = body
+            while len(self._bodies) > self.maxsize:
+                self._bodies.popitem(last=False)
+        return body
+
+_sloka_bodies = _ResponseBodyCache(SLOKA_RESPONSE_CACHE_SIZE)
+_daily_bodies = _ResponseBodyCache(SLOKA_RESPONSE_CACHE_SIZE)
+_stats_bodies = _ResponseBodyCache(8)
+
+def _sloka_response_body(snapshot, sloka_id):
+    """JSON body for a single sloka, built once per (database version, sloka id)"""
+    return _sloka_bodies.get((snapshot.version, sloka_id), lambda: _build_sloka_response_body(snapshot, sloka_id))
+
+def _build_sloka_response_body(snapshot, sloka_id):
+    return current_app.json.dumps({
+        'success': True,
+        'sloka': snapshot.get_sloka_by_id(sloka_id),
+        'formatted': snapshot.get_formatted_sloka(sloka_id)
+    }).encode('utf-8')
+
+def _daily_response_body(snapshot, day, guru):
+    """JSON body and strong ETag for a date's sloka, built once per (database version, date, guru)"""
+    return _daily_bodies.get((snapshot.version, day, guru), lambda: _build_daily_response_body(snapshot, day, guru))
+
+def _build_daily_response_body(snapshot, day, guru):
+    sloka = snapshot.get_daily_sloka(for_date=day, guru=guru)
+    if not sloka:
+        return None, None
+    body = current_app.json.dumps({
+        'success': True,
+        'date': day.isoformat(),
+        'guru': guru,
+        'sloka': sloka,
+        'formatted': snapshot.get_formatted_sloka(sloka['id'])
+    }).encode('utf-8')
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
+def _stats_response_bodies(snapshot):
+    """Pre-serialized /stats, /categories and /sources bodies for a database version"""
+    return _stats_bodies.get((snapshot.version,), lambda: _build_stats_response_bodies(snapshot))
+
+def _build_stats_response_bodies(snapshot):
+    stats = snapshot.get_database_stats()
+    dumps = current_app.json.dumps
+    return {
+        'stats': dumps({
+            'success': True,
+            'database_stats': stats
+        }).encode('utf-8'),
+        'categories': dumps({
+            'success': True,
+            'categories': list(stats['categories'].keys()),
+            'category_counts': stats['categories']
+        }).encode('utf-8'),
+        'sources': dumps({
+            'success': True,
+            'sources': stats['available_sources'],
+            'source_counts': stats['sources']
+        }).encode('utf-8')
+    }
+
+def _stats_response(kind):
+    """Serve a precomputed statistics body; the ETag changes only when the database version does"""
+    snapshot = sloka_db.snapshot
+    response = Response(_stats_response_bodies(snapshot)[kind], mimetype='application/json')
+    response.set_etag(f'{snapshot.version}-{kind}')
+    # Clients revalidate on every use, which costs a 304 until a reload changes the version
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def _seconds_until_midnight(timezone):
+    """Seconds until the daily sloka changes in the given time zone"""
+    now = datetime.now(ZoneInfo(timezone)) if timezone else datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), now.tzinfo)
+    return max(int((midnight - now).total_seconds()), 1)
+
+def _sloka_response(snapshot, sloka_id):
+    """Serve a single sloka from the pre-serialized response cache"""
+    body = _sloka_response_body(snapshot, sloka_id)
+    return Response(body, mimetype='application/json')
+
 @slokas_bp.route('/ask', methods=['POST'])
 def ask_sloka_guru():
     """Endpoint to ask questions to the Sloka Guru"""
@@ -52,22 +170,106 @@ def explain_sloka():
             'error': str(e)
         }), 500
 
+@slokas_bp.route('/relevant', methods=['POST'])
+def get_relevant_slokas():
+    """
+    Find the slokas most relevant to one or more questions
+    
+    JSON body: {"question": "..."} or {"questions": [...]}, plus optional
+    "k" (default 3, at most 20) and "guru" to restrict the candidates.
+    """
+    try:
+        data = request.json or {}
+        questions = data.get('questions')
+        single = questions is None
+        if single:
+            questions = [data.get('question')]
+        k = data.get('k', 3)
+        
+        if not isinstance(questions, list) or not questions or not all(isinstance(q, str) and q for q in questions):
+            return jsonify({
+                'success': False,
+                'message': 'A question or a non-empty list of questions is required'
+            }), 400
+        
+        if not isinstance(k, int) or not 1 <= k <= 20:
+            return jsonify({
+                'success': False,
+                'message': 'k must be an integer between 1 and 20'
+            }), 400
+        
+        guru = data.get('guru') or None
+        if guru is not None and not sloka_db.snapshot.has_guru(guru):
+            return jsonify({
+                'success': False,
+                'message': 'guru must be one of the gurus slokas are assigned to'
+            }), 400
+        
+        matches = sloka_guru.find_relevant_slokas_batch(questions, k, guru)
+        results = [
+            [{'score': round(score, 4), 'sloka': sloka} for sloka, score in question_matches]
+            for question_matches in matches
+        ]
+        
+        if single:
+            return jsonify({'success': True, 'question': questions[0], 'matches': results[0]})
+        return jsonify({'success': True, 'results': [
+            {'question': question, 'matches': question_matches}
+            for question, question_matches in zip(questions, results)
+        ]})
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @slokas_bp.route('/daily', methods=['GET'])
 def get_daily_sloka():
-    """Get the daily sloka with full details"""
+    """
+    Get the daily sloka with full details
+    
+    Query parameters:
+    - date: YYYY-MM-DD (optional, defaults to today)
+    - guru: Restrict to slokas assigned to this guru (optional)
+    - tz: IANA time zone used to decide "today" (optional)
+    
+    The same date always returns the same sloka, so responses carry a strong
+    ETag and are cacheable until midnight (or for a day when the date is explicit).
+    """
     try:
-        sloka = sloka_db.get_daily_sloka()
-        if not sloka:
+        guru = request.args.get('guru') or None
+        timezone = request.args.get('tz') or None
+        requested_date = request.args.get('date')
+        
+        try:
+            today = sloka_db.get_daily_date(timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            return jsonify({
+                'success': False,
+                'message': f'Unknown time zone: {timezone}'
+            }), 400
+        
+        try:
+            day = date.fromisoformat(requested_date) if requested_date else today
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'Date must be in YYYY-MM-DD format'
+            }), 400
+        
+        body, etag = _daily_response_body(sloka_db.snapshot, day, guru)
+        if body is None:
             return jsonify({
                 'success': False,
                 'message': 'No sloka available'
             }), 404
         
-        return jsonify({
-            'success': True,
-            'sloka': sloka,
-            'formatted': sloka_db.get_formatted_sloka(sloka['id'])
-        })
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = 86400 if requested_date else _seconds_until_midnight(timezone)
+        return response.make_conditional(request)
         
     except Exception as e:
         return jsonify({
@@ -79,18 +281,15 @@ def get_daily_sloka():
 def get_sloka_by_id(sloka_id):
     """Get a specific sloka by ID"""
     try:
-        sloka = sloka_db.get_sloka_by_id(sloka_id)
+        snapshot = sloka_db.snapshot
+        sloka = snapshot.get_sloka_by_id(sloka_id)
         if not sloka:
             return jsonify({
                 'success': False,
                 'message': f'Sloka with ID {sloka_id} not found'
             }), 404
         
-        return jsonify({
-            'success': True,
-            'sloka': sloka,
-            'formatted': sloka_db.get_formatted_sloka(sloka_id)
-        })
+        return _sloka_response(snapshot, sloka_id)
         
     except Exception as e:
         return jsonify({
@@ -154,19 +353,34 @@ def get_slokas_by_source(source):
 
 @slokas_bp.route('/search', methods=['GET'])
 def search_slokas():
-    """Search slokas by keyword"""
+    """Search slokas by keyword (terms are AND-ed, use OR between alternatives)"""
     try:
         search_term = request.args.get('q', '')
+        mode = request.args.get('mode', 'and').lower()
+        limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
         if not search_term:
             return jsonify({
                 'success': False,
                 'message': 'Search term is required'
             }), 400
         
-        slokas = sloka_db.search_slokas(search_term)
+        if mode not in ('and', 'or'):
+            return jsonify({
+                'success': False,
+                'message': "Search mode must be 'and' or 'or'"
+            }), 400
+        
+        if limit < 1:
+            return jsonify({
+                'success': False,
+                'message': 'Limit must be a positive integer'
+            }), 400
+        
+        slokas = sloka_db.search_slokas(search_term, mode=mode, limit=limit)
         return jsonify({
             'success': True,
             'search_term': search_term,
+            'mode': mode,
             'count': len(slokas),
             'slokas': slokas
         })
@@ -181,11 +395,7 @@ def search_slokas():
 def get_database_stats():
     """Get statistics about the slokas database"""
     try:
-        stats = sloka_db.get_database_stats()
-        return jsonify({
-            'success': True,
-            'database_stats': stats
-        })
+        return _stats_response('stats')
         
     except Exception as e:
         return jsonify({
@@ -193,20 +403,102 @@ def get_database_stats():
             'error': str(e)
         }), 500
 
+@slokas_bp.route('/reload-status', methods=['GET'])
+def get_reload_status():
+    """Get the loaded database version and the outcome and latency of the last reload"""
+    snapshot = sloka_db.snapshot
+    status = {
+        'success': True,
+        'version': snapshot.version,
+        'backend': sloka_db.backend,
+        'total_slokas': snapshot.total_slokas,
+        'last_reload': sloka_db.last_reload
+    }
+    if hasattr(snapshot.slokas, 'cache_info'):
+        status['shard_cache'] = snapshot.slokas.cache_info()
+    return jsonify(status)
+
+def _ndjson_stream(snapshot, cursor):
+    """Stream slokas as newline-delimited JSON, one sloka per line, from a single snapshot"""
+    slokas = snapshot.iter_slokas(cursor)
+    dumps = current_app.json.dumps
+    
+    def generate():
+        for sloka in slokas:
+            yield dumps(sloka) + '\n'
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.headers['X-Total-Count'] = str(snapshot.total_slokas)
+    response.headers['X-Sloka-Version'] = snapshot.version
+    return response
+
 @slokas_bp.route('/all', methods=['GET'])
 def get_all_slokas():
-    """Get all slokas with pagination"""
+    """
+    Get all slokas with pagination
+    
+    Query parameters:
+    - cursor: id of the last sloka already received (keyset pagination)
+    - limit: page size for cursor pagination (default 20, at most 500)
+    - page, per_page: legacy offset pagination, used when no cursor/limit is given
+    - format: 'ndjson' streams the whole corpus (after the cursor, if any) one
+      sloka per line; sending Accept: application/x-ndjson does the same
+    """
     try:
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
+        cursor = request.args.get('cursor') or None
+        snapshot = sloka_db.snapshot
+        total = snapshot.total_slokas
+        
+        stream = request.args.get('format') == 'ndjson' or \
+            request.accept_mimetypes.best == 'application/x-ndjson'
+        if stream:
+            try:
+                return _ndjson_stream(snapshot, cursor)
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'message': str(e)
+                }), 400
         
-        all_slokas = sloka_db.slokas_data.get('slokas', [])
-        total = len(all_slokas)
+        if cursor is not None or 'limit' in request.args:
+            limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                return jsonify({
+                    'success': False,
+                    'message': f'Limit must be between 1 and {MAX_PAGE_SIZE}'
+                }), 400
+            try:
+                slokas, next_cursor = snapshot.get_slokas_page(cursor, limit)
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'message': str(e)
+                }), 400
+            
+            return jsonify({
+                'success': True,
+                'pagination': {
+                    'cursor': cursor,
+                    'next_cursor': next_cursor,
+                    'limit': limit,
+                    'total': total,
+                    'version': snapshot.version
+                },
+                'slokas': slokas
+            })
+        
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', DEFAULT_PAGE_SIZE))
+        if page < 1 or not 1 <= per_page <= MAX_PAGE_SIZE:
+            return jsonify({
+                'success': False,
+                'message': f'page must be positive and per_page between 1 and {MAX_PAGE_SIZE}'
+            }), 400
         
         # Calculate pagination
         start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated_slokas = all_slokas[start_idx:end_idx]
+        end_idx = min(start_idx + per_page, total)
+        paginated_slokas = snapshot.slokas[start_idx:end_idx]
         
         return jsonify({
             'success': True,
@@ -229,14 +521,7 @@ def get_all_slokas():
 def get_categories():
     """Get all available categories"""
     try:
-        stats = sloka_db.get_database_stats()
-        categories = list(stats['categories'].keys())
-        
-        return jsonify({
-            'success': True,
-            'categories': categories,
-            'category_counts': stats['categories']
-        })
+        return _stats_response('categories')
         
     except Exception as e:
         return jsonify({
@@ -248,13 +533,7 @@ def get_categories():
 def get_sources():
     """Get all available source texts"""
     try:
-        stats = sloka_db.get_database_stats()
-        
-        return jsonify({
-            'success': True,
-            'sources': stats['available_sources'],
-            'source_counts': stats['sources']
-        })
+        return _stats_response('sources')
         
     except Exception as e:
         return jsonify({
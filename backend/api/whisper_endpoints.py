@@ -6,12 +6,17 @@ Flask API endpoints for audio transcription and spiritual content creation
 using OpenAI Whisper with the AI Gurus platform.
 """
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, url_for
 from werkzeug.utils import secure_filename
 import os
-import asyncio
 from pathlib import Path
 from services.whisper_service import get_whisper_service
+from services.transcription_cache import get_transcription_cache
+from services.transcription_jobs import (
+    CANCELLED, FAILED, SUCCEEDED, JobQueueFullError, get_transcription_jobs
+)
+from utils.sse import sse_event, sse_response, sse_stream
+import math
 import tempfile
 import uuid
 
@@ -28,13 +33,18 @@ def allowed_file(filename):
 @whisper_bp.route('/transcribe', methods=['POST'])
 def transcribe_audio():
     """
-    Transcribe uploaded audio file
+    Submit an uploaded audio file for transcription
+    
+    Returns 202 with the queued job at once; follow it at /jobs/<id>
+    (or /jobs/<id>/events) and fetch the transcription from /jobs/<id>/result.
     
     Form data:
     - audio_file: Audio file to transcribe
     - content_type: Type of spiritual content (optional)
     - language: Language code (optional, auto-detect if not provided)
     - include_timestamps: Whether to include timestamps (optional, default: true)
+    - stream: Publish segments and content analysis on the events stream as they
+      are transcribed (optional, default: false)
     """
     try:
         # Check if file is present
@@ -62,6 +72,7 @@ def transcribe_audio():
         content_type = request.form.get('content_type', 'general')
         language = request.form.get('language')
         include_timestamps = request.form.get('include_timestamps', 'true').lower() == 'true'
+        stream = request.form.get('stream', 'false').lower() == 'true'
         
         # Validate content type
         valid_content_types = [
@@ -90,43 +101,40 @@ def transcribe_audio():
             # Check file size
             file_size = os.path.getsize(temp_path)
             if file_size > MAX_FILE_SIZE:
+                temp_path.unlink()
                 return jsonify({
                     'success': False,
                     'error': f'File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB'
                 }), 400
             
-            # Get Whisper service and transcribe
-            whisper_service = get_whisper_service()
-            
-            # Run transcription in async context
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            result = loop.run_until_complete(
-                whisper_service.transcribe_audio(
-                    str(temp_path),
-                    content_type=content_type,
-                    language=language,
-                    include_timestamps=include_timestamps
-                )
-            )
-            
-            loop.close()
-            
-            # Add file information to result
-            if result.get('success'):
-                result['file_info'] = {
-                    'original_filename': filename,
-                    'file_size_mb': round(file_size / (1024*1024), 2),
-                    'content_type_analyzed': content_type
-                }
-            
-            return jsonify(result)
-            
-        finally:
-            # Clean up temporary file
+            # The job owns the upload from here and removes it when it finishes
+            job = get_transcription_jobs().submit(str(temp_path), filename, file_size, {
+                'content_type': content_type,
+                'language': language,
+                'include_timestamps': include_timestamps,
+                'stream': stream
+            })
+        except BaseException:
             if temp_path.exists():
                 temp_path.unlink()
+            raise
+        
+        return jsonify({
+            'success': True,
+            'job': job,
+            'status_url': url_for('whisper.get_transcription_job', job_id=job['id']),
+            'events_url': url_for('whisper.transcription_job_events', job_id=job['id']),
+            'result_url': url_for('whisper.get_transcription_job_result', job_id=job['id'])
+        }), 202
+    
+    except JobQueueFullError as e:
+        response = jsonify({
+            'success': False,
+            'error': 'Too many transcriptions are waiting, please try again later',
+            'error_type': type(e).__name__
+        })
+        response.headers['Retry-After'] = str(math.ceil(e.retry_after))
+        return response, 503
     
     except Exception as e:
         current_app.logger.error(f"Error in transcription: {e}")
@@ -136,6 +144,75 @@ def transcribe_audio():
             'details': str(e)
         }), 500
 
+@whisper_bp.route('/jobs/stats', methods=['GET'])
+def get_transcription_job_stats():
+    """Transcription jobs by status and this worker's pool counters"""
+    return jsonify({'success': True, 'stats': get_transcription_jobs().stats()})
+
+@whisper_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_transcription_job(job_id):
+    """Status and progress of a transcription job"""
+    job = get_transcription_jobs().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
+
+@whisper_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def get_transcription_job_result(job_id):
+    """
+    Transcription of a finished job
+    
+    202 while the job is queued or running, 409 when it failed or was cancelled.
+    """
+    jobs = get_transcription_jobs()
+    job = jobs.result(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    if job['status'] != SUCCEEDED:
+        status_code = 409 if job['status'] in (FAILED, CANCELLED) else 202
+        return jsonify({'success': False, 'error': f"Job is {job['status']}", 'job': jobs.get(job_id)}), status_code
+    
+    result = dict(job['result'])
+    result['job_id'] = job_id
+    result['file_info'] = {
+        'original_filename': job['filename'],
+        'file_size_mb': round(job['file_size'] / (1024*1024), 2),
+        'content_type_analyzed': job['options'].get('content_type')
+    }
+    return jsonify(result)
+
+@whisper_bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_transcription_job(job_id):
+    """Cancel a queued job, or stop a running one at its next progress step"""
+    job = get_transcription_jobs().cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
+
+@whisper_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def transcription_job_events(job_id):
+    """
+    Server-sent events until the job finishes
+    
+    - job: status and progress, on every change
+    - segment: {id, start, end, text} as each segment is transcribed (stream jobs)
+    - analysis: the content analysis so far, when it changes, at most every
+      WHISPER_STREAM_ANALYSIS_SECONDS (stream jobs)
+    - reset: a retry started over; drop the segments received so far
+    
+    Segment and analysis events carry ids; a reconnecting client sends
+    Last-Event-ID (or ?after=) to continue where it left off.
+    """
+    jobs = get_transcription_jobs()
+    if jobs.get(job_id) is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('after', '0')
+    after = int(last_event_id) if last_event_id.isdigit() else 0
+    return sse_response(sse_stream(
+        jobs.stream(job_id, after=after),
+        lambda event: sse_event(event[1], event=event[0], event_id=event[2])
+    ))
+
 @whisper_bp.route('/content-types', methods=['GET'])
 def get_content_types():
     """Get available content types for transcription"""
@@ -378,6 +455,7 @@ def whisper_health_check():
     
     try:
         whisper_service = get_whisper_service()
+        transcription_cache = get_transcription_cache()
         
         return jsonify({
             'success': True,
@@ -385,6 +463,8 @@ def whisper_health_check():
             'service': 'whisper_content_creation',
             'model_size': whisper_service.model_size,
             'device': whisper_service.device,
+            'inference': whisper_service.inference.stats(),
+            'transcription_cache': transcription_cache.stats() if transcription_cache else None,
             'supported_formats': list(ALLOWED_EXTENSIONS),
             'max_file_size_mb': MAX_FILE_SIZE // (1024*1024)
         })
@@ -0,0 +1,153 @@
+"""
+AIService Concurrency Benchmark
+===============================
+
+Runs concurrent guru requests against a local fake OpenAI server and
+compares the old pattern (the synchronous OpenAI client called from inside
+coroutines, which blocks the event loop) with AIService's pooled
+AsyncOpenAI client.
+
+The fake server answers /v1/chat/completions after a fixed delay, standing
+in for model latency, and counts the TCP connections it accepts so
+keep-alive reuse is visible.
+
+Usage:
+    python backend/benchmarks/bench_ai_client.py [--requests 32] [--waves 2] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR.parent))  # services import backend.models
+sys.path.insert(0, str(BACKEND_DIR))
+
+import openai
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        request = json.loads(body or b"{}")
+        time.sleep(self.server.latency)
+        payload = json.dumps({
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "Breathe, and act without attachment."},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 20, "completion_tokens": 8, "total_tokens": 28},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # accept bursts of concurrent connections
+
+
+def start_fake_server(latency):
+    server = FakeOpenAIServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    server.latency = latency
+    server.connections = 0
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_blocking_client(base_url, requests, waves):
+    """Previous behaviour: a synchronous client call inside each coroutine"""
+    client = openai.OpenAI(api_key="bench", base_url=base_url)
+
+    async def ask(i):
+        return client.chat.completions.create(
+            model="gpt-4",
+            messages=[{"role": "user", "content": f"Question {i}"}],
+            max_tokens=800,
+            temperature=0.7,
+        )
+
+    for _ in range(waves):
+        await asyncio.gather(*(ask(i) for i in range(requests)))
+
+
+async def run_pooled_client(requests, waves):
+    """AIService on the pooled AsyncOpenAI client; later waves reuse the kept-alive connections"""
+    from services.ai_service import AIService  # already imported by main(), outside the timing
+    from services.openai_client import close_async_openai_clients
+
+    service = AIService()
+    for _ in range(waves):
+        results = await asyncio.gather(*(
+            service.get_spiritual_guidance("meditation", f"Question {i}") for i in range(requests)
+        ))
+        failures = [result for result in results if not result.get("success")]
+        if failures:
+            raise RuntimeError(f"{len(failures)} requests failed: {failures[0]}")
+    await close_async_openai_clients()
+
+
+def measure(server, label, coroutine):
+    connections = server.connections
+    started = time.perf_counter()
+    asyncio.run(coroutine)
+    elapsed = time.perf_counter() - started
+    return label, elapsed, server.connections - connections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=32, help="concurrent guru requests per run")
+    parser.add_argument("--waves", type=int, default=2, help="consecutive bursts on the same event loop")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake model latency in seconds")
+    args = parser.parse_args()
+
+    server = start_fake_server(args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ["OPENAI_API_KEY"] = "bench"
+    os.environ["OPENAI_BASE_URL"] = base_url
+    # Waves repeat the same questions; measure the client, not the response cache
+    os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+    os.environ["SEMANTIC_CACHE_ENABLED"] = "false"
+    import services.ai_service  # noqa: F401  (module import is not part of the measurement)
+
+    runs = [
+        measure(server, "blocking sync client", run_blocking_client(base_url, args.requests, args.waves)),
+        measure(server, "pooled AsyncOpenAI", run_pooled_client(args.requests, args.waves)),
+    ]
+
+    total = args.requests * args.waves
+    print(f"{args.waves} waves of {args.requests} concurrent requests, {args.latency * 1000:.0f} ms fake model latency")
+    print(f"{'client':<22} {'seconds':>8} {'req/s':>8} {'connections':>12}")
+    for label, elapsed, connections in runs:
+        print(f"{label:<22} {elapsed:>8.2f} {total / elapsed:>8.1f} {connections:>12}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Sloka Storage Backend Benchmark
+===============================
+
+Compares the JSON and memory-mapped (compiled) slokas database backends:
+cold-load time and per-worker memory with several workers running at once,
+the way gunicorn runs them.
+
+Each worker is a fresh interpreter that loads the database, reads every
+sloka once (as serving traffic would) and then reports VmRSS, Pss and
+private memory from /proc. Pss splits shared pages between the processes
+mapping them, so it is the fairest per-worker figure.
+
+Usage:
+    python backend/benchmarks/bench_sloka_store.py [--slokas 20000] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from models.sloka_store import compile_corpus
+
+BACKENDS = ("json", "mmap")
+
+
+def build_corpus(path, size):
+    """Write a synthetic corpus of `size` slokas cycled from the bundled database"""
+    with open(BACKEND_DIR / "comprehensive_slokas_database.json", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    base = corpus["slokas"]
+    slokas = []
+    for i in range(size):
+        sloka = dict(base[i % len(base)])
+        sloka["id"] = f"{sloka['id']}_{i}"
+        slokas.append(sloka)
+
+    corpus["slokas"] = slokas
+    corpus["metadata"]["total_slokas"] = size
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(corpus, f, ensure_ascii=False)
+
+
+def memory_usage():
+    """VmRSS, Pss and private memory of this process in KB"""
+    usage = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                usage["rss_kb"] = int(line.split()[1])
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            field, _, value = line.partition(":")
+            if field == "Pss":
+                usage["pss_kb"] = int(value.split()[0])
+            elif field in ("Private_Clean", "Private_Dirty"):
+                usage["private_kb"] = usage.get("private_kb", 0) + int(value.split()[0])
+    return usage
+
+
+def run_worker(database_file, backend):
+    """Worker process: load, touch every sloka, then report memory when asked"""
+    baseline = memory_usage()
+    started = time.perf_counter()
+    from models.slokas_database import SlokaDatabase
+    database = SlokaDatabase(database_file, backend=backend)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    for sloka in database.slokas_data["slokas"]:
+        sloka.get("translation")
+
+    print("ready", flush=True)
+    sys.stdin.readline()  # wait until every worker has loaded, so shared pages are counted once
+    usage = memory_usage()
+    print(json.dumps({
+        "load_ms": load_ms,
+        "baseline_rss_kb": baseline["rss_kb"],
+        **usage,
+    }), flush=True)
+    sys.stdin.readline()
+
+
+def measure(database_file, backend, workers):
+    """Start `workers` concurrent worker processes and collect their reports"""
+    env = dict(os.environ, SLOKA_DB_RELOAD_INTERVAL="0")
+    processes = [
+        subprocess.Popen(
+            [sys.executable, __file__, "--worker", str(database_file), backend],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=env,
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        # Skip anything the database prints while loading
+        while process.stdout.readline().strip() != "ready":
+            pass
+    reports = []
+    for process in processes:
+        process.stdin.write("measure\n")
+        process.stdin.flush()
+        reports.append(json.loads(process.stdout.readline()))
+    for process in processes:
+        process.stdin.close()
+        process.wait()
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slokas", type=int, default=20000, help="synthetic corpus size")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent worker processes")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database_file = Path(workdir) / "slokas.json"
+        build_corpus(database_file, args.slokas)
+        started = time.perf_counter()
+        store_file = compile_corpus(database_file)
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        print(f"Corpus: {args.slokas} slokas, JSON {database_file.stat().st_size / 1024:.0f} KB, "
+              f"compiled {store_file.stat().st_size / 1024:.0f} KB in {compile_ms:.0f} ms")
+        print(f"{'backend':<8} {'load ms':>9} {'RSS MB':>8} {'PSS MB':>8} {'private MB':>11} {'RSS over baseline MB':>21}")
+        for backend in BACKENDS:
+            reports = measure(database_file, backend, args.workers)
+            median = lambda key: statistics.median(report[key] for report in reports)
+            print(f"{backend:<8} {median('load_ms'):>9.1f} {median('rss_kb') / 1024:>8.1f} "
+                  f"{median('pss_kb') / 1024:>8.1f} {median('private_kb') / 1024:>11.1f} "
+                  f"{(median('rss_kb') - median('baseline_rss_kb')) / 1024:>21.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--worker":
+        run_worker(sys.argv[2], sys.argv[3])
+    else:
+        main()
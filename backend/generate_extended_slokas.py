@@ -4,9 +4,11 @@ Slokas Database Generator - Creates 100+ Comprehensive Slokas
 ============================================================
 
 This script generates a comprehensive database with 100+ slokas from various spiritual traditions.
+Pass --sharded to also split it into per-source shards (see models/sloka_shards.py).
 """
 
 import json
+import sys
 from datetime import datetime
 
 def create_extended_slokas_database():
@@ -253,4 +255,10 @@ if __name__ == "__main__":
     
     print(f"✅ Extended database created with {extended_db['metadata']['total_slokas']} slokas")
     print(f"📁 Saved to: extended_slokas_database.json")
+    
+    # --sharded also writes one shard per source tradition plus a manifest
+    if "--sharded" in sys.argv:
+        from models.sloka_shards import build_shards
+        manifest_path = build_shards('extended_slokas_database.json')
+        print(f"🗂️ Shards written to: {manifest_path.parent}")
     print("🌟 Ready for integration!")
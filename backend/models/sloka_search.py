@@ -0,0 +1,257 @@
+"""
+Sloka Full-Text Search Index
+============================
+
+Inverted index over the slokas corpus used by /api/slokas/search.
+Text is folded (IAST diacritics removed, lowercased), tokenized, lightly
+stemmed and ranked with BM25 using precomputed per-term impact scores.
+"""
+
+import math
+import re
+import unicodedata
+import heapq
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Fields that are searched, with their BM25 term-frequency weights
+SEARCH_FIELDS = {
+    "translation": 1.0,
+    "meaning": 1.0,
+    "transliteration": 1.0,
+    "related_concepts": 1.5,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Rarest-term postings longer than this are ranked with the threshold algorithm instead
+INTERSECTION_SCAN_LIMIT = 10000
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his i in into is it its
+me my not of on or our she so than that the their them then there these they
+this to was we were what when which who will with you your
+""".split())
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_OR_PATTERN = re.compile(r"\s+OR\s+|\s*\|\s*")
+
+
+def fold_text(text: str) -> str:
+    """Lowercase and strip diacritics so "karmaṇa" and "karmana" compare equal"""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """Light suffix-stripping stemmer shared by indexing and querying (memoized per token)"""
+    if len(token) <= 3 or token.isdigit():
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("sses"):
+        return token[:-2]
+    for suffix in ("fulness", "ness", "ful", "ment", "ingly", "edly", "ing", "ed", "ly"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            # running -> runn -> run
+            if len(token) > 3 and token[-1] == token[-2] and token[-1] not in "ls":
+                token = token[:-1]
+            return token
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Fold, split and stem text into index terms, dropping stopwords"""
+    return [
+        stem(token)
+        for token in _TOKEN_PATTERN.findall(fold_text(text))
+        if token not in STOPWORDS
+    ]
+
+
+def parse_query(query: str, mode: str = "and") -> List[List[str]]:
+    """
+    Parse a query into OR-ed clauses of AND-ed terms.
+
+    Whitespace-separated terms are AND-ed; ``OR`` (or ``|``) separates
+    alternative clauses. With ``mode="or"`` every term is its own clause.
+    """
+    clauses = []
+    for part in _OR_PATTERN.split(query.strip()):
+        terms = list(dict.fromkeys(tokenize(part)))
+        if not terms:
+            continue
+        if mode == "or":
+            clauses.extend([term] for term in terms)
+        else:
+            clauses.append(terms)
+    return clauses
+
+
+class SlokaSearchIndex:
+    """BM25-ranked inverted index mapping terms to sloka positions"""
+
+    def __init__(self, slokas: Sequence[Dict]):
+        self.total_documents = len(slokas)
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._ranked: Dict[str, List[int]] = {}
+        self._build(slokas)
+
+    def _build(self, slokas: Sequence[Dict]):
+        term_frequencies = []
+        lengths = []
+
+        for sloka in slokas:
+            frequencies: Dict[str, float] = {}
+            length = 0.0
+            for field, weight in SEARCH_FIELDS.items():
+                value = sloka.get(field) or ""
+                if isinstance(value, list):
+                    value = " ".join(value)
+                for term in tokenize(value):
+                    frequencies[term] = frequencies.get(term, 0.0) + weight
+                    length += weight
+            term_frequencies.append(frequencies)
+            lengths.append(length)
+
+        average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        document_frequency: Dict[str, int] = {}
+        for frequencies in term_frequencies:
+            for term in frequencies:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+
+        idf = {
+            term: math.log(1 + (self.total_documents - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+        postings = self._postings = {term: {} for term in document_frequency}
+
+        # Per-term BM25 contributions are fixed for a static corpus, so store them directly
+        for position, frequencies in enumerate(term_frequencies):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * (lengths[position] / average_length if average_length else 0))
+            for term, tf in frequencies.items():
+                postings[term][position] = idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+
+    def _ranked_positions(self, term: str) -> List[int]:
+        """Postings for a single term ordered by descending impact"""
+        ranked = self._ranked.get(term)
+        if ranked is None:
+            postings = self._postings.get(term, {})
+            ranked = sorted(postings, key=lambda position: (-postings[position], position))
+            self._ranked[term] = ranked
+        return ranked
+
+    def search(self, query: str, mode: str = "and", limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Search the index.
+
+        Args:
+            query: Free-text query; terms are AND-ed, ``OR`` separates clauses
+            mode: ``"and"`` (default) or ``"or"`` to match any term
+            limit: Maximum number of results (all matches if None)
+
+        Returns:
+            List of (position, score) pairs, best match first
+        """
+        clauses = parse_query(query, mode)
+        if not clauses:
+            return []
+
+        # Single-term queries are answered straight from the impact-ordered postings
+        if len(clauses) == 1 and len(clauses[0]) == 1:
+            term = clauses[0][0]
+            ranked = self._ranked_positions(term)
+            if limit is not None:
+                ranked = ranked[:limit]
+            postings = self._postings.get(term, {})
+            return [(position, postings[position]) for position in ranked]
+
+        # OR queries and AND queries over very common terms stop early when a limit is given;
+        # otherwise a rarest-first intersection is cheapest
+        if limit is not None:
+            smallest = min(len(self._postings.get(term, ())) for term in clauses[0])
+            if len(clauses) > 1 or smallest > INTERSECTION_SCAN_LIMIT:
+                return self._search_top_k(clauses, limit)
+
+        scores: Dict[int, float] = {}
+        for clause in clauses:
+            postings = [self._postings.get(term) for term in clause]
+            if not all(postings):
+                continue
+            # Intersect starting from the rarest term
+            postings.sort(key=len)
+            rarest, others = postings[0], postings[1:]
+            for position, impact in rarest.items():
+                total = impact
+                for other in others:
+                    other_impact = other.get(position)
+                    if other_impact is None:
+                        break
+                    total += other_impact
+                else:
+                    scores[position] = total
+
+        if len(clauses) > 1:
+            # Documents matching one clause still earn impact from other clauses' terms
+            scores = {position: self._score(position, clauses) for position in scores}
+
+        ordering = lambda item: (item[1], -item[0])
+        if limit is None:
+            return sorted(scores.items(), key=ordering, reverse=True)
+        return heapq.nlargest(limit, scores.items(), key=ordering)
+
+    def _score(self, position: int, clauses: List[List[str]]) -> float:
+        """Sum impacts of every distinct query term present in the document"""
+        terms = {term for clause in clauses for term in clause}
+        return sum(self._postings[term].get(position, 0.0) for term in terms if term in self._postings)
+
+    def _matches(self, position: int, clauses: List[List[str]]) -> bool:
+        return any(
+            all(position in self._postings.get(term, ()) for term in clause)
+            for clause in clauses
+        )
+
+    def _search_top_k(self, clauses: List[List[str]], limit: int) -> List[Tuple[int, float]]:
+        """
+        Threshold-algorithm top-k: walk the impact-ordered postings of all
+        query terms in lockstep and stop once no unseen document can beat
+        the current k-th best score.
+        """
+        terms = [term for term in dict.fromkeys(term for clause in clauses for term in clause) if term in self._postings]
+        if not terms:
+            return []
+
+        ranked = [self._ranked_positions(term) for term in terms]
+        postings = [self._postings[term] for term in terms]
+        seen = set()
+        top: List[Tuple[float, int]] = []  # min-heap of (score, -position)
+
+        for depth in range(max(len(positions) for positions in ranked)):
+            threshold = 0.0
+            for positions, term_postings in zip(ranked, postings):
+                if depth >= len(positions):
+                    continue
+                position = positions[depth]
+                threshold += term_postings[position]
+                if position in seen:
+                    continue
+                seen.add(position)
+                if not self._matches(position, clauses):
+                    continue
+                entry = (self._score(position, clauses), -position)
+                if len(top) < limit:
+                    heapq.heappush(top, entry)
+                elif entry > top[0]:
+                    heapq.heapreplace(top, entry)
+            # Strictly greater so equal-score ties still resolve by corpus position
+            if len(top) == limit and top[0][0] > threshold:
+                break
+
+        return [(-negative_position, score) for score, negative_position in sorted(top, reverse=True)]
@@ -0,0 +1,274 @@
+"""
+Sharded Sloka Corpus
+====================
+
+Splits a slokas database into one JSON shard per source tradition plus a
+manifest, and serves the corpus as a sequence that loads shards on first
+access. Loaded shards are kept in an LRU cache bounded by a byte budget,
+so large multi-tradition corpora only pay for the shards in use.
+
+Layout:
+    <name>_shards/
+        manifest.json              metadata, shard list and index catalog
+        shards/<slug>-<hash>.json  {"source": ..., "slokas": [...]}
+
+The manifest carries every sloka's (id, category, guru_assignment, source)
+and its position in the source JSON, so lookup indexes and statistics are
+built without opening any shard and positions (the daily rotation, /all
+cursors) match the JSON backend under the same content-hash version.
+
+The full-text search index and the relevance engine read every sloka, so
+the first search or /relevant request loads each shard once in turn (the
+LRU budget still bounds how many stay loaded). Lazy loading saves startup
+time and steady-state memory, not that first pass.
+
+Shard files are content-addressed: rebuilding writes new files and a new
+manifest, and processes still serving the old manifest keep reading the
+old shards.
+
+Usage:
+    python models/sloka_shards.py comprehensive_slokas_database.json [output_dir]
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+MANIFEST_NAME = "manifest.json"
+SHARDS_SUFFIX = "_shards"
+FORMAT_VERSION = 2
+
+# Shard file bytes kept loaded per process (parsed shards take a few times more memory)
+SHARD_CACHE_BYTES = int(os.environ.get('SLOKA_SHARD_CACHE_BYTES', str(64 * 1024 * 1024)))
+
+# Shard for slokas that match none of the metadata sources
+OTHER_SHARD = "Other Traditions"
+
+
+def sharded_path_for(json_path: Union[str, Path]) -> Path:
+    """Default shard directory next to a JSON database"""
+    json_path = Path(json_path)
+    return json_path.with_name(json_path.stem + SHARDS_SUFFIX)
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "shard"
+
+
+def _match_word(name: str) -> str:
+    """Leading word of a metadata source, singularized ("Upanishads" -> "upanishad")"""
+    word = name.split()[0].lower()
+    return word[:-1] if word.endswith("s") and not word.endswith("ss") else word
+
+
+def shard_for(sloka: Dict[str, Any], sources: List[str]) -> str:
+    """
+    Pick the shard (source tradition) of a sloka.
+
+    An explicit "tradition" field wins; otherwise the first metadata source
+    whose leading word appears in the sloka's source ("Isha Upanishad" goes
+    to "Upanishads"), falling back to OTHER_SHARD.
+    """
+    if sloka.get("tradition"):
+        return sloka["tradition"]
+    text = (sloka.get("source") or "").lower()
+    for name in sources:
+        if _match_word(name) in text:
+            return name
+    return OTHER_SHARD
+
+
+def _write_atomic(path: Path, data: bytes):
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_name, path)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.unlink(temp_name)
+        raise
+
+
+def build_shards(json_path: Union[str, Path], output_dir: Optional[Union[str, Path]] = None,
+                 prune: bool = False) -> Path:
+    """
+    Split a JSON slokas database into per-source shards and a manifest.
+
+    The manifest is written last, so readers never see a manifest that
+    references missing shards. With ``prune=True`` shard files no longer
+    referenced are deleted; leave it off while other processes may still
+    be serving the previous manifest.
+
+    Returns:
+        Path of the manifest
+    """
+    json_path = Path(json_path)
+    output_dir = Path(output_dir) if output_dir else sharded_path_for(json_path)
+    shard_dir = output_dir / "shards"
+    shard_dir.mkdir(parents=True, exist_ok=True)
+
+    raw = json_path.read_bytes()
+    corpus = json.loads(raw)
+    metadata = corpus.get("metadata", {})
+    sources = metadata.get("sources", [])
+
+    groups: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+    for position, sloka in enumerate(corpus.get("slokas", [])):
+        groups.setdefault(shard_for(sloka, sources), []).append((position, sloka))
+
+    # Metadata order first, so shard files are stable across builds
+    order = [name for name in sources if name in groups] + [name for name in groups if name not in sources]
+
+    shards = []
+    for name in order:
+        positions = [position for position, _ in groups[name]]
+        slokas = [sloka for _, sloka in groups[name]]
+        data = json.dumps({"source": name, "slokas": slokas}, ensure_ascii=False).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        file_name = f"{_slug(name)}-{digest[:12]}.json"
+        if not (shard_dir / file_name).exists():
+            _write_atomic(shard_dir / file_name, data)
+        shards.append({
+            "name": name,
+            "file": f"shards/{file_name}",
+            "count": len(slokas),
+            "bytes": len(data),
+            "sha256": digest,
+            "positions": positions,
+            "rows": [
+                [sloka.get("id"), sloka.get("category"), sloka.get("guru_assignment"), sloka.get("source")]
+                for sloka in slokas
+            ],
+        })
+
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        # Same content hash the JSON backend uses, so both backends report the same version
+        "source_version": hashlib.sha256(raw).hexdigest()[:16],
+        "metadata": metadata,
+        "shards": shards,
+    }
+    _write_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+
+    if prune:
+        referenced = {Path(shard["file"]).name for shard in shards}
+        for path in shard_dir.glob("*.json"):
+            if path.name not in referenced:
+                path.unlink()
+
+    return manifest_path
+
+
+class ShardedSlokaStore(Sequence):
+    """
+    Read-only sequence of slokas spread over lazily loaded shards.
+
+    Positions follow the source JSON whichever shard holds each sloka, so
+    iterating in order may revisit shards. Shards are parsed on first
+    access and evicted least-recently-used once the loaded shard bytes
+    exceed the budget (the shard being read is always kept).
+    """
+
+    # Build the search index on first search rather than loading every shard at startup
+    lazy = True
+
+    def __init__(self, manifest_path: Union[str, Path], cache_bytes: Optional[int] = None):
+        self.path = Path(manifest_path)
+        raw = self.path.read_bytes()
+        manifest = json.loads(raw)
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} sloka shard manifest")
+
+        # A hand-assembled manifest embeds every shard's hash, so its own hash versions the corpus
+        self.version = manifest.get("source_version") or hashlib.sha256(raw).hexdigest()[:16]
+        self.metadata = manifest.get("metadata", {})
+        self.shards = manifest["shards"]
+        self.cache_bytes = SHARD_CACHE_BYTES if cache_bytes is None else cache_bytes
+
+        # (shard, offset within shard) of each corpus position
+        self._total = sum(shard["count"] for shard in self.shards)
+        self._locations: List[Tuple[int, int]] = [None] * self._total
+        for shard_index, shard in enumerate(self.shards):
+            for offset, position in enumerate(shard["positions"]):
+                self._locations[position] = (shard_index, offset)
+
+        self._cache: "OrderedDict[int, List[Dict[str, Any]]]" = OrderedDict()
+        self._loaded_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(self._total))]
+        if index < 0:
+            index += self._total
+        if not 0 <= index < self._total:
+            raise IndexError("sloka index out of range")
+        shard_index, offset = self._locations[index]
+        return self._shard(shard_index)[offset]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for shard_index, offset in self._locations:
+            yield self._shard(shard_index)[offset]
+
+    def _shard(self, shard_index: int) -> List[Dict[str, Any]]:
+        """Slokas of a shard, loading it and evicting cold shards as needed"""
+        with self._lock:
+            slokas = self._cache.get(shard_index)
+            if slokas is not None:
+                self._cache.move_to_end(shard_index)
+                self._stats["hits"] += 1
+                return slokas
+
+            shard = self.shards[shard_index]
+            with open(self.path.parent / shard["file"], encoding="utf-8") as f:
+                slokas = json.load(f)["slokas"]
+            self._stats["misses"] += 1
+
+            self._cache[shard_index] = slokas
+            self._loaded_bytes += shard["bytes"]
+            while self._loaded_bytes > self.cache_bytes and len(self._cache) > 1:
+                evicted, _ = self._cache.popitem(last=False)
+                self._loaded_bytes -= self.shards[evicted]["bytes"]
+                self._stats["evictions"] += 1
+            return slokas
+
+    def index_rows(self) -> Iterator[Tuple[Any, Any, Any, Any]]:
+        """Yield (id, category, guru_assignment, source) for every record, in corpus order, from the manifest"""
+        for shard_index, offset in self._locations:
+            yield tuple(self.shards[shard_index]["rows"][offset])
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Shard cache counters and the shards currently loaded"""
+        with self._lock:
+            return {
+                **self._stats,
+                "loaded_bytes": self._loaded_bytes,
+                "budget_bytes": self.cache_bytes,
+                "loaded_shards": [self.shards[index]["name"] for index in self._cache],
+            }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <slokas_database.json> [output_dir]")
+        sys.exit(1)
+
+    manifest_path = build_shards(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    store = ShardedSlokaStore(manifest_path)
+    print(f"✅ Sharded {len(store)} slokas into {len(store.shards)} shards at {manifest_path.parent} (version {store.version})")
+    for shard in store.shards:
+        print(f"   {shard['name']}: {shard['count']} slokas, {shard['bytes'] / 1024:.1f} KB")
@@ -0,0 +1,270 @@
+"""
+Compact Memory-Mapped Sloka Store
+=================================
+
+Compiles comprehensive_slokas_database.json into a single binary file of
+offset tables and interned UTF-8 strings, and reads records lazily from a
+read-only memory mapping. Forked or independently started workers mapping
+the same file share its pages through the OS page cache, and opening the
+store needs no JSON parse.
+
+File layout (little-endian):
+    header     magic, format version, counts, source hash, section offsets
+    metadata   JSON-encoded corpus metadata
+    fields     JSON-encoded list of field names
+    strings    (string_count + 1) u32 offsets into the string blob
+    blob       interned UTF-8 strings
+    lists      (list_count + 1) u32 offsets into list items
+    items      u32 string ids of list elements
+    records    record_count x field_count x (kind u32, ref u32)
+
+Usage:
+    python models/sloka_store.py comprehensive_slokas_database.json [output.slkb]
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+MAGIC = b"SLKB"
+FORMAT_VERSION = 1
+STORE_SUFFIX = ".slkb"
+
+HEADER = struct.Struct("<4sHHIIII16s9Q")
+
+KIND_ABSENT = 0
+KIND_STRING = 1
+KIND_STRING_LIST = 2
+KIND_JSON = 3
+
+# Fields read without decoding whole records when building lookup indexes
+INDEX_FIELDS = ("id", "category", "guru_assignment", "source")
+
+
+def compiled_path_for(json_path: Union[str, Path]) -> Path:
+    """Default compiled store path next to a JSON database"""
+    return Path(json_path).with_suffix(STORE_SUFFIX)
+
+
+def compile_corpus(json_path: Union[str, Path], output_path: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Compile a JSON slokas database into the binary store format.
+
+    The output is written to a temporary file and renamed into place, so
+    processes still mapping the previous file keep reading a consistent copy.
+
+    Returns:
+        Path of the compiled store
+    """
+    json_path = Path(json_path)
+    output_path = Path(output_path) if output_path else compiled_path_for(json_path)
+
+    raw = json_path.read_bytes()
+    corpus = json.loads(raw)
+    slokas = corpus.get("slokas", [])
+    # Same content hash the JSON backend uses, so both backends report the same version
+    source_hash = hashlib.sha256(raw).digest()[:16]
+
+    fields: List[str] = []
+    for sloka in slokas:
+        for field in sloka:
+            if field not in fields:
+                fields.append(field)
+
+    strings: Dict[str, int] = {}
+    lists: List[List[int]] = []
+
+    def intern(text: str) -> int:
+        string_id = strings.get(text)
+        if string_id is None:
+            string_id = strings[text] = len(strings)
+        return string_id
+
+    records = []
+    for sloka in slokas:
+        row = []
+        for field in fields:
+            if field not in sloka:
+                row.extend((KIND_ABSENT, 0))
+                continue
+            value = sloka[field]
+            if isinstance(value, str):
+                row.extend((KIND_STRING, intern(value)))
+            elif isinstance(value, list) and all(isinstance(item, str) for item in value):
+                lists.append([intern(item) for item in value])
+                row.extend((KIND_STRING_LIST, len(lists) - 1))
+            else:
+                row.extend((KIND_JSON, intern(json.dumps(value, ensure_ascii=False))))
+        records.append(row)
+
+    blob = bytearray()
+    string_offsets = [0]
+    for text in strings:  # dicts keep insertion order, i.e. string id order
+        blob += text.encode("utf-8")
+        string_offsets.append(len(blob))
+
+    list_offsets = [0]
+    list_items: List[int] = []
+    for items in lists:
+        list_items.extend(items)
+        list_offsets.append(len(list_items))
+
+    sections = [
+        json.dumps(corpus.get("metadata", {}), ensure_ascii=False).encode("utf-8"),
+        json.dumps(fields).encode("utf-8"),
+        struct.pack(f"<{len(string_offsets)}I", *string_offsets),
+        bytes(blob),
+        struct.pack(f"<{len(list_offsets)}I", *list_offsets),
+        struct.pack(f"<{len(list_items)}I", *list_items),
+        struct.pack(f"<{len(records) * len(fields) * 2}I", *(ref for row in records for ref in row)),
+    ]
+
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        # Keep u32 tables 4-byte aligned so they can be cast in place
+        position += -position % 4
+        offsets.append(position)
+        position += len(section)
+
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0,
+        len(slokas), len(fields), len(strings), len(lists),
+        source_hash,
+        offsets[0], len(sections[0]),
+        offsets[1], len(sections[1]),
+        offsets[2], offsets[3], offsets[4], offsets[5], offsets[6],
+    )
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=output_path.parent, suffix=STORE_SUFFIX + ".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            for offset, section in zip(offsets, sections):
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(section)
+        os.replace(temp_name, output_path)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.unlink(temp_name)
+        raise
+
+    return output_path
+
+
+class MappedSlokaStore(Sequence):
+    """
+    Read-only sequence of slokas backed by a memory-mapped compiled store.
+
+    Records are decoded into dicts on access; nothing is materialized up front.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        if sys.byteorder != "little":
+            raise ValueError("Compiled sloka stores are little-endian and can only be mapped on little-endian hosts")
+
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, format_version, _reserved,
+         self._record_count, self._field_count, string_count, list_count,
+         source_hash,
+         metadata_offset, metadata_length, fields_offset, fields_length,
+         strings_offset, blob_offset, lists_offset, items_offset, records_offset) = HEADER.unpack_from(self._mmap, 0)
+
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} compiled sloka store")
+
+        self.version = source_hash.hex()[:16]
+        self.metadata = json.loads(self._mmap[metadata_offset:metadata_offset + metadata_length])
+        self.fields = json.loads(self._mmap[fields_offset:fields_offset + fields_length])
+        self._field_positions = {field: index for index, field in enumerate(self.fields)}
+
+        view = memoryview(self._mmap)
+        self._view = view
+        self._string_offsets = view[strings_offset:strings_offset + (string_count + 1) * 4].cast("I")
+        self._blob = view[blob_offset:lists_offset]
+        self._list_offsets = view[lists_offset:lists_offset + (list_count + 1) * 4].cast("I")
+        self._list_items = view[items_offset:records_offset].cast("I")
+        self._records = view[records_offset:records_offset + self._record_count * self._field_count * 8].cast("I")
+
+    def __len__(self) -> int:
+        return self._record_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(self._record_count))]
+        if index < 0:
+            index += self._record_count
+        if not 0 <= index < self._record_count:
+            raise IndexError("sloka index out of range")
+
+        base = index * self._field_count * 2
+        sloka = {}
+        for field_index, field in enumerate(self.fields):
+            kind = self._records[base + field_index * 2]
+            if kind != KIND_ABSENT:
+                sloka[field] = self._decode(kind, self._records[base + field_index * 2 + 1])
+        return sloka
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for index in range(self._record_count):
+            yield self[index]
+
+    def _string(self, string_id: int) -> str:
+        return str(self._blob[self._string_offsets[string_id]:self._string_offsets[string_id + 1]], "utf-8")
+
+    def _decode(self, kind: int, ref: int) -> Any:
+        if kind == KIND_STRING:
+            return self._string(ref)
+        if kind == KIND_STRING_LIST:
+            start, end = self._list_offsets[ref], self._list_offsets[ref + 1]
+            return [self._string(string_id) for string_id in self._list_items[start:end]]
+        return json.loads(self._string(ref))
+
+    def get_field(self, index: int, field: str, default: Any = None) -> Any:
+        """Decode a single field of a record without building the whole dict"""
+        field_index = self._field_positions.get(field)
+        if field_index is None:
+            return default
+        slot = (index * self._field_count + field_index) * 2
+        kind = self._records[slot]
+        if kind == KIND_ABSENT:
+            return default
+        return self._decode(kind, self._records[slot + 1])
+
+    def index_rows(self) -> Iterator[Tuple[Any, Any, Any, str]]:
+        """Yield (id, category, guru_assignment, source) for every record, in order"""
+        for index in range(self._record_count):
+            yield (
+                self.get_field(index, "id"),
+                self.get_field(index, "category"),
+                self.get_field(index, "guru_assignment"),
+                self.get_field(index, "source"),
+            )
+
+    def close(self):
+        """Release the mapping (records can no longer be read afterwards)"""
+        for view in (self._string_offsets, self._blob, self._list_offsets, self._list_items, self._records, self._view):
+            view.release()
+        self._mmap.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <slokas_database.json> [output{STORE_SUFFIX}]")
+        sys.exit(1)
+
+    output = compile_corpus(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    store = MappedSlokaStore(output)
+    print(f"✅ Compiled {len(store)} slokas to {output} ({output.stat().st_size / 1024:.1f} KB, version {store.version})")
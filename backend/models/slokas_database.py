@@ -1,118 +1,285 @@
 import json
 import random
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from heapq import merge
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from zoneinfo import ZoneInfo
+from .sloka_search import SlokaSearchIndex
+from .sloka_store import MappedSlokaStore, compiled_path_for
+from .sloka_shards import ShardedSlokaStore, sharded_path_for, MANIFEST_NAME
 
-class SlokaDatabase:
-    """Comprehensive Slokas Database for AI Gurus Platform"""
+# Upper bound on memoized source queries (the query comes straight from the URL)
+SOURCE_LOOKUP_CACHE_SIZE = 256
+
+# Upper bound on memoized formatted sloka renderings
+RENDER_CACHE_SIZE = 4096
+
+# Days of daily slokas precomputed ahead of today (plus yesterday for lagging time zones)
+DAILY_SCHEDULE_DAYS = 7
+
+# Upper bound on memoized (guru, cycle) rotations; arbitrary ?date= values can touch many cycles
+DAILY_ROTATION_CACHE_SIZE = 256
+
+# Seconds between checks of the database file for changes (0 disables the watcher)
+RELOAD_INTERVAL_SECONDS = float(os.environ.get('SLOKA_DB_RELOAD_INTERVAL', '0'))
+
+# Storage backend: "json" parses the JSON file, "mmap" maps the compiled store built by
+# models/sloka_store.py, "sharded" loads the per-source shards built by models/sloka_shards.py
+STORAGE_BACKEND = os.environ.get('SLOKA_DB_BACKEND', 'json').lower()
+
+def get_daily_date(timezone=None):
+    """Today's date, optionally in an IANA time zone such as 'Asia/Kolkata'"""
+    if timezone:
+        return datetime.now(ZoneInfo(timezone)).date()
+    return date.today()
+
+class SlokaSnapshot:
+    """
+    One fully indexed version of the slokas corpus.
     
-    def __init__(self):
-        self.database_file = Path(__file__).parent.parent / "comprehensive_slokas_database.json"
-        self.slokas_data = self._load_slokas()
-        
-    def _load_slokas(self):
-        """Load slokas from comprehensive database"""
-        try:
-            with open(self.database_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print(f"Warning: Slokas database not found at {self.database_file}")
-            return self._get_fallback_data()
-        except Exception as e:
-            print(f"Error loading slokas database: {e}")
-            return self._get_fallback_data()
+    The corpus and its indexes are never modified after construction; the
+    only mutable state is memoization (renderings, source queries, daily
+    rotations) derived from it. A reload builds a new snapshot and swaps it in.
+    """
     
-    def _get_fallback_data(self):
-        """Fallback data if main database is unavailable"""
-        return {
-            "metadata": {"total_slokas": 1},
-            "slokas": [{
-                "id": "BG_2_47",
-                "sanskrit": "कर्मण्येवाधिकारस्ते मा फलेषु कदाचन",
-                "transliteration": "karmaṇy-evādhikāras te mā phaleṣu kadācana",
-                "translation": "You have a right to perform your duty, but never to the fruits of action",
-                "meaning": "Focus on your duty and effort, release attachment to outcomes",
-                "source": "Bhagavad Gita Chapter 2, Verse 47",
-                "category": "karma_yoga",
-                "guru_assignment": "karma_guru"
-            }]
+    def __init__(self, slokas_data, version):
+        self.slokas_data = slokas_data
+        self.slokas = slokas_data.get("slokas", [])
+        self.version = version
+        self._render_lock = threading.Lock()
+        self._build_indexes()
+    
+    def _build_indexes(self):
+        """Build id, category, guru and source lookup indexes over the loaded slokas"""
+        slokas = self.slokas
+        
+        self._id_index = {}
+        self._category_index = {}
+        self._guru_index = {}
+        source_positions = {}
+        
+        if hasattr(slokas, "index_rows"):
+            # Mapped stores decode just the indexed fields instead of whole records
+            rows = slokas.index_rows()
+        else:
+            rows = ((sloka.get("id"), sloka.get("category"), sloka.get("guru_assignment"), sloka.get("source"))
+                    for sloka in slokas)
+        
+        source_counts = {}
+        
+        # Indexes hold list positions so results keep the corpus order
+        total = 0
+        for position, (sloka_id, category, guru, source) in enumerate(rows):
+            if sloka_id is not None and sloka_id not in self._id_index:
+                self._id_index[sloka_id] = position
+            self._category_index.setdefault(category, []).append(position)
+            self._guru_index.setdefault(guru, []).append(position)
+            source_positions.setdefault((source or "").lower(), []).append(position)
+            source = source if source is not None else "unknown"
+            source_counts[source] = source_counts.get(source, 0) + 1
+            total += 1
+        self.total_slokas = total
+        
+        def counts(index, missing):
+            totals = {}
+            for key, positions in index.items():
+                key = key if key is not None else missing
+                totals[key] = totals.get(key, 0) + len(positions)
+            return totals
+        
+        # Aggregates are fixed for a snapshot, so count them once here rather than per request
+        metadata = self.slokas_data.get("metadata", {})
+        self._stats = {
+            "total_slokas": total,
+            "database_version": metadata.get("version", "1.0"),
+            "categories": counts(self._category_index, "unknown"),
+            "guru_assignments": counts(self._guru_index, "unassigned"),
+            "sources": source_counts,
+            "available_sources": metadata.get("sources", [])
         }
+        
+        # Source lookups match substrings, so they scan distinct sources (not slokas) once per query
+        self._source_index = source_positions
+        self._source_lookup_cache = {}
+        
+        # Sharded stores defer the search index so startup does not load every shard
+        self._search_lock = threading.Lock()
+        self._search_index_built = None if getattr(slokas, "lazy", False) else SlokaSearchIndex(slokas)
+        
+        # Renderings are memoized per snapshot, so a reload starts with an empty cache
+        self._render_cache = OrderedDict()
+        
+        # Requests that miss the rolling window rebuild it, one at a time
+        self._daily_lock = threading.Lock()
+        self._build_daily_schedule(date.today())
+    
+    def _build_daily_schedule(self, start):
+        """Precompute daily sloka positions (overall and per guru) for a rolling window of dates"""
+        self._daily_rotations = {}
+        schedule = {}
+        gurus = [None] + [guru for guru in self._guru_index if guru]
+        for offset in range(-1, DAILY_SCHEDULE_DAYS + 1):
+            day = start + timedelta(days=offset)
+            for guru in gurus:
+                schedule[(day, guru)] = self._pick_daily_position(day, guru)
+        self._daily_schedule = schedule
+    
+    def _pick_daily_position(self, day, guru=None):
+        """
+        Deterministically pick the sloka position for a date.
+        
+        Days walk through a shuffled rotation of the candidates, seeded by
+        guru and rotation cycle, so no sloka repeats within a cycle and every
+        worker agrees on the answer. The seed leaves out the corpus version:
+        a reload that keeps the corpus size keeps today's sloka position,
+        which clients may have cached for the rest of the day.
+        """
+        if guru:
+            candidates = self._guru_index.get(guru, [])
+        else:
+            candidates = range(len(self.slokas))
+        if not candidates:
+            return None
+        
+        cycle, offset = divmod(day.toordinal(), len(candidates))
+        rotation = self._daily_rotations.get((guru, cycle))
+        if rotation is None:
+            seed = hashlib.sha256(f"{guru or ''}:{cycle}".encode()).digest()
+            rotation = list(candidates)
+            random.Random(int.from_bytes(seed[:8], "big")).shuffle(rotation)
+            if len(self._daily_rotations) >= DAILY_ROTATION_CACHE_SIZE:
+                self._daily_rotations.clear()
+            self._daily_rotations[(guru, cycle)] = rotation
+        return rotation[offset]
+    
+    @property
+    def _search_index(self):
+        index = self._search_index_built
+        if index is None:
+            with self._search_lock:
+                if self._search_index_built is None:
+                    self._search_index_built = SlokaSearchIndex(self.slokas)
+                index = self._search_index_built
+        return index
+    
+    def _slokas_at(self, positions):
+        """Materialize slokas for a list of index positions"""
+        slokas = self.slokas
+        return [slokas[position] for position in positions]
+    
+    def _source_positions(self, query):
+        """Positions of slokas whose normalized source contains the query"""
+        positions = self._source_lookup_cache.get(query)
+        if positions is not None:
+            return positions
+        
+        matched = [self._source_index[key] for key in self._source_index if query in key]
+        if len(matched) == 1:
+            positions = matched[0]
+        else:
+            positions = list(merge(*matched))
+        
+        if len(self._source_lookup_cache) >= SOURCE_LOOKUP_CACHE_SIZE:
+            self._source_lookup_cache.clear()
+        self._source_lookup_cache[query] = positions
+        return positions
+    
+    def _cursor_start(self, cursor):
+        """Position just after the sloka a cursor names (the start of the corpus for no cursor)"""
+        if cursor is None:
+            return 0
+        position = self._id_index.get(cursor)
+        if position is None:
+            raise ValueError(f"Unknown cursor: {cursor}")
+        return position + 1
     
-    def get_daily_sloka(self):
-        """Get a random sloka for daily wisdom"""
-        slokas = self.slokas_data.get("slokas", [])
-        if not slokas:
+    def get_slokas_page(self, cursor=None, limit=20):
+        """
+        Keyset pagination over the corpus order.
+        
+        The cursor is the id of the last sloka of the previous page, so pages
+        stay stable while clients page through and need no offset arithmetic.
+        
+        Returns:
+            (slokas, next_cursor) with next_cursor None on the last page
+        """
+        start = self._cursor_start(cursor)
+        end = min(start + limit, self.total_slokas)
+        slokas = self._slokas_at(range(start, end))
+        next_cursor = slokas[-1].get("id") if slokas and end < self.total_slokas else None
+        return slokas, next_cursor
+    
+    def iter_slokas(self, cursor=None):
+        """Yield slokas one at a time in corpus order, starting after the cursor"""
+        # Resolve the cursor now so an unknown cursor fails before any streaming starts
+        start = self._cursor_start(cursor)
+        slokas = self.slokas
+        return (slokas[position] for position in range(start, self.total_slokas))
+    
+    def get_daily_sloka(self, for_date=None, guru=None, timezone=None):
+        """Get the sloka for a date (today by default); the same date always yields the same sloka"""
+        day = for_date or get_daily_date(timezone)
+        key = (day, guru)
+        schedule = self._daily_schedule
+        if key in schedule:
+            position = schedule[key]
+        else:
+            with self._daily_lock:
+                schedule = self._daily_schedule
+                if key in schedule:
+                    position = schedule[key]
+                else:
+                    position = self._pick_daily_position(day, guru)
+                    if day == date.today():
+                        # The rolling window has fallen behind the calendar
+                        self._build_daily_schedule(day)
+        
+        if position is None:
             return None
-        return random.choice(slokas)
+        return self.slokas[position]
     
     def get_sloka_by_id(self, sloka_id):
         """Get a specific sloka by ID"""
-        slokas = self.slokas_data.get("slokas", [])
-        for sloka in slokas:
-            if sloka.get("id") == sloka_id:
-                return sloka
-        return None
+        position = self._id_index.get(sloka_id)
+        if position is None:
+            return None
+        return self.slokas[position]
     
     def get_slokas_by_category(self, category):
         """Get all slokas in a specific category"""
-        slokas = self.slokas_data.get("slokas", [])
-        return [sloka for sloka in slokas if sloka.get("category") == category]
+        return self._slokas_at(self._category_index.get(category, []))
     
     def get_slokas_by_guru(self, guru_name):
         """Get slokas assigned to a specific guru"""
-        slokas = self.slokas_data.get("slokas", [])
-        return [sloka for sloka in slokas if sloka.get("guru_assignment") == guru_name]
+        return self._slokas_at(self._guru_index.get(guru_name, []))
+    
+    def guru_positions(self, guru):
+        """Corpus positions of the slokas assigned to a guru, or None if no sloka is"""
+        if not isinstance(guru, str):
+            return None
+        return self._guru_index.get(guru)
+    
+    def has_guru(self, guru):
+        """True if some sloka is assigned to this guru"""
+        return self.guru_positions(guru) is not None
     
     def get_slokas_by_source(self, source):
         """Get slokas from a specific source text"""
-        slokas = self.slokas_data.get("slokas", [])
-        return [sloka for sloka in slokas if source.lower() in sloka.get("source", "").lower()]
+        return self._slokas_at(self._source_positions(source.lower()))
     
-    def search_slokas(self, search_term):
-        """Search slokas by keyword in translation, meaning, or concepts"""
-        slokas = self.slokas_data.get("slokas", [])
-        results = []
-        search_term = search_term.lower()
-        
-        for sloka in slokas:
-            # Search in translation, meaning, and related concepts
-            if (search_term in sloka.get("translation", "").lower() or
-                search_term in sloka.get("meaning", "").lower() or
-                any(search_term in concept.lower() for concept in sloka.get("related_concepts", []))):
-                results.append(sloka)
-        
-        return results
+    def search_slokas(self, search_term, mode="and", limit=None):
+        """Search slokas by keyword in translation, transliteration, meaning, or concepts (best match first)"""
+        matches = self._search_index.search(search_term, mode=mode, limit=limit)
+        return self._slokas_at(position for position, _score in matches)
     
     def get_database_stats(self):
-        """Get statistics about the slokas database"""
-        slokas = self.slokas_data.get("slokas", [])
-        metadata = self.slokas_data.get("metadata", {})
-        
-        categories = {}
-        gurus = {}
-        sources = {}
-        
-        for sloka in slokas:
-            # Count categories
-            category = sloka.get("category", "unknown")
-            categories[category] = categories.get(category, 0) + 1
-            
-            # Count guru assignments
-            guru = sloka.get("guru_assignment", "unassigned")
-            gurus[guru] = gurus.get(guru, 0) + 1
-            
-            # Count sources
-            source = sloka.get("source", "unknown")
-            sources[source] = sources.get(source, 0) + 1
-        
-        return {
-            "total_slokas": len(slokas),
-            "database_version": metadata.get("version", "1.0"),
-            "categories": categories,
-            "guru_assignments": gurus,
-            "sources": sources,
-            "available_sources": metadata.get("sources", [])
-        }
+        """Get statistics about the slokas database (precomputed; treat the result as read-only)"""
+        return self._stats
     
     def get_formatted_sloka(self, sloka_id=None):
         """Get a beautifully formatted sloka for display"""
@@ -124,7 +291,22 @@ class SlokaDatabase:
         if not sloka:
             return "No sloka available"
         
-        formatted = f"""
+        key = (self.version, sloka.get('id'))
+        with self._render_lock:
+            formatted = self._render_cache.get(key)
+            if formatted is not None:
+                self._render_cache.move_to_end(key)
+        if formatted is None:
+            formatted = self._render_sloka(sloka)
+            with self._render_lock:
+                self._render_cache[key] = formatted
+                if len(self._render_cache) > RENDER_CACHE_SIZE:
+                    self._render_cache.popitem(last=False)
+        return formatted
+    
+    def _render_sloka(self, sloka):
+        """Render the display text for a sloka"""
+        parts = [f"""
 🕉️ {sloka.get('source', 'Sacred Text')}
 {'=' * 50}
 
@@ -144,24 +326,242 @@ Daily Application:
 {sloka.get('daily_application', 'Contemplate this wisdom throughout your day.')}
 
 Reflection Questions:
-"""
+"""]
         
         questions = sloka.get('reflection_questions', [])
-        for i, question in enumerate(questions, 1):
-            formatted += f"{i}. {question}\n"
+        parts.extend(f"{i}. {question}\n" for i, question in enumerate(questions, 1))
         
-        formatted += f"\nRelated Concepts: {', '.join(sloka.get('related_concepts', []))}"
-        formatted += f"\nAssigned Guru: {sloka.get('guru_assignment', 'General Wisdom')}"
+        parts.append(f"\nRelated Concepts: {', '.join(sloka.get('related_concepts', []))}")
+        parts.append(f"\nAssigned Guru: {sloka.get('guru_assignment', 'General Wisdom')}")
         
-        return formatted
+        return "".join(parts)
+
+class SlokaDatabase:
+    """
+    Comprehensive Slokas Database for AI Gurus Platform
+    
+    With the "mmap" backend, slokas are read lazily from the compiled store
+    next to the JSON file (see models/sloka_store.py), so forked workers share
+    the corpus pages instead of each holding a parsed copy. The "sharded"
+    backend reads per-source shards on first access under an LRU memory
+    budget (see models/sloka_shards.py).
+    """
+    
+    def __init__(self, database_file=None, backend=None):
+        self.database_file = Path(database_file) if database_file else Path(__file__).parent.parent / "comprehensive_slokas_database.json"
+        self.backend = (backend or STORAGE_BACKEND).lower()
+        if self.backend not in ("json", "mmap", "sharded"):
+            raise ValueError(f"Unknown slokas database backend: {self.backend}")
+        self.store_file = compiled_path_for(self.database_file)
+        self.shard_manifest = sharded_path_for(self.database_file) / MANIFEST_NAME
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self.last_reload = None
+        self._signature = self._file_signature()
+        self._snapshot = self._load_snapshot()
+    
+    @property
+    def snapshot(self):
+        """The current snapshot; hold on to it to answer a request from a single version"""
+        return self._snapshot
+    
+    @property
+    def slokas_data(self):
+        return self._snapshot.slokas_data
+    
+    @property
+    def version(self):
+        return self._snapshot.version
+    
+    def _file_signature(self):
+        """Cheap change detector for the database file (mtime and size)"""
+        watched = {"mmap": self.store_file, "sharded": self.shard_manifest}.get(self.backend, self.database_file)
+        try:
+            stat = watched.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _read_database(self):
+        """Read and parse the database file, returning (data, content-hash version)"""
+        if self.backend == "mmap":
+            try:
+                store = MappedSlokaStore(self.store_file)
+            except FileNotFoundError:
+                print(f"Warning: Compiled slokas store not found at {self.store_file}, parsing JSON instead")
+            else:
+                # Compiled stores carry the JSON content hash, so versions match across backends
+                return {"metadata": store.metadata, "slokas": store}, store.version
+        
+        if self.backend == "sharded":
+            try:
+                store = ShardedSlokaStore(self.shard_manifest)
+            except FileNotFoundError:
+                print(f"Warning: Slokas shard manifest not found at {self.shard_manifest}, parsing JSON instead")
+            except ValueError as e:
+                print(f"Warning: {e}; rebuild it with models/sloka_shards.py. Parsing JSON instead")
+            else:
+                return {"metadata": store.metadata, "slokas": store}, store.version
+        
+        raw = self.database_file.read_bytes()
+        return json.loads(raw), hashlib.sha256(raw).hexdigest()[:16]
+    
+    def _load_snapshot(self):
+        """Load slokas from comprehensive database"""
+        try:
+            data, version = self._read_database()
+            return SlokaSnapshot(data, version)
+        except FileNotFoundError:
+            print(f"Warning: Slokas database not found at {self.database_file}")
+        except Exception as e:
+            print(f"Error loading slokas database: {e}")
+        return SlokaSnapshot(self._get_fallback_data(), "fallback")
+    
+    def _get_fallback_data(self):
+        """Fallback data if main database is unavailable"""
+        return {
+            "metadata": {"total_slokas": 1},
+            "slokas": [{
+                "id": "BG_2_47",
+                "sanskrit": "कर्मण्येवाधिकारस्ते मा फलेषु कदाचन",
+                "transliteration": "karmaṇy-evādhikāras te mā phaleṣu kadācana",
+                "translation": "You have a right to perform your duty, but never to the fruits of action",
+                "meaning": "Focus on your duty and effort, release attachment to outcomes",
+                "source": "Bhagavad Gita Chapter 2, Verse 47",
+                "category": "karma_yoga",
+                "guru_assignment": "karma_guru"
+            }]
+        }
+    
+    def reload(self, force=False):
+        """
+        Reload the database file if it changed and atomically swap in a new snapshot.
+        
+        The file's mtime/size is checked first and its content hash second, so
+        touching the file without changing it does not rebuild anything. The new
+        snapshot is fully indexed before the swap; requests in flight keep the
+        snapshot they started with. A file that fails to parse leaves the current
+        snapshot in place.
+        
+        Returns:
+            True if a new snapshot was swapped in
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False  # Another thread is already reloading
+        try:
+            signature = self._file_signature()
+            if not force and signature == self._signature:
+                return False
+            
+            current = self._snapshot
+            started = time.perf_counter()
+            try:
+                data, version = self._read_database()
+                if not force and version == current.version:
+                    self._signature = signature
+                    return False
+                snapshot = SlokaSnapshot(data, version)
+            except Exception as e:
+                self.last_reload = {
+                    "success": False,
+                    "error": str(e),
+                    "version": current.version,
+                    "attempted_at": datetime.utcnow().isoformat()
+                }
+                print(f"Error reloading slokas database, keeping version {current.version}: {e}")
+                return False
+            
+            self._snapshot = snapshot
+            self._signature = signature
+            duration_ms = (time.perf_counter() - started) * 1000
+            self.last_reload = {
+                "success": True,
+                "version": version,
+                "previous_version": current.version,
+                "total_slokas": len(snapshot.slokas),
+                "duration_ms": round(duration_ms, 2),
+                "reloaded_at": datetime.utcnow().isoformat()
+            }
+            print(f"🕉️ Slokas database reloaded {current.version} -> {version} "
+                  f"({len(snapshot.slokas)} slokas) in {duration_ms:.1f} ms")
+            return True
+        finally:
+            self._reload_lock.release()
+    
+    def start_auto_reload(self, interval=None):
+        """
+        Watch the database file from a background thread and reload on change.
+        
+        Threads do not survive fork, so call this in each worker process
+        (gunicorn without --preload imports the app per worker).
+        """
+        interval = interval or RELOAD_INTERVAL_SECONDS
+        if interval <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+        
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"Error in slokas database watcher: {e}")
+        
+        self._watcher = threading.Thread(target=watch, name="sloka-db-watcher", daemon=True)
+        self._watcher.start()
+    
+    def get_daily_date(self, timezone=None):
+        """Today's date, optionally in an IANA time zone such as 'Asia/Kolkata'"""
+        return get_daily_date(timezone)
+    
+    def get_daily_sloka(self, for_date=None, guru=None, timezone=None):
+        """Get the sloka for a date (today by default); the same date always yields the same sloka"""
+        return self._snapshot.get_daily_sloka(for_date, guru, timezone)
+    
+    def get_sloka_by_id(self, sloka_id):
+        """Get a specific sloka by ID"""
+        return self._snapshot.get_sloka_by_id(sloka_id)
+    
+    def get_slokas_by_category(self, category):
+        """Get all slokas in a specific category"""
+        return self._snapshot.get_slokas_by_category(category)
+    
+    def get_slokas_by_guru(self, guru_name):
+        """Get slokas assigned to a specific guru"""
+        return self._snapshot.get_slokas_by_guru(guru_name)
+    
+    def get_slokas_by_source(self, source):
+        """Get slokas from a specific source text"""
+        return self._snapshot.get_slokas_by_source(source)
+    
+    def get_slokas_page(self, cursor=None, limit=20):
+        """Keyset pagination: (slokas after the cursor id, next cursor or None)"""
+        return self._snapshot.get_slokas_page(cursor, limit)
+    
+    def iter_slokas(self, cursor=None):
+        """Yield slokas one at a time in corpus order, starting after the cursor"""
+        return self._snapshot.iter_slokas(cursor)
+    
+    def search_slokas(self, search_term, mode="and", limit=None):
+        """Search slokas by keyword in translation, transliteration, meaning, or concepts (best match first)"""
+        return self._snapshot.search_slokas(search_term, mode, limit)
+    
+    def get_database_stats(self):
+        """Get statistics about the slokas database"""
+        return self._snapshot.get_database_stats()
+    
+    def get_formatted_sloka(self, sloka_id=None):
+        """Get a beautifully formatted sloka for display"""
+        return self._snapshot.get_formatted_sloka(sloka_id)
 
 # Create global instance
 sloka_db = SlokaDatabase()
+sloka_db.start_auto_reload()
 
 # Legacy function for backward compatibility
 def get_daily_sloka():
     """Legacy function - returns daily sloka"""
     return sloka_db.get_daily_sloka()
 
-# Make database accessible
+# Make database accessible (the data loaded at import; use sloka_db for reload-aware access)
 slokas_database = sloka_db.slokas_data
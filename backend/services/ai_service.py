@@ -5,6 +5,15 @@ import asyncio
 import requests
 from typing import Dict, Any, List, AsyncGenerator
 from datetime import datetime
+from .openai_client import get_async_openai_client
+from .provider_router import ProviderRouter, get_provider_router
+from .providers import CLAUDE_MODEL, ChatProvider, Completion
+from .response_cache import get_response_cache, response_cache_key
+from .semantic_cache import SEMANTIC_CACHE_THRESHOLD, get_semantic_cache
+from .single_flight import get_single_flight
+from .upstream_scheduler import DEFAULT_PRIORITY, UpstreamScheduler, get_upstream_scheduler
+from .upstream_health import HEDGE_REQUESTS, CircuitOpenError, get_circuit_breaker, hedged, is_upstream_failure
+from .spiritual_service import SpiritualService
 
 class AIService:
     def __init__(self):
@@ -12,8 +21,6 @@ class AIService:
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
-        # Initialize the OpenAI client
-        self.client = openai.OpenAI(api_key=self.api_key)
         
         # Default models for different purposes
         self.models = {
@@ -25,8 +32,17 @@ class AIService:
         
         # Configure timeouts and retries
         self.timeout_seconds = 30
+        self.base_url = os.environ.get('OPENAI_BASE_URL') or None
         self.max_retries = 3
         self.retry_delay = 1  # seconds
+        self.in_flight = get_single_flight()
+        self.hedge_requests = HEDGE_REQUESTS
+        self.router: ProviderRouter = get_provider_router(self.timeout_seconds)
+        
+        # Paraphrases this close are good enough to serve when the model is unavailable; never looser than
+        # the semantic cache's own threshold, since near-identical questions (Gita 2.47 vs 3.47) can differ
+        self.fallback_similarity = float(os.environ.get('FALLBACK_SIMILARITY', SEMANTIC_CACHE_THRESHOLD))
+        self.spiritual_service = SpiritualService()
         
         # Import workflow manager for dynamic configuration
         try:
@@ -72,21 +88,85 @@ class AIService:
         Returns:
             Dict with response
         """
+        settings = self._workflow_settings(guru_type, user_context)
+        model = settings['model']
+        system_prompt = settings['system_prompt']
+        temperature = settings['temperature']
+        max_tokens = settings['max_tokens']
+        priority = settings['priority']
+        provider = settings['provider']
+        fallback_provider = settings['fallback_provider']
+        messages = self._guidance_messages(system_prompt, question, user_context)
+        
+        # Identical requests (same configuration and normalized question) are served from cache
+        request_key = response_cache_key(
+            model, system_prompt, temperature, max_tokens, question,
+            guru_type=guru_type, user_context=user_context
+        )
+        cache = get_response_cache()
+        if cache is not None:
+            cached = await cache.aget(request_key)
+            if cached is not None:
+                return dict(cached, cached=True, cache_match="exact")
+        
+        # Otherwise a close paraphrase asked of the same configuration can reuse its answer
+        semantic_cache = get_semantic_cache()
+        namespace = None
+        if semantic_cache is not None:
+            namespace = response_cache_key(
+                model, system_prompt, temperature, max_tokens, "",
+                guru_type=guru_type, user_context=user_context
+            )
+            match = semantic_cache.lookup(namespace, question)
+            if match is not None:
+                cached, similarity = match
+                return dict(cached, cached=True, cache_match="semantic", similarity=round(similarity, 4))
+        
+        async def complete() -> Dict[str, Any]:
+            result = await self._complete_guidance(
+                messages, guru_type, model, temperature, max_tokens, priority, namespace,
+                provider=provider, fallback_provider=fallback_provider
+            )
+            if result.get("success") and not result.get("fallback"):
+                if cache is not None:
+                    await cache.aset(request_key, result)
+                if semantic_cache is not None:
+                    semantic_cache.add(namespace, question, result)
+            return result
+        
+        # Concurrent identical requests share one upstream completion
+        result, shared = await self.in_flight.do(request_key, complete)
+        return dict({"cached": False, **result}, coalesced=shared)
+    
+    def _workflow_settings(self, guru_type: str, user_context: Dict = None) -> Dict[str, Any]:
+        """Model, prompt, sampling, priority and providers of a guru workflow."""
         # Get workflow-specific configuration
         if self.workflow_manager:
             workflow_config = self.workflow_manager.assign_chatgpt_to_workflow(guru_type, user_context)
             chatgpt_config = workflow_config['chatgpt_config']
-            model = chatgpt_config['model']
-            system_prompt = chatgpt_config['system_prompt']
-            temperature = chatgpt_config['temperature']
-            max_tokens = chatgpt_config['max_tokens']
-        else:
-            # Fallback to default configuration
-            model = self.models['default']
-            system_prompt = self.guru_prompts.get(guru_type, self.guru_prompts["spiritual"])
-            temperature = 0.7
-            max_tokens = 800
-        
+            workflow_settings = workflow_config['workflow_settings']
+            return {
+                "model": chatgpt_config['model'],
+                "system_prompt": chatgpt_config['system_prompt'],
+                "temperature": chatgpt_config['temperature'],
+                "max_tokens": chatgpt_config['max_tokens'],
+                "priority": workflow_settings['priority'],
+                "provider": workflow_settings['provider'],
+                "fallback_provider": workflow_settings['fallback_provider']
+            }
+        # Fallback to default configuration
+        return {
+            "model": self.models['default'],
+            "system_prompt": self.guru_prompts.get(guru_type, self.guru_prompts["spiritual"]),
+            "temperature": 0.7,
+            "max_tokens": 800,
+            "priority": DEFAULT_PRIORITY,
+            "provider": None,
+            "fallback_provider": None
+        }
+    
+    @staticmethod
+    def _guidance_messages(system_prompt: str, question: str, user_context: Dict = None) -> List[Dict[str, str]]:
         messages = [
             {
                 "role": "system",
@@ -102,20 +182,44 @@ class AIService:
             })
         
         messages.append({"role": "user", "content": question})
+        return messages
+    
+    async def _complete_guidance(
+        self,
+        messages: List[Dict[str, str]],
+        guru_type: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        priority: str = DEFAULT_PRIORITY,
+        namespace: str = None,
+        provider: str = None,
+        fallback_provider: str = None
+    ) -> Dict[str, Any]:
+        """
+        Run a guru completion, retrying rate-limited attempts with backoff.
         
+        When every provider of the workflow is unavailable (open circuit,
+        timeout, connection error, 5xx), a cached paraphrase or a templated
+        answer is returned instead, marked with "fallback": True.
+        """
         for attempt in range(self.max_retries):
             try:
                 response = await self._create_completion(
                     messages, 
                     model=model, 
                     temperature=temperature, 
-                    max_tokens=max_tokens
+                    max_tokens=max_tokens,
+                    priority=priority,
+                    provider=provider,
+                    fallback_provider=fallback_provider
                 )
                 return {
                     "success": True,
-                    "response": response.choices[0].message.content,
-                    "tokens_used": response.usage.total_tokens,
+                    "response": response.text,
+                    "tokens_used": response.tokens_used,
                     "model": response.model,
+                    "provider": response.provider,
                     "workflow_used": guru_type,
                     "configuration": {
                         "temperature": temperature,
@@ -128,12 +232,36 @@ class AIService:
                     raise
                 await asyncio.sleep(self.retry_delay * (attempt + 1))
             except Exception as e:
+                if isinstance(e, CircuitOpenError) or is_upstream_failure(e):
+                    return self._fallback_guidance(guru_type, messages[-1]["content"], namespace, e)
                 return {
                     "success": False,
                     "error": str(e),
                     "error_type": type(e).__name__
                 }
     
+    def _fallback_guidance(self, guru_type: str, question: str, namespace: str, error: Exception) -> Dict[str, Any]:
+        """Answer without the model: the closest cached paraphrase, else a SpiritualService template."""
+        semantic_cache = get_semantic_cache()
+        if semantic_cache is not None and namespace is not None:
+            threshold = max(self.fallback_similarity, semantic_cache.threshold)
+            match = semantic_cache.lookup(namespace, question, threshold=threshold)
+            if match is not None:
+                cached, similarity = match
+                return dict(
+                    cached, cached=True, cache_match="semantic", similarity=round(similarity, 4),
+                    fallback=True, fallback_reason=type(error).__name__
+                )
+        return {
+            "success": True,
+            "response": self.spiritual_service.get_spiritual_guidance(question),
+            "tokens_used": 0,
+            "model": "spiritual-templates",
+            "workflow_used": guru_type,
+            "fallback": True,
+            "fallback_reason": type(error).__name__
+        }
+    
     async def get_spiritual_guidance_stream(
         self, 
         guru_type: str, 
@@ -151,25 +279,49 @@ class AIService:
         Yields:
             String chunks of the response
         """
-        messages = [
-            {
-                "role": "system",
-                "content": self.guru_prompts.get(guru_type, self.guru_prompts["spiritual"])
-            }
-        ]
+        # Same workflow configuration as get_spiritual_guidance
+        settings = self._workflow_settings(guru_type, user_context)
+        messages = self._guidance_messages(settings['system_prompt'], question, user_context)
         
-        # Add context from user's history if available
-        if user_context:
-            messages.append({
-                "role": "system",
-                "content": f"User context: {json.dumps(user_context)}"
-            })
+        # Identical concurrent streams share one upstream stream; late joiners replay it from the start
+        request_key = response_cache_key(
+            settings['model'], settings['system_prompt'], settings['temperature'], settings['max_tokens'], question,
+            guru_type=guru_type, user_context=user_context, stream=True
+        )
         
-        messages.append({"role": "user", "content": question})
+        async def stream() -> AsyncGenerator[str, None]:
+            started = False
+            try:
+                async for chunk in self._stream_completion(
+                    messages,
+                    model=settings['model'],
+                    priority=settings['priority'],
+                    provider=settings['provider'],
+                    fallback_provider=settings['fallback_provider'],
+                    temperature=settings['temperature'],
+                    max_tokens=settings['max_tokens']
+                ):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                # Before the first chunk an unavailable model degrades to a templated answer
+                if started or not (isinstance(e, CircuitOpenError) or is_upstream_failure(e)):
+                    raise
+                yield self._fallback_guidance(guru_type, question, None, e)["response"]
         
-        async for chunk in self._stream_completion(messages):
+        async for chunk in self.in_flight.stream(request_key, stream):
             yield chunk
     
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """
+        Pooled AsyncOpenAI client for the running event loop.
+        
+        Requests from concurrent coroutines overlap on its keep-alive
+        connections instead of blocking the loop one call at a time.
+        """
+        return get_async_openai_client(self.api_key, self.base_url, self.timeout_seconds)
+    
     def get_daily_wisdom(self) -> Dict[str, Any]:
         """Get daily spiritual wisdom"""
         return {
@@ -178,37 +330,139 @@ class AIService:
             "date": "2024-01-01"
         }
     
-    async def _create_completion(self, messages: List[Dict[str, str]], model: str = None, temperature: float = 0.7, max_tokens: int = 800) -> Any:
-        """Create a chat completion with retry logic and error handling."""
-        try:
-            response = self.client.chat.completions.create(
-                model=model or self.models['default'],
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=temperature,
-                timeout=self.timeout_seconds
-            )
-            return response
-        except Exception as e:
-            raise e
+    @property
+    def scheduler(self) -> UpstreamScheduler:
+        """
+        Upstream scheduler for the running event loop.
+        
+        Bounds concurrent calls per model and serves waiting calls by
+        workflow priority, shedding them when queues or deadlines overflow.
+        """
+        return get_upstream_scheduler()
+    
+    async def _create_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = None,
+        temperature: float = 0.7,
+        max_tokens: int = 800,
+        priority: str = DEFAULT_PRIORITY,
+        provider: str = None,
+        fallback_provider: str = None
+    ) -> Completion:
+        """
+        Create a chat completion on the best available provider.
+        
+        Providers are tried in the router's order; an open circuit or an
+        upstream failure moves the call to the next one.
+        """
+        model = model or self.models['default']
+        error = None
+        for index, (chat_provider, provider_model) in enumerate(self._route(model, provider, fallback_provider)):
+            if index:
+                self.router.count(chat_provider.name, 'failovers')
+            try:
+                return await self._provider_completion(
+                    chat_provider, provider_model, messages, temperature, max_tokens, priority
+                )
+            except Exception as e:
+                if not (isinstance(e, CircuitOpenError) or is_upstream_failure(e)):
+                    raise
+                error = e
+        raise error
+    
+    def _route(self, model: str, provider: str = None, fallback_provider: str = None):
+        route = self.router.route(model, provider, [fallback_provider])
+        if not route:
+            raise ValueError("No model provider is configured")
+        return route
+    
+    async def _provider_completion(
+        self,
+        provider: ChatProvider,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        priority: str
+    ) -> Completion:
+        breaker = get_circuit_breaker(model)
+        
+        async def attempt() -> Completion:
+            # An open circuit fails fast, before taking a scheduler slot
+            with breaker.attempt() as call:
+                async with self.scheduler.slot(model, priority):
+                    call.start()
+                    return await provider.complete(messages, model, temperature, max_tokens, self.timeout_seconds)
+        
+        # A call slower than the model's p95 gets a second, racing attempt
+        delay = breaker.hedge_delay() if self.hedge_requests else None
+        return await hedged(attempt, delay, breaker)
     
-    async def _stream_completion(self, messages: List[Dict[str, str]], model: str = None) -> AsyncGenerator[str, None]:
-        """Stream a chat completion with retry logic and error handling."""
+    async def _stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = None,
+        priority: str = DEFAULT_PRIORITY,
+        provider: str = None,
+        fallback_provider: str = None,
+        temperature: float = 0.7,
+        max_tokens: int = 800
+    ) -> AsyncGenerator[str, None]:
+        """Stream a chat completion, failing over to the next provider until the first chunk arrives."""
+        model = model or self.models['default']
+        error = None
+        for index, (chat_provider, provider_model) in enumerate(self._route(model, provider, fallback_provider)):
+            if index:
+                self.router.count(chat_provider.name, 'failovers')
+            started = False
+            try:
+                async for chunk in self._provider_stream(
+                    chat_provider, provider_model, messages, temperature, max_tokens, priority
+                ):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not (isinstance(e, CircuitOpenError) or is_upstream_failure(e)):
+                    raise
+                error = e
+        raise error
+    
+    async def _provider_stream(
+        self,
+        provider: ChatProvider,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        priority: str
+    ) -> AsyncGenerator[str, None]:
+        scheduler = self.scheduler
+        chunks = provider.stream(messages, model, temperature, max_tokens, self.timeout_seconds)
+        first = None
+        # The breaker judges opening the stream up to its first chunk; an open circuit fails fast, before queueing
+        with get_circuit_breaker(model).attempt() as call:
+            await scheduler.acquire(model, priority)
+            try:
+                call.start()
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                pass
+            except BaseException:
+                scheduler.release(model)
+                await chunks.aclose()
+                raise
+        
+        # The slot is held until the stream ends, since it occupies an upstream connection
         try:
-            stream = self.client.chat.completions.create(
-                model=model or self.models['default'],
-                messages=messages,
-                max_tokens=800,
-                temperature=0.7,
-                timeout=self.timeout_seconds,
-                stream=True
-            )
-            
-            for chunk in stream:
-                if chunk.choices and chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
-        except Exception as e:
-            raise e
+            if first is not None:
+                yield first
+                async for chunk in chunks:
+                    yield chunk
+        finally:
+            scheduler.release(model)
+            await chunks.aclose()
 
     async def analyze_sentiment(self, text: str) -> Dict[str, Any]:
         """Analyze the sentiment and emotional content of text."""
@@ -223,7 +477,7 @@ class AIService:
             
             return {
                 "success": True,
-                "analysis": response.choices[0].message.content
+                "analysis": response.text
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -240,7 +494,7 @@ class AIService:
             
             return {
                 "success": True,
-                "prompts": response.choices[0].message.content.split('\n')
+                "prompts": response.text.split('\n')
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -258,16 +512,21 @@ class AIService:
             
             return {
                 "success": True,
-                "enhanced_text": response.choices[0].message.content
+                "enhanced_text": response.text
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
 
 class ClaudeService:
+    """Synchronous Claude client; async guru calls go through providers.ClaudeProvider."""
+    
+    # Shared so repeated calls reuse kept-alive connections
+    session = requests.Session()
+    
     def __init__(self, api_key=None):
-        self.api_key = api_key or os.getenv('CLAUDE_API_KEY')
+        self.api_key = api_key or os.getenv('CLAUDE_API_KEY') or os.getenv('ANTHROPIC_API_KEY')
         self.api_url = 'https://api.anthropic.com/v1/messages'
-        self.model = 'claude-3-opus-20240229'  # Use your preferred Claude model
+        self.model = CLAUDE_MODEL  # Use your preferred Claude model (CLAUDE_MODEL)
 
     def get_response(self, prompt, max_tokens=1024, temperature=0.7):
         headers = {
@@ -283,7 +542,7 @@ class ClaudeService:
                 {"role": "user", "content": prompt}
             ]
         }
-        response = requests.post(self.api_url, headers=headers, json=data)
+        response = self.session.post(self.api_url, headers=headers, json=data, timeout=30)
         if response.status_code == 200:
             return response.json()['content'][0]['text']
         else:
@@ -0,0 +1,259 @@
+"""
+Chunked Transcription
+=====================
+
+Long recordings are transcribed as several chunks in parallel instead of
+one Whisper pass, which decodes 30-second windows one after another:
+
+    result = transcribe_in_chunks(get_whisper_inference(), audio_path, language="en", word_timestamps=True)
+
+The audio is decoded once (16 kHz mono, like Whisper) and split at pauses
+found by a voice-activity detector over frame energies: each cut falls in
+the longest silence near WHISPER_CHUNK_SECONDS, so no word is cut in half.
+Chunks without speech are skipped. The chunks go to the inference workers
+at once, and their results are stitched back into a single Whisper result:
+segment and word timestamps are offset by the chunk's start, segment ids
+are renumbered, and the ``segments``/``words`` schema is unchanged.
+
+Audio shorter than WHISPER_CHUNK_MIN_AUDIO_SECONDS, or with a single
+inference worker, is transcribed in one pass as before.
+
+For streaming, ``iter_transcription`` yields each chunk's result in order
+as soon as it is ready, with shorter chunks (WHISPER_STREAM_CHUNK_SECONDS)
+so the first segments arrive early; TranscriptStitcher puts them on the
+recording's timeline one chunk at a time.
+
+Configuration (environment):
+    WHISPER_CHUNKING                   "false" always transcribes in one pass (default true)
+    WHISPER_CHUNK_SECONDS              longest chunk in seconds (default 120)
+    WHISPER_CHUNK_MIN_AUDIO_SECONDS    shortest audio that is chunked (default 180)
+    WHISPER_STREAM_CHUNK_SECONDS       longest chunk when streaming partial results (default 30)
+"""
+
+import logging
+import os
+import subprocess
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .whisper_workers import InferenceCancelledError
+
+WHISPER_CHUNKING = os.environ.get('WHISPER_CHUNKING', 'true').lower() != 'false'
+WHISPER_CHUNK_SECONDS = float(os.environ.get('WHISPER_CHUNK_SECONDS', '120'))
+WHISPER_CHUNK_MIN_AUDIO_SECONDS = float(os.environ.get('WHISPER_CHUNK_MIN_AUDIO_SECONDS', '180'))
+WHISPER_STREAM_CHUNK_SECONDS = float(os.environ.get('WHISPER_STREAM_CHUNK_SECONDS', '30'))
+
+SAMPLE_RATE = 16000
+
+# Voice-activity detection over 30 ms frames: speech is louder than the noise floor by SPEECH_MARGIN_DB,
+# or within PEAK_MARGIN_DB of the loud frames when the recording has few pauses to measure the floor in
+FRAME_SECONDS = 0.03
+SPEECH_MARGIN_DB = 15.0
+PEAK_MARGIN_DB = 25.0
+SILENCE_FLOOR_DB = -60.0
+MIN_SILENCE_SECONDS = 0.3
+
+# Whisper's segment "seek" counts 10 ms mel frames
+SEEK_FRAMES_PER_SECOND = 100
+
+# Frames per block while measuring energies, to bound the float copy of long audio
+ENERGY_BLOCK_FRAMES = 20000
+
+
+def decode_audio(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode any ffmpeg-readable file to mono 16-bit samples"""
+    command = [
+        'ffmpeg', '-nostdin', '-threads', '0', '-i', path,
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(sample_rate), '-'
+    ]
+    output = subprocess.run(command, capture_output=True, check=True).stdout
+    return np.frombuffer(output, np.int16)
+
+
+def frame_levels(samples: np.ndarray, frame: int) -> np.ndarray:
+    """Loudness of each frame in dBFS"""
+    frames = len(samples) // frame
+    levels = np.empty(frames, dtype=np.float32)
+    for first in range(0, frames, ENERGY_BLOCK_FRAMES):
+        last = min(first + ENERGY_BLOCK_FRAMES, frames)
+        block = samples[first * frame:last * frame].reshape(last - first, frame).astype(np.float32) / 32768.0
+        levels[first:last] = 10 * np.log10(np.mean(block * block, axis=1) + 1e-10)
+    return levels
+
+
+def speech_mask(levels: np.ndarray) -> np.ndarray:
+    """Frames well above the noise floor (quietest 5%) or close to the loudest (top 5%)"""
+    if not len(levels):
+        return np.zeros(0, dtype=bool)
+    floor, peak = np.percentile(levels, [5, 95])
+    threshold = max(min(floor + SPEECH_MARGIN_DB, peak - PEAK_MARGIN_DB), SILENCE_FLOOR_DB)
+    return levels > threshold
+
+
+def find_silences(speech: np.ndarray, frame: int, min_frames: int) -> List[Tuple[int, int]]:
+    """(start, end) sample ranges of pauses lasting at least ``min_frames``"""
+    padded = np.concatenate(([True], speech, [True]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+    return [(int(start) * frame, int(end) * frame) for start, end in zip(starts, ends) if end - start >= min_frames]
+
+
+def plan_chunks(total: int, silences: List[Tuple[int, int]], max_samples: int) -> List[Tuple[int, int]]:
+    """Cut [0, total) into chunks of at most ``max_samples``, each cut in the longest pause of its second half"""
+    chunks = []
+    start = 0
+    while total - start > max_samples:
+        low, high = start + max_samples // 2, start + max_samples
+        best = None
+        for silence_start, silence_end in silences:
+            overlap = min(silence_end, high) - max(silence_start, low)
+            if overlap > 0 and (best is None or overlap > best[0]):
+                best = (overlap, (max(silence_start, low) + min(silence_end, high)) // 2)
+        cut = best[1] if best else high
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, total))
+    return chunks
+
+
+class TranscriptStitcher:
+    """Builds one Whisper result from chunk results added in order of their start"""
+
+    def __init__(self):
+        self.segments: List[Dict[str, Any]] = []
+        self.texts: List[str] = []
+        self.languages = Counter()
+        self.chunks = 0
+
+    def add(self, offset: float, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Add a chunk's result, starting ``offset`` seconds in; returns its segments on the common timeline"""
+        chunk_segments = result.get('segments', [])
+        self.languages[result.get('language')] += max(len(chunk_segments), 1)
+        self.chunks += 1
+        added = []
+        for segment in chunk_segments:
+            segment = dict(segment, id=len(self.segments), start=segment['start'] + offset, end=segment['end'] + offset)
+            if 'seek' in segment:
+                segment['seek'] += int(round(offset * SEEK_FRAMES_PER_SECOND))
+            if 'words' in segment:
+                segment['words'] = [
+                    dict(word, start=round(word['start'] + offset, 2), end=round(word['end'] + offset, 2))
+                    for word in segment['words']
+                ]
+            self.segments.append(segment)
+            added.append(segment)
+        text = result.get('text', '').strip()
+        if text:
+            self.texts.append(text)
+        return added
+
+    def result(self, language: Optional[str] = None) -> Dict[str, Any]:
+        """The transcript so far; ``language`` applies when no chunk reported one"""
+        return {
+            'text': ' '.join(self.texts),
+            'segments': list(self.segments),
+            'language': self.languages.most_common(1)[0][0] if self.languages else language,
+            'chunks': self.chunks,
+        }
+
+
+def stitch_results(results: List[Tuple[float, Dict[str, Any]]], language: Optional[str] = None) -> Dict[str, Any]:
+    """Merge per-chunk Whisper results, given with their start offsets in seconds, into one"""
+    stitcher = TranscriptStitcher()
+    for offset, result in sorted(results, key=lambda item: item[0]):
+        stitcher.add(offset, result)
+    return stitcher.result(language)
+
+
+def speech_chunks(samples: np.ndarray, max_chunk_seconds: float) -> List[Tuple[int, int]]:
+    """Sample ranges to transcribe: cut at pauses, without the chunks that contain no speech"""
+    frame = int(SAMPLE_RATE * FRAME_SECONDS)
+    speech = speech_mask(frame_levels(samples, frame))
+    silences = find_silences(speech, frame, int(MIN_SILENCE_SECONDS / FRAME_SECONDS))
+    return [
+        (start, end) for start, end in plan_chunks(len(samples), silences, int(max_chunk_seconds * SAMPLE_RATE))
+        if speech[start // frame:max(end // frame, start // frame + 1)].any()
+    ]
+
+
+def iter_chunk_results(inference, samples: np.ndarray, workers: int,
+                       cancelled: Optional[Callable[[], bool]] = None,
+                       progress: Optional[Callable[[float], None]] = None,
+                       max_chunk_seconds: float = WHISPER_CHUNK_SECONDS, **options) -> Iterator[Tuple[float, Dict[str, Any]]]:
+    """(offset in seconds, Whisper result) of each speech chunk in order, transcribing ``workers`` chunks at a time"""
+    chunks = speech_chunks(samples, max_chunk_seconds)
+    if not chunks:
+        return
+
+    # A failed chunk stops the others, as do the caller's cancellation and closing the iterator
+    failed = threading.Event()
+
+    def stop() -> bool:
+        return failed.is_set() or bool(cancelled and cancelled())
+
+    def run(chunk: Tuple[int, int]) -> Tuple[float, Dict[str, Any]]:
+        start, end = chunk
+        if failed.is_set():
+            raise InferenceCancelledError("Transcription stopped")
+        audio = samples[start:end].astype(np.float32) / 32768.0
+        return start / SAMPLE_RATE, inference.transcribe(audio, cancelled=stop, **options)
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(chunks)), thread_name_prefix='whisper-chunk') as executor:
+        futures = [executor.submit(run, chunk) for chunk in chunks]
+        try:
+            for done, future in enumerate(futures, 1):
+                yield future.result()
+                if progress:
+                    progress(done / len(futures))
+        except BaseException:
+            failed.set()
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def transcribe_samples(inference, samples: np.ndarray, workers: int,
+                       cancelled: Optional[Callable[[], bool]] = None,
+                       progress: Optional[Callable[[float], None]] = None,
+                       max_chunk_seconds: float = WHISPER_CHUNK_SECONDS, **options) -> Dict[str, Any]:
+    """Transcribe decoded 16 kHz samples as parallel chunks split at pauses"""
+    results = iter_chunk_results(inference, samples, workers, cancelled, progress, max_chunk_seconds, **options)
+    return stitch_results(list(results), options.get('language'))
+
+
+def transcribe_in_chunks(inference, audio_path: str, cancelled: Optional[Callable[[], bool]] = None,
+                         progress: Optional[Callable[[float], None]] = None, **options) -> Dict[str, Any]:
+    """Whisper result for a file, transcribed in parallel chunks when it is long enough to pay off"""
+    workers = getattr(inference, 'workers', 1)
+    if WHISPER_CHUNKING and workers > 1:
+        try:
+            samples = decode_audio(audio_path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            # Let the worker decode (and report) it as before
+            logging.warning(f"Could not decode {audio_path} for chunking: {e}")
+        else:
+            if len(samples) >= WHISPER_CHUNK_MIN_AUDIO_SECONDS * SAMPLE_RATE:
+                return transcribe_samples(inference, samples, workers, cancelled, progress, **options)
+    return inference.transcribe(audio_path, cancelled=cancelled, **options)
+
+
+def iter_transcription(inference, audio_path: str, cancelled: Optional[Callable[[], bool]] = None,
+                       progress: Optional[Callable[[float], None]] = None,
+                       max_chunk_seconds: float = WHISPER_STREAM_CHUNK_SECONDS,
+                       **options) -> Iterator[Tuple[float, Dict[str, Any]]]:
+    """
+    (offset, Whisper result) of a file's chunks in order, each as soon as it
+    and the chunks before it are transcribed; for streaming partial results
+    """
+    try:
+        samples = decode_audio(audio_path)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logging.warning(f"Could not decode {audio_path} for streaming: {e}")
+        yield 0.0, inference.transcribe(audio_path, cancelled=cancelled, **options)
+        return
+    workers = max(getattr(inference, 'workers', 1), 1)
+    yield from iter_chunk_results(inference, samples, workers, cancelled, progress, max_chunk_seconds, **options)
@@ -0,0 +1,84 @@
+"""
+Pooled Async OpenAI Clients
+===========================
+
+One AsyncOpenAI client per (event loop, API key, base URL), backed by an
+httpx connection pool with keep-alive. Connections belong to the event
+loop that opened them, so clients are shared by everything running on the
+same loop and are never handed to another loop.
+
+Pool limits come from the environment:
+    OPENAI_MAX_CONNECTIONS            total connections per client (default 100)
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS  idle connections kept open (default 20)
+    OPENAI_KEEPALIVE_EXPIRY           seconds an idle connection is kept (default 30)
+    OPENAI_MAX_RETRIES                SDK-level retries (default 0; AIService retries rate
+                                      limits itself and the circuit breaker handles failures)
+    OPENAI_BASE_URL                   alternative API endpoint (e.g. a local fake server)
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Dict, Optional, Tuple
+
+import httpx
+import openai
+
+OPENAI_MAX_CONNECTIONS = int(os.environ.get('OPENAI_MAX_CONNECTIONS', '100'))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get('OPENAI_MAX_KEEPALIVE_CONNECTIONS', '20'))
+OPENAI_KEEPALIVE_EXPIRY = float(os.environ.get('OPENAI_KEEPALIVE_EXPIRY', '30'))
+OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', '0'))
+
+# Seconds allowed to establish a connection; the read timeout is set per client
+CONNECT_TIMEOUT_SECONDS = 5.0
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, openai.AsyncOpenAI]]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def create_pooled_http_client(timeout: float, **kwargs) -> httpx.AsyncClient:
+    """httpx client with the configured keep-alive pool limits (also used for other model providers)"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(timeout, connect=CONNECT_TIMEOUT_SECONDS),
+        **kwargs,
+    )
+
+
+def _create_client(api_key: str, base_url: Optional[str], timeout: float) -> openai.AsyncOpenAI:
+    http_client = create_pooled_http_client(timeout)
+    return openai.AsyncOpenAI(
+        api_key=api_key, base_url=base_url, timeout=timeout,
+        max_retries=OPENAI_MAX_RETRIES, http_client=http_client,
+    )
+
+
+def get_async_openai_client(api_key: str, base_url: Optional[str] = None, timeout: float = 30) -> openai.AsyncOpenAI:
+    """
+    Pooled client for the running event loop.
+
+    Must be called from a coroutine; the same client is returned for every
+    call on this loop with the same key, URL and timeout.
+    """
+    loop = asyncio.get_running_loop()
+    base_url = base_url or os.environ.get('OPENAI_BASE_URL') or None
+    key = (api_key, base_url, timeout)
+    with _clients_lock:
+        clients = _clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = _create_client(api_key, base_url, timeout)
+    return client
+
+
+async def close_async_openai_clients():
+    """Close the pooled clients of the running loop; call before closing a short-lived loop"""
+    with _clients_lock:
+        clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.close()
@@ -0,0 +1,123 @@
+"""
+Provider Router
+===============
+
+Chooses which model provider serves a guru workflow. Every workflow names
+a preferred ``provider`` and may name a ``fallback_provider``
+(ChatGPTWorkflowManager); the router orders those candidates for each
+call:
+
+    for provider, model in get_provider_router().route(model, "openai", ["claude"]):
+        ...  # try in order, moving on when a provider is unavailable
+
+Providers are ranked by a score built from their circuit breaker's
+recent history (see upstream_health), lower is better:
+
+    score = (p50 + p95) / 2 * (1 + ROUTER_ERROR_PENALTY * error_rate)
+            + ROUTER_COST_WEIGHT * cost per 1K tokens
+
+The preferred provider keeps the first place until another one has at
+least ROUTER_MIN_SAMPLES observed calls and scores ROUTER_STICKINESS
+better, so routing does not flap between providers on noise. Providers
+whose circuit is open are tried last.
+
+Configuration (environment):
+    ROUTER_MIN_SAMPLES     calls observed before a provider is ranked by score (default 20)
+    ROUTER_ERROR_PENALTY   latency multiplier per unit of error rate (default 4)
+    ROUTER_COST_WEIGHT     seconds of latency one USD per 1K tokens is worth (default 10)
+    ROUTER_STICKINESS      fraction by which a challenger must beat the preferred
+                           provider (default 0.2)
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .providers import ChatProvider, configured_providers
+from .upstream_health import OPEN, get_circuit_breaker
+
+ROUTER_MIN_SAMPLES = int(os.environ.get('ROUTER_MIN_SAMPLES', '20'))
+ROUTER_ERROR_PENALTY = float(os.environ.get('ROUTER_ERROR_PENALTY', '4'))
+ROUTER_COST_WEIGHT = float(os.environ.get('ROUTER_COST_WEIGHT', '10'))
+ROUTER_STICKINESS = float(os.environ.get('ROUTER_STICKINESS', '0.2'))
+
+
+class ProviderRouter:
+    """Ranks a workflow's providers by observed latency, error rate and cost"""
+
+    def __init__(self, providers: Dict[str, ChatProvider], min_samples: int = ROUTER_MIN_SAMPLES,
+                 error_penalty: float = ROUTER_ERROR_PENALTY, cost_weight: float = ROUTER_COST_WEIGHT,
+                 stickiness: float = ROUTER_STICKINESS):
+        self.providers = providers
+        self.min_samples = min_samples
+        self.error_penalty = error_penalty
+        self.cost_weight = cost_weight
+        self.stickiness = stickiness
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, int]] = {name: {'routed': 0, 'failovers': 0} for name in providers}
+
+    def score(self, provider: ChatProvider, model: str) -> Optional[float]:
+        """Routing score of a provider's model (lower is better), or None with too few samples"""
+        breaker = get_circuit_breaker(model)
+        p50, p95 = breaker.percentile(0.5), breaker.percentile(0.95)
+        if breaker.samples() < self.min_samples or p50 is None:
+            return None
+        latency = (p50 + p95) / 2
+        return latency * (1 + self.error_penalty * breaker.error_rate()) + self.cost_weight * provider.cost_per_1k(model)
+
+    def route(self, model: str, preferred: Optional[str] = None,
+              fallbacks: Sequence[Optional[str]] = ()) -> List[Tuple[ChatProvider, str]]:
+        """
+        (provider, provider model) pairs to try for a workflow, best first.
+
+        ``model`` is the workflow's configured model; each provider maps it to
+        one of its own. Unconfigured providers are skipped.
+        """
+        names = []
+        for name in (preferred, *fallbacks):
+            if name in self.providers and name not in names:
+                names.append(name)
+        if not names:
+            names = list(self.providers)
+        candidates = [(self.providers[name], self.providers[name].model_for(model)) for name in names]
+
+        # Open circuits would only fail fast; they stay in the list for their half-open probes
+        available = [c for c in candidates if get_circuit_breaker(c[1]).state != OPEN]
+        unavailable = [c for c in candidates if c not in available]
+
+        if len(available) > 1:
+            best, best_score = available[0], self.score(*available[0])
+            for candidate in available[1:]:
+                score = self.score(*candidate)
+                if score is not None and best_score is not None and score < best_score * (1 - self.stickiness):
+                    best, best_score = candidate, score
+            available.remove(best)
+            available.insert(0, best)
+
+        route = available + unavailable
+        if route:
+            self.count(route[0][0].name, 'routed')
+        return route
+
+    def count(self, provider: str, metric: str):
+        with self._lock:
+            self._metrics.setdefault(provider, {'routed': 0, 'failovers': 0})[metric] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Routing counters per provider"""
+        with self._lock:
+            return {name: dict(metrics) for name, metrics in self._metrics.items()}
+
+
+_router: Optional[ProviderRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_provider_router(timeout: float = 30) -> ProviderRouter:
+    """Process-wide router over the providers configured in the environment"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ProviderRouter(configured_providers(timeout))
+    return _router
@@ -0,0 +1,248 @@
+"""
+Model Providers
+===============
+
+A common async interface over the chat model APIs the gurus can use:
+
+    completion = await provider.complete(messages, model, temperature, max_tokens, timeout)
+    completion.text, completion.tokens_used, completion.model
+
+    async for text in provider.stream(messages, model, temperature, max_tokens, timeout):
+        ...
+
+Messages use the OpenAI chat format; providers translate as needed.
+Both providers run on pooled keep-alive connections owned by the running
+event loop:
+    openai  AsyncOpenAI client from openai_client (OPENAI_API_KEY)
+    claude  Anthropic Messages API over a pooled httpx client
+            (CLAUDE_API_KEY or ANTHROPIC_API_KEY)
+
+Configuration (environment):
+    CLAUDE_MODEL      model used when a workflow is served by Claude
+                      (default claude-3-opus-20240229)
+    CLAUDE_BASE_URL   alternative Anthropic endpoint (e.g. a local fake server)
+"""
+
+import asyncio
+import json
+import os
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from .openai_client import create_pooled_http_client, get_async_openai_client
+
+CLAUDE_MODEL = os.environ.get('CLAUDE_MODEL', 'claude-3-opus-20240229')
+CLAUDE_BASE_URL = os.environ.get('CLAUDE_BASE_URL', 'https://api.anthropic.com')
+ANTHROPIC_VERSION = '2023-06-01'
+
+# Blended USD per 1K tokens (mean of input and output list prices), for routing
+MODEL_COST_PER_1K = {
+    'gpt-4': 0.045,
+    'gpt-4-turbo': 0.02,
+    'gpt-3.5-turbo': 0.0015,
+    'claude-3-opus-20240229': 0.045,
+    'claude-3-sonnet-20240229': 0.009,
+    'claude-3-haiku-20240307': 0.00075,
+}
+
+
+class Completion(NamedTuple):
+    """Provider-neutral result of a chat completion"""
+    text: str
+    tokens_used: int
+    model: str
+    provider: str
+
+
+class ProviderHTTPError(Exception):
+    """Non-2xx answer from a provider API; ``status_code`` >= 500 marks an upstream failure"""
+
+    def __init__(self, provider: str, status_code: int, message: str):
+        super().__init__(f"{provider} API error {status_code}: {message}")
+        self.provider = provider
+        self.status_code = status_code
+
+
+class ChatProvider:
+    """Interface shared by the model providers"""
+
+    name = ''
+
+    def model_for(self, model: str) -> str:
+        """The provider's model for a workflow model (workflows are configured with OpenAI names)"""
+        return model
+
+    def cost_per_1k(self, model: str) -> float:
+        return MODEL_COST_PER_1K.get(model, 0.0)
+
+    async def complete(self, messages: List[Dict[str, str]], model: str, temperature: float,
+                       max_tokens: int, timeout: float) -> Completion:
+        raise NotImplementedError
+
+    def stream(self, messages: List[Dict[str, str]], model: str, temperature: float,
+               max_tokens: int, timeout: float) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+
+class OpenAIProvider(ChatProvider):
+    """OpenAI chat completions on the pooled AsyncOpenAI client"""
+
+    name = 'openai'
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None, timeout: float = 30):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+
+    @property
+    def client(self):
+        return get_async_openai_client(self.api_key, self.base_url, self.timeout)
+
+    async def complete(self, messages, model, temperature, max_tokens, timeout):
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout
+        )
+        return Completion(
+            response.choices[0].message.content,
+            response.usage.total_tokens if response.usage else 0,
+            response.model,
+            self.name,
+        )
+
+    async def stream(self, messages, model, temperature, max_tokens, timeout):
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+_claude_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+_claude_clients_lock = threading.Lock()
+
+
+class ClaudeProvider(ChatProvider):
+    """Anthropic Messages API over a pooled httpx client"""
+
+    name = 'claude'
+
+    def __init__(self, api_key: str, model: str = CLAUDE_MODEL, base_url: str = CLAUDE_BASE_URL, timeout: float = 30):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Keep-alive client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        key = (self.api_key, self.base_url, self.timeout)
+        with _claude_clients_lock:
+            clients = _claude_clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is None:
+                client = clients[key] = create_pooled_http_client(
+                    self.timeout,
+                    base_url=self.base_url,
+                    headers={
+                        'x-api-key': self.api_key,
+                        'anthropic-version': ANTHROPIC_VERSION,
+                        'content-type': 'application/json',
+                    },
+                )
+        return client
+
+    def model_for(self, model: str) -> str:
+        return model if model.startswith('claude') else self.model
+
+    @staticmethod
+    def _payload(messages, model, temperature, max_tokens, stream=False) -> Dict[str, Any]:
+        # System prompts are a top-level field in the Messages API
+        system = "\n\n".join(message['content'] for message in messages if message['role'] == 'system')
+        payload = {
+            'model': model,
+            'max_tokens': max_tokens,
+            'temperature': temperature,
+            'messages': [
+                {'role': message['role'], 'content': message['content']}
+                for message in messages if message['role'] in ('user', 'assistant')
+            ],
+        }
+        if system:
+            payload['system'] = system
+        if stream:
+            payload['stream'] = True
+        return payload
+
+    def _raise_for_status(self, response: httpx.Response, body: str):
+        if response.status_code >= 400:
+            try:
+                message = json.loads(body)['error']['message']
+            except (ValueError, KeyError, TypeError):
+                message = body[:200]
+            raise ProviderHTTPError(self.name, response.status_code, message)
+
+    async def complete(self, messages, model, temperature, max_tokens, timeout):
+        response = await self.client.post(
+            '/v1/messages', json=self._payload(messages, model, temperature, max_tokens), timeout=timeout
+        )
+        self._raise_for_status(response, response.text)
+        data = response.json()
+        usage = data.get('usage', {})
+        return Completion(
+            ''.join(block.get('text', '') for block in data.get('content', []) if block.get('type') == 'text'),
+            usage.get('input_tokens', 0) + usage.get('output_tokens', 0),
+            data.get('model', model),
+            self.name,
+        )
+
+    async def stream(self, messages, model, temperature, max_tokens, timeout):
+        payload = self._payload(messages, model, temperature, max_tokens, stream=True)
+        async with self.client.stream('POST', '/v1/messages', json=payload, timeout=timeout) as response:
+            if response.status_code >= 400:
+                self._raise_for_status(response, (await response.aread()).decode('utf-8', 'replace'))
+            async for line in response.aiter_lines():
+                if not line.startswith('data:'):
+                    continue
+                event = json.loads(line[5:])
+                if event.get('type') == 'content_block_delta':
+                    text = event.get('delta', {}).get('text')
+                    if text:
+                        yield text
+                elif event.get('type') == 'error':
+                    error = event.get('error', {})
+                    raise ProviderHTTPError(self.name, 529 if error.get('type') == 'overloaded_error' else 500,
+                                            error.get('message', 'stream error'))
+
+
+async def close_claude_clients():
+    """Close the pooled Claude clients of the running loop"""
+    with _claude_clients_lock:
+        clients = _claude_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+def configured_providers(timeout: float = 30) -> Dict[str, ChatProvider]:
+    """Providers with API keys in the environment"""
+    providers = {}
+    openai_key = os.environ.get('OPENAI_API_KEY')
+    if openai_key:
+        providers['openai'] = OpenAIProvider(openai_key, os.environ.get('OPENAI_BASE_URL') or None, timeout)
+    claude_key = os.environ.get('CLAUDE_API_KEY') or os.environ.get('ANTHROPIC_API_KEY')
+    if claude_key:
+        providers['claude'] = ClaudeProvider(claude_key, timeout=timeout)
+    return providers
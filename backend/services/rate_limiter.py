@@ -0,0 +1,289 @@
+"""
+Guru Rate Limiter
+=================
+
+Token-bucket limits checked before any upstream model call, so an
+overloaded workflow sheds load with a cheap 429 instead of queueing work.
+
+Two kinds of limit apply to each guru request:
+    api       requests per client IP across the guru and Durable endpoints,
+              refilled at RATE_LIMIT_REQUESTS_PER_MINUTE with RATE_LIMIT_BURST
+              tokens of burst (the Durable deployment's RATE_LIMIT)
+    workflow  per_hour / per_day requests per guru for each authenticated
+              user (the JWT subject, or the IP when anonymous), from
+              ChatGPTWorkflowManager.rate_limits
+
+Limits are never keyed by a user id from the request body, which a client
+could change on every request to get a fresh bucket.
+
+A request takes one token from every bucket that applies or from none of
+them, so a rejected request does not use up quota.
+
+Buckets are stored in-process by default, or in Redis when
+RATELIMIT_STORAGE_URL / REDIS_URL is a redis:// URL so all workers share
+one budget. The Redis bucket update is a single Lua script. If Redis
+errors, the limiter falls back to the in-process buckets for
+REDIS_RETRY_SECONDS instead of failing requests.
+
+Configuration (environment):
+    RATE_LIMIT_ENABLED               "false" disables limiting (default true)
+    RATE_LIMIT_REQUESTS_PER_MINUTE   per-IP refill rate (default 60)
+    RATE_LIMIT_BURST                 per-IP bucket size (default 10)
+    RATE_LIMIT_MAX_KEYS              in-process buckets kept (default 100000)
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+except ImportError:
+    verify_jwt_in_request = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() != 'false'
+RATE_LIMIT_REQUESTS_PER_MINUTE = float(os.environ.get('RATE_LIMIT_REQUESTS_PER_MINUTE', '60'))
+RATE_LIMIT_BURST = int(os.environ.get('RATE_LIMIT_BURST', '10'))
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '100000'))
+
+# Prefix for bucket keys in Redis
+REDIS_KEY_PREFIX = 'guru-ratelimit:'
+
+# Seconds to use the in-process buckets after Redis fails
+REDIS_RETRY_SECONDS = 30
+
+WORKFLOW_WINDOWS = {'per_hour': 3600, 'per_day': 86400}
+
+
+class Bucket(NamedTuple):
+    """A token bucket: ``capacity`` tokens, refilled at ``rate`` tokens per second"""
+    key: str
+    capacity: float
+    rate: float
+    name: str  # limit reported to clients, e.g. "api" or "workflow:per_hour"
+
+
+class RateLimitDecision(NamedTuple):
+    """Outcome of a rate-limit check"""
+    allowed: bool
+    retry_after: float  # seconds until the request would be allowed (0 when allowed)
+    remaining: float    # tokens left in the tightest bucket
+    limit: Optional[str] = None  # name of the bucket that rejected the request
+
+    def headers(self) -> Dict[str, str]:
+        """HTTP headers describing the decision (Retry-After on rejection)"""
+        headers = {}
+        if math.isfinite(self.remaining):
+            headers['X-RateLimit-Remaining'] = str(max(int(self.remaining), 0))
+        if not self.allowed:
+            headers['Retry-After'] = str(max(math.ceil(self.retry_after), 1))
+        return headers
+
+
+def _take(states: List[Tuple[float, float]], buckets: Sequence[Bucket], now: float,
+          cost: float) -> Tuple[List[Tuple[float, float]], RateLimitDecision]:
+    """
+    Shared bucket arithmetic: refill every bucket, then take ``cost`` tokens from all
+    of them or from none. ``states`` holds (tokens, updated_at) per bucket, None if new.
+    """
+    levels = []
+    retry_after, rejected_by = 0.0, None
+    for bucket, state in zip(buckets, states):
+        tokens, updated_at = state if state is not None else (bucket.capacity, now)
+        tokens = min(bucket.capacity, tokens + max(0.0, now - updated_at) * bucket.rate)
+        levels.append(tokens)
+        if tokens < cost:
+            wait = (cost - tokens) / bucket.rate
+            if wait > retry_after:
+                retry_after, rejected_by = wait, bucket.name
+    allowed = rejected_by is None
+    if allowed:
+        levels = [tokens - cost for tokens in levels]
+    decision = RateLimitDecision(allowed, retry_after, min(levels) if levels else 0.0, rejected_by)
+    return [(tokens, now) for tokens in levels], decision
+
+
+class MemoryRateLimitBackend:
+    """Per-process buckets; least recently used buckets are dropped beyond ``max_keys``"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._states: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, buckets: Sequence[Bucket], cost: float = 1) -> RateLimitDecision:
+        now = time.monotonic()
+        with self._lock:
+            states = [self._states.get(bucket.key) for bucket in buckets]
+            new_states, decision = _take(states, buckets, now, cost)
+            for bucket, state in zip(buckets, new_states):
+                self._states[bucket.key] = state
+                self._states.move_to_end(bucket.key)
+            # A dropped bucket starts full again, so eviction can only be lenient
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+        return decision
+
+
+# KEYS: bucket keys; ARGV: now, cost, then capacity and rate for each key.
+# Returns {allowed, retry_after, remaining, index of the rejecting key}; numbers
+# are returned as strings because Redis truncates Lua numbers to integers.
+_TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local levels = {}
+local retry_after, rejected = 0, 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[1 + 2 * i])
+    local rate = tonumber(ARGV[2 + 2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    levels[i] = tokens
+    if tokens < cost and (cost - tokens) / rate > retry_after then
+        retry_after, rejected = (cost - tokens) / rate, i
+    end
+end
+local remaining = nil
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[1 + 2 * i])
+    local rate = tonumber(ARGV[2 + 2 * i])
+    if rejected == 0 then levels[i] = levels[i] - cost end
+    redis.call('HSET', key, 'tokens', tostring(levels[i]), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+    if remaining == nil or levels[i] < remaining then remaining = levels[i] end
+end
+return {rejected == 0 and 1 or 0, tostring(retry_after), tostring(remaining or 0), rejected}
+"""
+
+
+class RedisRateLimitBackend:
+    """Buckets shared by every worker through Redis, with an in-process fallback"""
+
+    def __init__(self, client, fallback: Optional[MemoryRateLimitBackend] = None):
+        self._redis = client
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+        self._fallback = fallback or MemoryRateLimitBackend()
+        self._retry_at = 0.0
+        self.errors = 0
+
+    def acquire(self, buckets: Sequence[Bucket], cost: float = 1) -> RateLimitDecision:
+        if time.monotonic() < self._retry_at:
+            return self._fallback.acquire(buckets, cost)
+        args = [time.time(), cost]
+        for bucket in buckets:
+            args += [bucket.capacity, bucket.rate]
+        try:
+            allowed, retry_after, remaining, rejected = self._script(
+                keys=[REDIS_KEY_PREFIX + bucket.key for bucket in buckets], args=args
+            )
+        except Exception:
+            self._retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+            self.errors += 1
+            return self._fallback.acquire(buckets, cost)
+        return RateLimitDecision(
+            bool(int(allowed)), float(retry_after), float(remaining),
+            buckets[int(rejected) - 1].name if int(rejected) else None,
+        )
+
+
+def _storage_url() -> Optional[str]:
+    """Redis URL for shared buckets; memory:// (the Flask-Limiter default) keeps them in-process"""
+    url = os.environ.get('RATELIMIT_STORAGE_URL') or os.environ.get('REDIS_URL') or ''
+    return url if url.startswith(('redis://', 'rediss://', 'unix://')) else None
+
+
+def _default_workflow_limits() -> Dict[str, Dict[str, int]]:
+    try:
+        from workflow_assignment import ChatGPTWorkflowManager
+    except ImportError:
+        return {}
+    return ChatGPTWorkflowManager().rate_limits
+
+
+class RateLimiter:
+    """Checks the per-IP API limit and the per-guru workflow limits of a request"""
+
+    def __init__(self, backend=None, workflow_limits: Optional[Dict[str, Dict[str, int]]] = None,
+                 requests_per_minute: float = RATE_LIMIT_REQUESTS_PER_MINUTE, burst: int = RATE_LIMIT_BURST):
+        self.backend = backend or MemoryRateLimitBackend()
+        self.workflow_limits = _default_workflow_limits() if workflow_limits is None else workflow_limits
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._metrics = {'allowed': 0, 'rejected': 0}
+
+    def buckets_for(self, guru_type: Optional[str], ip: Optional[str], user_id: Optional[str] = None) -> List[Bucket]:
+        """Buckets a request draws from: the client IP's API bucket and the guru's workflow buckets"""
+        buckets = []
+        if ip:
+            buckets.append(Bucket(f'api:{ip}', self.burst, self.requests_per_minute / 60, 'api'))
+        client = f'user:{user_id}' if user_id else f'ip:{ip}'
+        for window, limit in (self.workflow_limits.get(guru_type) or {}).items():
+            seconds = WORKFLOW_WINDOWS.get(window)
+            if seconds and limit:
+                buckets.append(Bucket(f'workflow:{guru_type}:{client}:{window}', limit, limit / seconds, f'workflow:{window}'))
+        return buckets
+
+    def check(self, guru_type: Optional[str], ip: Optional[str], user_id: Optional[str] = None,
+              cost: float = 1) -> RateLimitDecision:
+        """Take ``cost`` tokens for a request, or report how long to wait"""
+        buckets = self.buckets_for(guru_type, ip, user_id)
+        if not buckets:
+            return RateLimitDecision(True, 0.0, float('inf'))
+        decision = self.backend.acquire(buckets, cost)
+        with self._lock:
+            self._metrics['allowed' if decision.allowed else 'rejected'] += 1
+        return decision
+
+    def stats(self) -> Dict[str, Any]:
+        """Allowed/rejected counters and the configured limits"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics['backend'] = 'redis' if isinstance(self.backend, RedisRateLimitBackend) else 'memory'
+        metrics['requests_per_minute'] = self.requests_per_minute
+        metrics['burst'] = self.burst
+        metrics['workflow_limits'] = self.workflow_limits
+        return metrics
+
+
+def request_user_id() -> Optional[str]:
+    """Subject of the current request's valid JWT, or None for anonymous requests"""
+    if verify_jwt_in_request is None:
+        return None
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        # No JWTManager on the app, or an invalid/expired token: limit by IP
+        return None
+    return str(identity) if identity is not None else None
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Process-wide rate limiter, or None when RATE_LIMIT_ENABLED is false"""
+    global _limiter
+    if not RATE_LIMIT_ENABLED:
+        return None
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                url = _storage_url()
+                backend = None
+                if redis and url:
+                    backend = RedisRateLimitBackend(redis.Redis.from_url(url, socket_timeout=0.5))
+                _limiter = RateLimiter(backend=backend)
+    return _limiter
@@ -0,0 +1,217 @@
+"""
+Guru Response Cache
+===================
+
+Exact-match cache for LLM answers. Keys hash everything that determines
+the completion (model, system prompt, temperature, max_tokens, extra
+context) plus the normalized question, so a repeated starter question is
+answered without another model call.
+
+Two tiers:
+    memory  per-process LRU bounded by entry count, with per-entry TTL
+    redis   optional shared tier (REDIS_URL / RATELIMIT_STORAGE_URL), entries
+            expire through Redis TTLs; hits are copied into the memory tier
+
+Configuration (environment):
+    RESPONSE_CACHE_ENABLED   "false" disables caching (default true)
+    RESPONSE_CACHE_SIZE      memory tier entries (default 1024)
+    RESPONSE_CACHE_TTL       seconds an answer stays fresh (default 3600)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() != 'false'
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '1024'))
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', '3600'))
+
+# Prefix for keys in the shared Redis tier
+REDIS_KEY_PREFIX = 'guru-response:'
+
+# Seconds to skip the Redis tier after it fails, so an outage does not add latency to every request
+REDIS_RETRY_SECONDS = 30
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_question(question: str) -> str:
+    """Canonical form of a question: Unicode-normalized, case-folded, single-spaced, no trailing punctuation"""
+    text = unicodedata.normalize('NFKC', question).casefold()
+    return _WHITESPACE.sub(' ', text).strip().rstrip('?!. ')
+
+
+def response_cache_key(model: str, system_prompt: str, temperature: float, max_tokens: int,
+                       question: str, **context: Any) -> str:
+    """Stable hash of a completion request; extra keyword context (e.g. user context) is part of the key"""
+    payload = json.dumps({
+        'model': model,
+        'system_prompt': system_prompt,
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+        'question': normalize_question(question),
+        'context': context,
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _redis_url() -> Optional[str]:
+    """Redis URL shared with rate limiting, if one is configured"""
+    url = os.environ.get('REDIS_URL') or os.environ.get('RATELIMIT_STORAGE_URL') or ''
+    return url if url.startswith(('redis://', 'rediss://', 'unix://')) else None
+
+
+class ResponseCache:
+    """LRU + TTL response cache with an optional Redis tier and hit/miss counters"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: int = RESPONSE_CACHE_TTL,
+                 redis_url: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5) if (redis and redis_url) else None
+        self._redis_retry_at = 0.0
+        self._metrics = {
+            'hits': 0, 'memory_hits': 0, 'redis_hits': 0, 'misses': 0,
+            'sets': 0, 'evictions': 0, 'expirations': 0, 'redis_errors': 0,
+        }
+
+    def _count(self, metric: str, amount: int = 1):
+        with self._lock:
+            self._metrics[metric] += amount
+
+    def _memory_get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._metrics['expirations'] += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _memory_set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._metrics['evictions'] += 1
+
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self):
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        self._count('redis_errors')
+
+    def _redis_get(self, key: str) -> Optional[Any]:
+        if not self._redis_available():
+            return None
+        try:
+            raw = self._redis.get(REDIS_KEY_PREFIX + key)
+        except Exception:
+            self._redis_failed()
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def _redis_set(self, key: str, value: Any, ttl: float):
+        if not self._redis_available():
+            return
+        try:
+            self._redis.set(REDIS_KEY_PREFIX + key, json.dumps(value, ensure_ascii=False), ex=max(int(ttl), 1))
+        except Exception:
+            self._redis_failed()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for a key, or None (checks memory, then Redis)"""
+        value = self._memory_get(key)
+        if value is not None:
+            self._count('hits')
+            self._count('memory_hits')
+            return value
+
+        value = self._redis_get(key)
+        if value is not None:
+            self._count('hits')
+            self._count('redis_hits')
+            self._memory_set(key, value, self.ttl)
+            return value
+
+        self._count('misses')
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a JSON-serializable value in both tiers"""
+        ttl = self.ttl if ttl is None else ttl
+        self._memory_set(key, value, ttl)
+        self._redis_set(key, value, ttl)
+        self._count('sets')
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get() for coroutines; Redis round trips run off the event loop"""
+        value = self._memory_get(key)
+        if value is not None:
+            self._count('hits')
+            self._count('memory_hits')
+            return value
+        if not self._redis_available():
+            self._count('misses')
+            return None
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        """set() for coroutines; Redis round trips run off the event loop"""
+        if self._redis_available():
+            await asyncio.to_thread(self.set, key, value, ttl)
+        else:
+            self.set(key, value, ttl)
+
+    def clear(self):
+        """Drop the memory tier (shared Redis entries expire on their own)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, hit rate and tier sizes"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['entries'] = len(self._entries)
+        lookups = metrics['hits'] + metrics['misses']
+        metrics['hit_rate'] = round(metrics['hits'] / lookups, 4) if lookups else 0.0
+        metrics['max_entries'] = self.max_entries
+        metrics['ttl_seconds'] = self.ttl
+        metrics['redis_enabled'] = self._redis is not None
+        return metrics
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide response cache, or None when RESPONSE_CACHE_ENABLED is false"""
+    global _cache
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(redis_url=_redis_url())
+    return _cache
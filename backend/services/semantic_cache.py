@@ -0,0 +1,290 @@
+"""
+Semantic Response Cache
+=======================
+
+Near-duplicate lookup for guru answers, behind the exact-match
+ResponseCache: "How do I find peace?" and "how can I be peaceful" share
+an answer, "how do I find love" does not.
+
+Questions are embedded without a model, as hashed feature vectors:
+    word terms    folded, stemmed content words (filler such as "explain",
+                  "tell me", "I" is dropped; negations are kept)
+    word bigrams  so word order contributes
+    char 3-grams  per term, so spelling and inflection variants still overlap
+    question kind the question word ("who", "why", "how", ...), or the modal
+                  a yes/no question opens with ("can", "should", ...), as one
+                  feature weighted against the whole content vector, so
+                  "Who is Krishna?" and "Where is Krishna?" stay apart
+The vectors are L2-normalized float32, so cosine similarity is a dot
+product and a lookup is one matrix-vector product over the namespace.
+
+Entries live in namespaces, one per guru configuration (model, prompt,
+temperature, max_tokens, user context); only questions within the same
+namespace are compared. Each namespace holds at most SEMANTIC_CACHE_SIZE
+vectors and evicts the least recently used one; the least recently used
+namespace is dropped beyond SEMANTIC_CACHE_NAMESPACES, so memory is bounded
+by NAMESPACES x SIZE x EMBEDDING_DIM x 4 bytes (16 MB with the defaults).
+
+Configuration (environment):
+    SEMANTIC_CACHE_ENABLED     "false" disables the cache (default true; needs numpy)
+    SEMANTIC_CACHE_THRESHOLD   minimum cosine similarity for a hit (default 0.85)
+    SEMANTIC_CACHE_SIZE        entries per namespace (default 256)
+    SEMANTIC_CACHE_NAMESPACES  namespaces kept per worker (default 16)
+    SEMANTIC_CACHE_TTL         seconds an answer stays fresh (default 3600)
+"""
+
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from backend.models.sloka_search import fold_text, stem, _TOKEN_PATTERN
+
+SEMANTIC_CACHE_ENABLED = os.environ.get('SEMANTIC_CACHE_ENABLED', 'true').lower() != 'false'
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get('SEMANTIC_CACHE_THRESHOLD', '0.85'))
+SEMANTIC_CACHE_SIZE = int(os.environ.get('SEMANTIC_CACHE_SIZE', '256'))
+SEMANTIC_CACHE_NAMESPACES = int(os.environ.get('SEMANTIC_CACHE_NAMESPACES', '16'))
+SEMANTIC_CACHE_TTL = int(os.environ.get('SEMANTIC_CACHE_TTL', '3600'))
+
+# Hashed feature space; 1024 dimensions keep collisions rare for question-length text
+EMBEDDING_DIM = 1024
+
+# Feature weights: whole terms dominate, bigrams and character n-grams refine
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.5
+CHAR_NGRAM_WEIGHT = 0.5
+
+# Negations flip the meaning of a question, so they outweigh ordinary terms
+# ("t" is what remains of "don't", "can't", "isn't" after tokenizing)
+NEGATION_TERMS = frozenset({'not', 'no', 'never', 'nor', 'without', 'cannot', 't'})
+NEGATION_WEIGHT = 2.0
+
+# Weight of the question-kind feature relative to the content vector's length: questions of different
+# kinds score 1 / (1 + w^2) = 0.64 and a kind against none 1 / sqrt(1 + w^2) = 0.8, both below the threshold
+QUESTION_KIND_WEIGHT = 0.75
+
+# Question words and leading modals, folded to the kind of answer they ask for. "What", "which" and
+# imperatives ("explain karma") ask for the same thing and carry no kind. Contractions lose their
+# "'t" to tokenizing ("shouldn't" -> "shouldn"), which the negation feature covers.
+QUESTION_WORDS = {
+    'who': 'who', 'whom': 'who', 'whose': 'who', 'where': 'where', 'when': 'when', 'why': 'why', 'how': 'how',
+}
+LEADING_MODALS = {
+    'can': 'can', 'could': 'can', 'couldn': 'can', 'may': 'can',
+    'should': 'should', 'shouldn': 'should', 'must': 'should', 'shall': 'should', 'ought': 'should',
+    'will': 'will', 'would': 'will', 'wouldn': 'will', 'won': 'will',
+    'do': 'do', 'does': 'do', 'did': 'do', 'don': 'do', 'doesn': 'do', 'didn': 'do',
+}
+
+# Namespaces start small and double up to SEMANTIC_CACHE_SIZE rows
+INITIAL_CAPACITY = 16
+
+# Function and question words that say how something is asked, not what is asked; the question
+# words and modals among them come back as the question kind. Negations are deliberately absent.
+QUESTION_STOPWORDS = frozenset("""
+a about an and any are as at be become being best but by can could do does doing
+explain feel find for from get give had has have he her his how i if in into is
+it its just know make me might more much my of on or our please really she should
+so some tell than that the their them then there these they this to us want was
+s way ways we were what whats when where which who why will with would you your
+""".split())
+
+
+def question_terms(question: str) -> List[str]:
+    """Folded, stemmed content terms of a question"""
+    return [
+        stem(token)
+        for token in _TOKEN_PATTERN.findall(fold_text(question))
+        if token not in QUESTION_STOPWORDS
+    ]
+
+
+def question_kind(question: str) -> Optional[str]:
+    """The first question word, else the modal a yes/no question starts with, else None"""
+    tokens = _TOKEN_PATTERN.findall(fold_text(question))
+    for token in tokens:
+        if token in QUESTION_WORDS:
+            return QUESTION_WORDS[token]
+    return LEADING_MODALS.get(tokens[0]) if tokens else None
+
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode('utf-8')) % EMBEDDING_DIM
+
+
+def embed_question(question: str) -> Optional["np.ndarray"]:
+    """Unit-length hashed n-gram vector of a question, or None if it has no content terms"""
+    terms = question_terms(question)
+    if not terms:
+        return None
+
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for term in terms:
+        vector[_bucket('w:' + term)] += NEGATION_WEIGHT if term in NEGATION_TERMS else WORD_WEIGHT
+        padded = f'<{term}>'
+        grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for gram in grams:
+            vector[_bucket('c:' + gram)] += CHAR_NGRAM_WEIGHT / len(grams)
+    for first, second in zip(terms, terms[1:]):
+        vector[_bucket(f'b:{first} {second}')] += BIGRAM_WEIGHT
+
+    kind = question_kind(question)
+    if kind:
+        vector[_bucket('q:' + kind)] += QUESTION_KIND_WEIGHT * np.linalg.norm(vector)
+    vector /= np.linalg.norm(vector)
+    return vector
+
+
+class _Namespace:
+    """Fixed-width vector matrix with parallel expiry, recency and value slots"""
+
+    def __init__(self, capacity: int):
+        self.vectors = np.zeros((capacity, EMBEDDING_DIM), dtype=np.float32)
+        self.expires_at = np.zeros(capacity)  # 0 marks an empty slot
+        self.last_used = np.zeros(capacity)
+        self.values: List[Any] = [None] * capacity
+
+    def __len__(self):
+        return int(np.count_nonzero(self.expires_at))
+
+    def _grow(self, capacity: int):
+        extra = capacity - len(self.values)
+        self.vectors = np.vstack([self.vectors, np.zeros((extra, EMBEDDING_DIM), dtype=np.float32)])
+        self.expires_at = np.concatenate([self.expires_at, np.zeros(extra)])
+        self.last_used = np.concatenate([self.last_used, np.zeros(extra)])
+        self.values.extend([None] * extra)
+
+    def clear_slot(self, slot: int):
+        self.expires_at[slot] = 0
+        self.vectors[slot] = 0
+        self.values[slot] = None
+
+    def free_slot(self, max_entries: int) -> Tuple[int, bool]:
+        """Index of a slot to write and whether a live entry was evicted for it"""
+        empty = np.flatnonzero(self.expires_at == 0)
+        if len(empty):
+            return int(empty[0]), False
+        if len(self.values) < max_entries:
+            slot = len(self.values)
+            self._grow(min(len(self.values) * 2, max_entries))
+            return slot, False
+        return int(np.argmin(self.last_used)), True
+
+
+class SemanticCache:
+    """Per-namespace nearest-neighbour cache over hashed question embeddings"""
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, max_entries: int = SEMANTIC_CACHE_SIZE,
+                 max_namespaces: int = SEMANTIC_CACHE_NAMESPACES, ttl: int = SEMANTIC_CACHE_TTL):
+        if np is None:
+            raise RuntimeError("numpy is required for the semantic response cache")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_namespaces = max_namespaces
+        self.ttl = ttl
+        self._namespaces: "OrderedDict[str, _Namespace]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {
+            'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0,
+            'expirations': 0, 'namespace_evictions': 0,
+        }
+
+    def lookup(self, namespace: str, question: str, threshold: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """(value, similarity) of the closest fresh question above the threshold, or None"""
+        threshold = self.threshold if threshold is None else threshold
+        vector = embed_question(question)
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if vector is None or entries is None:
+                self._metrics['misses'] += 1
+                return None
+
+            now = time.monotonic()
+            expired = np.flatnonzero((entries.expires_at > 0) & (entries.expires_at <= now))
+            for slot in expired:
+                entries.clear_slot(slot)
+            self._metrics['expirations'] += len(expired)
+
+            scores = entries.vectors @ vector
+            slot = int(np.argmax(scores))
+            similarity = float(scores[slot])
+            if entries.expires_at[slot] == 0 or similarity < threshold:
+                self._metrics['misses'] += 1
+                return None
+
+            entries.last_used[slot] = now
+            self._namespaces.move_to_end(namespace)
+            self._metrics['hits'] += 1
+            return entries.values[slot], similarity
+
+    def add(self, namespace: str, question: str, value: Any, ttl: Optional[float] = None):
+        """Remember the answer to a question; questions without content terms are skipped"""
+        vector = embed_question(question)
+        if vector is None:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if entries is None:
+                entries = self._namespaces[namespace] = _Namespace(min(INITIAL_CAPACITY, self.max_entries))
+                while len(self._namespaces) > self.max_namespaces:
+                    self._namespaces.popitem(last=False)
+                    self._metrics['namespace_evictions'] += 1
+            self._namespaces.move_to_end(namespace)
+
+            # Re-asking a stored question refreshes its slot instead of adding a twin
+            scores = entries.vectors @ vector
+            slot = int(np.argmax(scores))
+            if entries.expires_at[slot] == 0 or scores[slot] < 0.999:
+                slot, evicted = entries.free_slot(self.max_entries)
+                self._metrics['evictions'] += evicted
+
+            now = time.monotonic()
+            entries.vectors[slot] = vector
+            entries.expires_at[slot] = now + ttl
+            entries.last_used[slot] = now
+            entries.values[slot] = value
+            self._metrics['sets'] += 1
+
+    def clear(self):
+        """Drop every namespace"""
+        with self._lock:
+            self._namespaces.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, hit rate and sizes"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['namespaces'] = len(self._namespaces)
+            metrics['entries'] = sum(len(entries) for entries in self._namespaces.values())
+            metrics['memory_bytes'] = sum(entries.vectors.nbytes for entries in self._namespaces.values())
+        lookups = metrics['hits'] + metrics['misses']
+        metrics['hit_rate'] = round(metrics['hits'] / lookups, 4) if lookups else 0.0
+        metrics['threshold'] = self.threshold
+        metrics['max_entries'] = self.max_entries
+        metrics['max_namespaces'] = self.max_namespaces
+        metrics['ttl_seconds'] = self.ttl
+        return metrics
+
+
+_cache: Optional[SemanticCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Process-wide semantic cache, or None when disabled or numpy is not installed"""
+    global _cache
+    if not SEMANTIC_CACHE_ENABLED or np is None:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SemanticCache()
+    return _cache
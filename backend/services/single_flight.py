@@ -0,0 +1,186 @@
+"""
+Single-Flight Request Coalescing
+================================
+
+Concurrent identical guru requests share one upstream call. The first
+caller for a key starts the work; callers arriving while it is in flight
+wait for the same result instead of starting their own completion:
+
+    result, shared = await get_single_flight().do(key, lambda: complete(...))
+
+Streams are shared the same way. Every chunk produced so far is kept for
+the life of the stream, so a subscriber that joins mid-stream first
+replays what it missed and then follows live:
+
+    async for chunk in get_single_flight().stream(key, lambda: stream(...)):
+        ...
+
+Only work that is still running is shared; finished answers are the
+response caches' job. The upstream call is cancelled once every caller
+waiting on it has gone away (e.g. all clients disconnected). Keys are
+scoped to the running event loop, since tasks cannot be awaited across
+loops.
+"""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class _Call:
+    """A shared in-flight coroutine and the number of callers awaiting it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class _Broadcast:
+    """Chunks of a shared stream, replayable by late subscribers"""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def notify(self):
+        # Wake everyone waiting on the current event, then arm a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait(self):
+        await self._changed.wait()
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls and streams by key"""
+
+    def __init__(self):
+        self._calls: Dict[Tuple, _Call] = {}
+        self._streams: Dict[Tuple, _Broadcast] = {}
+        self._lock = threading.Lock()
+        self._metrics = {
+            'calls': 0, 'shared_calls': 0,
+            'streams': 0, 'joined_streams': 0, 'cancelled': 0,
+        }
+
+    def _count(self, metric: str):
+        with self._lock:
+            self._metrics[metric] += 1
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run ``factory()`` once for all concurrent callers with the same key.
+
+        Returns (result, shared) where ``shared`` is True for callers that
+        joined work started by another caller. Exceptions are raised to
+        every caller.
+        """
+        flight_key = (asyncio.get_running_loop(), key)
+        call = self._calls.get(flight_key)
+        shared = call is not None
+        if call is None:
+            call = self._calls[flight_key] = _Call(asyncio.ensure_future(factory()))
+            call.task.add_done_callback(lambda task: self._forget(self._calls, flight_key, call))
+        self._count('shared_calls' if shared else 'calls')
+
+        call.waiters += 1
+        try:
+            # Shielded so one caller giving up does not cancel the others' result
+            return await asyncio.shield(call.task), shared
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+                self._forget(self._calls, flight_key, call)
+                self._count('cancelled')
+            raise
+        finally:
+            call.waiters -= 1
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """
+        Iterate the shared stream for a key, starting ``factory()`` if none is running.
+
+        Subscribers that join late receive every chunk from the beginning.
+        """
+        flight_key = (asyncio.get_running_loop(), key)
+        broadcast = self._streams.get(flight_key)
+        if broadcast is None:
+            broadcast = self._streams[flight_key] = _Broadcast()
+            broadcast.task = asyncio.ensure_future(self._produce(flight_key, broadcast, factory))
+            self._count('streams')
+        else:
+            self._count('joined_streams')
+
+        broadcast.subscribers += 1
+        position = 0
+        try:
+            while True:
+                while position < len(broadcast.chunks):
+                    yield broadcast.chunks[position]
+                    position += 1
+                if broadcast.done:
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+                await broadcast.wait()
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.done:
+                broadcast.task.cancel()
+                self._forget(self._streams, flight_key, broadcast)
+                self._count('cancelled')
+
+    async def _produce(self, flight_key: Tuple, broadcast: _Broadcast, factory: Callable[[], AsyncIterator[T]]):
+        generator = factory()
+        try:
+            async for chunk in generator:
+                broadcast.chunks.append(chunk)
+                broadcast.notify()
+        except asyncio.CancelledError:
+            broadcast.error = asyncio.CancelledError()
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            broadcast.done = True
+            broadcast.notify()
+            self._forget(self._streams, flight_key, broadcast)
+            aclose = getattr(generator, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+
+    @staticmethod
+    def _forget(table: Dict, flight_key: Tuple, entry: Any):
+        # A cancelled flight may already have been replaced by a new one under the same key
+        if table.get(flight_key) is entry:
+            del table[flight_key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing counters and the amount of work currently in flight"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics['in_flight_calls'] = len(self._calls)
+        metrics['in_flight_streams'] = len(self._streams)
+        started = metrics['calls'] + metrics['streams']
+        joined = metrics['shared_calls'] + metrics['joined_streams']
+        metrics['coalesced_rate'] = round(joined / (started + joined), 4) if started + joined else 0.0
+        return metrics
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Process-wide request coalescer"""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
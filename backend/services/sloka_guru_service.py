@@ -1,7 +1,11 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 from .simple_ai_service import SimpleAIService
 from backend.models.database import SpiritualSession, User, db
 from backend.models.slokas_database import get_daily_sloka
+from .sloka_relevance import get_relevance_engine
+
+# Relevant slokas quoted to the model for each question
+RELEVANT_SLOKAS = 3
 
 class SlokaGuruService:
     def __init__(self):
@@ -107,6 +111,26 @@ class SlokaGuruService:
             
         return "english"
 
+    def find_relevant_slokas(self, question: str, k: int = RELEVANT_SLOKAS, guru: str = None) -> List[Tuple[dict, float]]:
+        """The k slokas most relevant to a question as (sloka, score), best first."""
+        return get_relevance_engine().top_k(question, k, guru)
+    
+    def find_relevant_slokas_batch(self, questions: List[str], k: int = RELEVANT_SLOKAS,
+                                   guru: str = None) -> List[List[Tuple[dict, float]]]:
+        """Relevant slokas for many questions, scored together in one pass."""
+        return get_relevance_engine().top_k_batch(questions, k, guru)
+    
+    def _ground_prompt(self, question: str, relevant: List[Tuple[dict, float]]) -> str:
+        """Append the relevant verses to the question so the answer can quote them."""
+        if not relevant:
+            return question
+        verses = "\n\n".join(
+            f"[{sloka.get('source', 'Sacred Text')}]\n{sloka.get('sanskrit', '')}\n"
+            f"Translation: {sloka.get('translation', '')}"
+            for sloka, _score in relevant
+        )
+        return f"{question}\n\nRelevant sacred verses to draw on:\n{verses}"
+    
     def get_response(self, question: str, user_id: str = None, language: str = None) -> Dict[str, Any]:
         """Get a response from Sloka Guru for the given question."""
         try:
@@ -120,9 +144,13 @@ class SlokaGuruService:
                 daily_sloka = get_daily_sloka()
                 question = f"Please explain today's sacred verse:\n{daily_sloka['sanskrit']}\n\nQuestion: {question}"
             
+            # Ground the answer in the verses most relevant to the question
+            relevant = self.find_relevant_slokas(question)
+            prompt = self._ground_prompt(question, relevant)
+            
             # Get response from simple AI service with appropriate level and language
             ai_response = self.ai_service.get_response(
-                question, 
+                prompt, 
                 level=user_level, 
                 language=user_language,
                 context="sloka"
@@ -144,7 +172,11 @@ class SlokaGuruService:
                 "success": True,
                 "response": response,
                 "guru_name": self.name,
-                "specialization": self.specialization
+                "specialization": self.specialization,
+                "relevant_slokas": [
+                    {"id": sloka.get("id"), "source": sloka.get("source"), "score": round(score, 4)}
+                    for sloka, score in relevant
+                ]
             }
             
         except Exception as e:
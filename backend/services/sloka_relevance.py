@@ -0,0 +1,161 @@
+"""
+Sloka Relevance Engine
+======================
+
+Matches user questions to the slokas most relevant to them. The corpus is
+vectorized once per database version with TF-IDF (scikit-learn), and a
+batch of questions is scored against every sloka with a single sparse
+matrix product, keeping the top k per question.
+
+Without NumPy/scikit-learn the engine falls back to the BM25 search index
+of the slokas database.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+except ImportError:
+    np = None
+    TfidfVectorizer = None
+
+from backend.models.slokas_database import sloka_db
+from backend.models.sloka_search import tokenize
+
+# Text fields vectorized per sloka, with how many times each is repeated (a simple field weight)
+RELEVANCE_FIELDS = {
+    "translation": 2,
+    "meaning": 2,
+    "related_concepts": 2,
+    "daily_application": 1,
+    "transliteration": 1,
+}
+
+# Matches scoring below this cosine similarity are not considered relevant
+MIN_RELEVANCE_SCORE = 0.05
+
+# Questions scored per matrix product in batch calls (bounds the dense score block)
+BATCH_BLOCK_SIZE = 256
+
+
+def _sloka_text(sloka: Dict[str, Any]) -> str:
+    parts = []
+    for field, weight in RELEVANCE_FIELDS.items():
+        value = sloka.get(field) or ""
+        if isinstance(value, list):
+            value = " ".join(value)
+        parts.extend([value] * weight)
+    return " ".join(parts)
+
+
+class SlokaRelevanceEngine:
+    """TF-IDF relevance over one snapshot of the slokas corpus"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.version = snapshot.version
+        self._guru_masks: Dict[str, Any] = {}
+
+        if TfidfVectorizer is None:
+            self._vectorizer = None
+            self._matrix = None
+            return
+
+        # Same folding, stopwords and stemming as the search index
+        self._vectorizer = TfidfVectorizer(analyzer=tokenize, sublinear_tf=True, dtype=np.float32)
+        # Rows are L2-normalized, so the product with a query vector is cosine similarity
+        self._matrix = self._vectorizer.fit_transform(_sloka_text(sloka) for sloka in snapshot.slokas).T.tocsr()
+
+    @property
+    def vectorized(self) -> bool:
+        """True when scoring uses the TF-IDF matrix rather than the BM25 fallback"""
+        return self._matrix is not None
+
+    def _guru_mask(self, guru: str):
+        positions = self.snapshot.guru_positions(guru)
+        if positions is None:
+            # Only the corpus's own gurus are cached, so callers cannot grow the cache
+            return np.zeros(self.snapshot.total_slokas, dtype=bool)
+        mask = self._guru_masks.get(guru)
+        if mask is None:
+            mask = np.zeros(self.snapshot.total_slokas, dtype=bool)
+            mask[positions] = True
+            self._guru_masks[guru] = mask
+        return mask
+
+    def top_k(self, question: str, k: int = 3, guru: Optional[str] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """The k slokas most relevant to a question as (sloka, score), best first"""
+        return self.top_k_batch([question], k, guru)[0]
+
+    def top_k_batch(self, questions: Sequence[str], k: int = 3,
+                    guru: Optional[str] = None) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """
+        Score many questions at once.
+
+        Args:
+            questions: Question texts
+            k: Matches to keep per question
+            guru: Only consider slokas assigned to this guru
+
+        Returns:
+            One list of (sloka, score) pairs per question, best first
+        """
+        if not self.vectorized:
+            return [self._fallback_top_k(question, k, guru) for question in questions]
+
+        slokas = self.snapshot.slokas
+        results = []
+        for start in range(0, len(questions), BATCH_BLOCK_SIZE):
+            block = questions[start:start + BATCH_BLOCK_SIZE]
+            scores = (self._vectorizer.transform(block) @ self._matrix).toarray()
+            if guru:
+                scores[:, ~self._guru_mask(guru)] = 0.0
+
+            for row in scores:
+                if k < row.size:
+                    candidates = np.argpartition(-row, k)[:k]
+                else:
+                    candidates = np.arange(row.size)
+                # Best score first, ties in corpus order
+                candidates = candidates[np.lexsort((candidates, -row[candidates]))]
+                results.append([
+                    (slokas[position], float(row[position]))
+                    for position in candidates.tolist()
+                    if row[position] >= MIN_RELEVANCE_SCORE
+                ])
+        return results
+
+    def _fallback_top_k(self, question: str, k: int, guru: Optional[str]) -> List[Tuple[Dict[str, Any], float]]:
+        """BM25 matches on any question term, used when scikit-learn is unavailable"""
+        # Over-fetch when filtering by guru, since the filter runs after ranking
+        limit = k if not guru else k * 10
+        matches = self.snapshot._search_index.search(question, mode="or", limit=limit)
+        slokas = self.snapshot.slokas
+        results = []
+        for position, score in matches:
+            sloka = slokas[position]
+            if guru and sloka.get("guru_assignment") != guru:
+                continue
+            results.append((sloka, score))
+            if len(results) == k:
+                break
+        return results
+
+
+_engine: Optional[SlokaRelevanceEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_relevance_engine() -> SlokaRelevanceEngine:
+    """The engine for the current database version, rebuilt after a reload"""
+    global _engine
+    snapshot = sloka_db.snapshot
+    engine = _engine
+    if engine is None or engine.version != snapshot.version:
+        with _engine_lock:
+            if _engine is None or _engine.version != snapshot.version:
+                _engine = SlokaRelevanceEngine(snapshot)
+            engine = _engine
+    return engine
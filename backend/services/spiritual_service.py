@@ -1,5 +1,6 @@
 import json
 import random
+import hashlib
 from datetime import datetime
 from typing import Dict, List, Any
 
@@ -80,7 +81,6 @@ Practical Spiritual Practices:
 {key_reminder}
 """
         }
-    def __init__(self):
         self.slokas_database = self._load_slokas()
         self.meditation_tracks = self._load_meditation_tracks()
     
@@ -125,12 +125,14 @@ Practical Spiritual Practices:
         ]
     
     def get_daily_sloka(self) -> Dict[str, Any]:
-        """Get today's sloka"""
-        sloka = random.choice(self.slokas_database)
+        """Get today's sloka (the same for every request on a given date)"""
+        today = datetime.now().strftime("%Y-%m-%d")
+        seed = hashlib.sha256(today.encode()).digest()
+        sloka = self.slokas_database[int.from_bytes(seed[:8], "big") % len(self.slokas_database)]
         return {
             "success": True,
             "sloka": sloka,
-            "date": datetime.now().strftime("%Y-%m-%d")
+            "date": today
         }
     
     def get_meditation_by_type(self, meditation_type: str) -> Dict[str, Any]:
@@ -241,3 +243,22 @@ Practical Spiritual Practices:
             spiritual_practices="\n".join(practices),
             key_reminder=random.choice(reminders)
         )
+
+    def _generate_general_wisdom(self, question):
+        paths = "\n".join(f"• {path}" for path in self.core_teachings["mukti_paths"])
+        sloka = self.get_daily_sloka()["sloka"]
+        soul = self.core_teachings["soul_body"]["soul"]
+        return f"""
+🕉️ Spiritual Reflection:
+
+Your question "{question.strip()}" is itself a step on the path. Sit with it quietly before seeking an answer.
+
+The timeless paths that lead inward:
+{paths}
+
+Today's sloka ({sloka['chapter']}):
+{sloka['transliteration']}
+"{sloka['translation']}"
+
+🙏 Remember: you are the soul, {soul[0].lower() + soul[1:]}.
+"""
@@ -0,0 +1,203 @@
+"""
+Transcription Cache
+===================
+
+Whisper results keyed by what the audio contains rather than what the
+upload is called, so a recording that is uploaded again (a popular chant,
+a recurring dharma talk) is answered from disk instead of re-transcribed:
+
+    key = transcription_cache_key(audio_sha256(path), model_size, language, word_timestamps)
+    result = cache.get(key)
+    if result is None:
+        result = ...run Whisper...
+        cache.set(key, result)
+
+The audio is hashed in fixed-size blocks, so a long recording is never
+read into memory at once. The key also covers everything else that
+changes Whisper's output (model size, language, word timestamps); content
+processing is cheap and runs on every request, so one cached result
+serves every content type.
+
+Entries are JSON files shared by all worker processes on the host. The
+directory is kept under TRANSCRIPTION_CACHE_MAX_BYTES by deleting the
+least recently used entries; a hit refreshes its entry's mtime.
+
+Configuration (environment):
+    TRANSCRIPTION_CACHE_ENABLED     "false" disables caching (default true)
+    TRANSCRIPTION_CACHE_DIR         cache directory (default instance/transcription_cache)
+    TRANSCRIPTION_CACHE_MAX_BYTES   disk budget for cached results (default 256 MiB)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+TRANSCRIPTION_CACHE_ENABLED = os.environ.get('TRANSCRIPTION_CACHE_ENABLED', 'true').lower() != 'false'
+TRANSCRIPTION_CACHE_DIR = os.environ.get('TRANSCRIPTION_CACHE_DIR', 'instance/transcription_cache')
+TRANSCRIPTION_CACHE_MAX_BYTES = int(os.environ.get('TRANSCRIPTION_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# Bump when the cached result format changes, so old entries are never served
+CACHE_VERSION = 1
+
+# Bytes read at a time while hashing audio
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Eviction trims the cache to this fraction of its budget, so it does not run on every write
+EVICTION_TARGET = 0.9
+
+
+def audio_sha256(path: str, block_size: int = HASH_BLOCK_SIZE) -> str:
+    """SHA-256 of a file's contents, read block by block"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def transcription_cache_key(content_hash: str, model_size: str, language: Optional[str],
+                            word_timestamps: bool) -> str:
+    """Stable key for a Whisper run over some audio"""
+    payload = json.dumps({
+        'version': CACHE_VERSION,
+        'audio': content_hash,
+        'model': model_size,
+        'language': language,
+        'word_timestamps': bool(word_timestamps),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TranscriptionCache:
+    """On-disk LRU of Whisper results bounded by total size, with hit/miss counters"""
+
+    def __init__(self, directory: str = TRANSCRIPTION_CACHE_DIR, max_bytes: int = TRANSCRIPTION_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # This process's view of the directory size; other processes' writes are found when evicting
+        self._size = sum(size for _, _, size in self._entries())
+        self._metrics = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0, 'errors': 0}
+
+    def _count(self, metric: str, amount: int = 1):
+        with self._lock:
+            self._metrics[metric] += amount
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _entries(self) -> List[Tuple[float, str, int]]:
+        """(mtime, path, size) of every cached entry"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # evicted by another process
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached Whisper result for a key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Unreadable transcription cache entry {key}: {e}")
+            self._count('errors')
+            self._count('misses')
+            return None
+        self._count('hits')
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a JSON-serializable Whisper result, evicting old entries beyond the size budget"""
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written aside and renamed, so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(f"Could not cache transcription {key}: {e}")
+            self._count('errors')
+            return
+        with self._lock:
+            self._metrics['sets'] += 1
+            self._size += size
+            over_budget = self._size > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache is back under budget"""
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        evicted = 0
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICTION_TARGET
+            for _, path, size in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    evicted += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+        with self._lock:
+            self._size = total
+            self._metrics['evictions'] += evicted
+
+    def clear(self):
+        for _, path, _ in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, hit rate and disk use"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['bytes'] = self._size
+        lookups = metrics['hits'] + metrics['misses']
+        metrics['hit_rate'] = round(metrics['hits'] / lookups, 4) if lookups else 0.0
+        metrics['max_bytes'] = self.max_bytes
+        metrics['directory'] = self.directory
+        return metrics
+
+
+_cache: Optional[TranscriptionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_transcription_cache() -> Optional[TranscriptionCache]:
+    """Process-wide transcription cache, or None when TRANSCRIPTION_CACHE_ENABLED is false"""
+    global _cache
+    if not TRANSCRIPTION_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TranscriptionCache()
+    return _cache
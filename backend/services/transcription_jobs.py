@@ -0,0 +1,579 @@
+"""
+Transcription Jobs
+==================
+
+Background transcription so an upload never holds a web worker for the
+length of a Whisper run. The endpoint stores the upload, submits a job and
+returns its id at once; the job runs on a bounded pool of worker threads:
+
+    job = get_transcription_jobs().submit(audio_path, filename, file_size, options)
+    get_transcription_jobs().get(job['id'])           # status and progress
+    async for job in get_transcription_jobs().events(job_id):
+        ...                                            # every change until it finishes
+
+Job state lives in SQLite, so it is shared by all worker processes on the
+host and survives restarts. Workers claim queued jobs with a lease that
+they renew while a job runs; a job whose worker died is queued again
+when its lease expires. Failed attempts are retried with a growing delay
+up to TRANSCRIPTION_MAX_ATTEMPTS, except for errors a retry cannot fix
+(missing file, unsupported format). A queued job is cancelled at once; a
+running one stops at its next progress report, or mid-inference when the
+runner polls ``cancelled``, and its result is dropped.
+
+Jobs submitted with ``stream`` publish partial results while they run:
+each transcribed segment, and a snapshot of the content analysis that
+replaces the previous one. ``stream()`` follows them together with the
+job's state, resuming after a sequence number:
+
+    async for kind, data, seq in get_transcription_jobs().stream(job_id, after=last_seq):
+        ...                                            # 'segment', 'analysis', 'job' or 'reset'
+
+    queued -> running -> succeeded
+                      -> failed      (after the last attempt)
+                      -> queued      (retry)
+    queued / running  -> cancelled
+
+Configuration (environment):
+    TRANSCRIPTION_JOBS_DB        SQLite file (default instance/transcription_jobs.db)
+    TRANSCRIPTION_WORKERS        concurrent jobs per process (default 1)
+    TRANSCRIPTION_MAX_PENDING    queued jobs before submissions are refused (default 50)
+    TRANSCRIPTION_MAX_ATTEMPTS   attempts per job (default 3)
+    TRANSCRIPTION_RETRY_DELAY    seconds before a retry, times the attempt number (default 10)
+    TRANSCRIPTION_LEASE_SECONDS  lease of a running job, renewed while it runs (default 60)
+    TRANSCRIPTION_JOB_TTL        seconds finished jobs are kept (default 7 days)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+TRANSCRIPTION_JOBS_DB = os.environ.get('TRANSCRIPTION_JOBS_DB', 'instance/transcription_jobs.db')
+TRANSCRIPTION_WORKERS = int(os.environ.get('TRANSCRIPTION_WORKERS', '1'))
+TRANSCRIPTION_MAX_PENDING = int(os.environ.get('TRANSCRIPTION_MAX_PENDING', '50'))
+TRANSCRIPTION_MAX_ATTEMPTS = int(os.environ.get('TRANSCRIPTION_MAX_ATTEMPTS', '3'))
+TRANSCRIPTION_RETRY_DELAY = float(os.environ.get('TRANSCRIPTION_RETRY_DELAY', '10'))
+TRANSCRIPTION_LEASE_SECONDS = float(os.environ.get('TRANSCRIPTION_LEASE_SECONDS', '60'))
+TRANSCRIPTION_JOB_TTL = float(os.environ.get('TRANSCRIPTION_JOB_TTL', str(7 * 86400)))
+
+# Seconds an idle worker waits before looking for jobs submitted by other processes
+POLL_INTERVAL = 1.0
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = 'queued', 'running', 'succeeded', 'failed', 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Partial results where only the latest one matters (each is a snapshot, not an increment)
+SNAPSHOT_PARTIALS = {'analysis'}
+
+# Errors a retry cannot fix
+PERMANENT_ERRORS = {'FileNotFoundError', 'ValueError', 'JobCancelledError', 'InferenceCancelledError'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcription_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    audio_path TEXT NOT NULL,
+    filename TEXT,
+    file_size INTEGER,
+    options TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    stage TEXT,
+    result TEXT,
+    error TEXT,
+    error_type TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    available_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcription_jobs_queue ON transcription_jobs (status, available_at);
+CREATE TABLE IF NOT EXISTS transcription_job_partials (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcription_job_partials_job ON transcription_job_partials (job_id, seq);
+"""
+
+
+class JobQueueFullError(Exception):
+    """Too many jobs are waiting; the submission was refused"""
+
+    def __init__(self, pending: int, retry_after: float):
+        super().__init__(f"{pending} transcription jobs are already waiting")
+        self.pending = pending
+        self.retry_after = retry_after
+
+
+class JobCancelledError(Exception):
+    """Raised inside a running job when its cancellation was requested"""
+
+
+class JobStore:
+    """Transcription jobs in SQLite; one connection per thread"""
+
+    def __init__(self, path: str = TRANSCRIPTION_JOBS_DB):
+        self.path = path
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job['options'] = json.loads(job['options'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    def create(self, audio_path: str, filename: str, file_size: int, options: Dict[str, Any],
+               max_attempts: int, max_pending: Optional[int] = None) -> Dict[str, Any]:
+        """Insert a queued job; raises JobQueueFullError when ``max_pending`` jobs are already queued"""
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if max_pending is not None:
+                pending = conn.execute(
+                    'SELECT COUNT(*) FROM transcription_jobs WHERE status = ?', (QUEUED,)
+                ).fetchone()[0]
+                if pending >= max_pending:
+                    raise JobQueueFullError(pending, TRANSCRIPTION_RETRY_DELAY)
+            conn.execute(
+                'INSERT INTO transcription_jobs (id, status, audio_path, filename, file_size, options, '
+                'max_attempts, stage, available_at, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, QUEUED, audio_path, filename, file_size, json.dumps(options),
+                 max_attempts, QUEUED, now, now, now)
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._row(self._conn().execute(
+            'SELECT * FROM transcription_jobs WHERE id = ?', (job_id,)
+        ).fetchone())
+
+    def claim(self, worker: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """Take the oldest runnable job for ``worker``, first re-queueing jobs whose worker was lost"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                "UPDATE transcription_jobs SET status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END, "
+                "error = CASE WHEN attempts >= max_attempts THEN 'Transcription worker stopped responding' ELSE error END, "
+                "error_type = CASE WHEN attempts >= max_attempts THEN 'WorkerLostError' ELSE error_type END, "
+                "finished_at = CASE WHEN attempts >= max_attempts THEN ? ELSE finished_at END, "
+                "stage = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END, "
+                "worker = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_expires < ?",
+                (FAILED, QUEUED, now, FAILED, QUEUED, now, RUNNING, now)
+            )
+            row = conn.execute(
+                'SELECT id FROM transcription_jobs WHERE status = ? AND available_at <= ? '
+                'ORDER BY created_at LIMIT 1', (QUEUED, now)
+            ).fetchone()
+            if row is not None:
+                # A new attempt starts its partial results over
+                conn.execute('DELETE FROM transcription_job_partials WHERE job_id = ?', (row['id'],))
+                conn.execute(
+                    'UPDATE transcription_jobs SET status = ?, worker = ?, lease_expires = ?, '
+                    'attempts = attempts + 1, progress = 0, stage = ?, '
+                    'started_at = COALESCE(started_at, ?), updated_at = ? WHERE id = ?',
+                    (RUNNING, worker, now + lease_seconds, 'starting', now, now, row['id'])
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return self.get(row['id']) if row is not None else None
+
+    def update(self, job_id: str, owner: Optional[str] = None, **fields) -> bool:
+        """
+        Set fields of a job. With ``owner``, only while that worker still holds
+        the running job (a worker whose lease expired must not overwrite it).
+        """
+        if 'result' in fields and fields['result'] is not None:
+            fields['result'] = json.dumps(fields['result'])
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        query = f'UPDATE transcription_jobs SET {assignments} WHERE id = ?'
+        params = list(fields.values()) + [job_id]
+        if owner is not None:
+            query += ' AND worker = ? AND status = ?'
+            params += [owner, RUNNING]
+        return self._conn().execute(query, params).rowcount == 1
+
+    def publish(self, job_id: str, owner: str, kind: str, data: Dict[str, Any]) -> bool:
+        """Record a partial result while ``owner`` holds the running job; a snapshot replaces the previous one"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            running = conn.execute(
+                'SELECT 1 FROM transcription_jobs WHERE id = ? AND worker = ? AND status = ?', (job_id, owner, RUNNING)
+            ).fetchone() is not None
+            if running:
+                if kind in SNAPSHOT_PARTIALS:
+                    conn.execute('DELETE FROM transcription_job_partials WHERE job_id = ? AND kind = ?', (job_id, kind))
+                conn.execute(
+                    'INSERT INTO transcription_job_partials (job_id, kind, data) VALUES (?, ?, ?)',
+                    (job_id, kind, json.dumps(data, ensure_ascii=False))
+                )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return running
+
+    def partials(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        """Partial results of a job published after sequence number ``after``, oldest first"""
+        rows = self._conn().execute(
+            'SELECT seq, kind, data FROM transcription_job_partials WHERE job_id = ? AND seq > ? ORDER BY seq',
+            (job_id, after)
+        )
+        return [{'seq': row['seq'], 'kind': row['kind'], 'data': json.loads(row['data'])} for row in rows]
+
+    def renew(self, job_ids: List[str], worker: str, lease_seconds: float):
+        """Extend the leases of jobs a worker is running"""
+        expires = time.time() + lease_seconds
+        self._conn().executemany(
+            'UPDATE transcription_jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = ?',
+            [(expires, job_id, worker, RUNNING) for job_id in job_ids]
+        )
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job, or flag a running one for its worker"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            'UPDATE transcription_jobs SET status = ?, stage = ?, finished_at = ?, updated_at = ? '
+            'WHERE id = ? AND status = ?', (CANCELLED, CANCELLED, now, now, job_id, QUEUED)
+        )
+        conn.execute(
+            'UPDATE transcription_jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = ?',
+            (now, job_id, RUNNING)
+        )
+        return self.get(job_id)
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute('SELECT status, COUNT(*) FROM transcription_jobs GROUP BY status')
+        return {status: count for status, count in rows}
+
+    def purge(self, finished_before: float) -> List[str]:
+        """Delete jobs finished before the given time; returns their audio paths"""
+        conn = self._conn()
+        placeholders = ', '.join('?' * len(FINISHED))
+        rows = conn.execute(
+            f'SELECT audio_path FROM transcription_jobs WHERE status IN ({placeholders}) AND finished_at < ?',
+            (*FINISHED, finished_before)
+        ).fetchall()
+        conn.execute(
+            f'DELETE FROM transcription_jobs WHERE status IN ({placeholders}) AND finished_at < ?',
+            (*FINISHED, finished_before)
+        )
+        conn.execute('DELETE FROM transcription_job_partials WHERE job_id NOT IN (SELECT id FROM transcription_jobs)')
+        return [row['audio_path'] for row in rows]
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp else None
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job fields returned to clients (the result is fetched separately)"""
+    return {
+        'id': job['id'],
+        'status': job['status'],
+        'progress': round(job['progress'], 3),
+        'stage': job['stage'],
+        'attempts': job['attempts'],
+        'max_attempts': job['max_attempts'],
+        'filename': job['filename'],
+        'options': job['options'],
+        'error': job['error'],
+        'error_type': job['error_type'],
+        'cancel_requested': job['cancel_requested'],
+        'created_at': _isoformat(job['created_at']),
+        'started_at': _isoformat(job['started_at']),
+        'finished_at': _isoformat(job['finished_at']),
+    }
+
+
+def transcribe_job(job: Dict[str, Any], progress: Callable[[float, str], None],
+                   cancelled: Callable[[], bool], publish: Callable[[str, Dict[str, Any]], None]) -> Dict[str, Any]:
+    """Default job runner: the process's Whisper service on the worker's event loop"""
+    from services.whisper_service import get_whisper_service
+    from utils.async_bridge import run_async
+
+    options = job['options']
+    return run_async(get_whisper_service().transcribe_audio(
+        job['audio_path'],
+        content_type=options.get('content_type', 'general'),
+        language=options.get('language'),
+        include_timestamps=options.get('include_timestamps', True),
+        progress=progress,
+        cancelled=cancelled,
+        partial=publish if options.get('stream') else None
+    ))
+
+
+class TranscriptionJobQueue:
+    """Bounded pool of worker threads running jobs from a JobStore"""
+
+    def __init__(self, store: JobStore, runner: Callable[..., Dict[str, Any]] = transcribe_job,
+                 workers: int = TRANSCRIPTION_WORKERS, max_pending: int = TRANSCRIPTION_MAX_PENDING,
+                 max_attempts: int = TRANSCRIPTION_MAX_ATTEMPTS, retry_delay: float = TRANSCRIPTION_RETRY_DELAY,
+                 lease_seconds: float = TRANSCRIPTION_LEASE_SECONDS, job_ttl: float = TRANSCRIPTION_JOB_TTL,
+                 poll_interval: float = POLL_INTERVAL):
+        self.store = store
+        self.runner = runner
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease_seconds = lease_seconds
+        self.job_ttl = job_ttl
+        self.poll_interval = poll_interval
+        self.worker_id = None
+        self._running: Dict[str, str] = {}  # job id -> thread name
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._metrics = {'submitted': 0, 'succeeded': 0, 'failed': 0, 'retried': 0, 'cancelled': 0}
+
+    def start(self):
+        """Start the worker threads (again after a fork)"""
+        if self._pid == os.getpid() and not self._stopping.is_set():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and not self._stopping.is_set():
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self.worker_id = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:6]}"
+            self._running = {}
+            self._threads = [
+                threading.Thread(target=self._work, name=f"transcription-worker-{index}", daemon=True)
+                for index in range(self.workers)
+            ]
+            self._threads.append(threading.Thread(target=self._keep_leases, name="transcription-leases", daemon=True))
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def submit(self, audio_path: str, filename: str, file_size: int, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a job for an uploaded file, which the job owns from now on"""
+        job = self.store.create(audio_path, filename, file_size, options, self.max_attempts, self.max_pending)
+        self._count('submitted')
+        with self._wakeup:
+            self._wakeup.notify()
+        return public_job(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.get(job_id)
+        return public_job(job) if job is not None else None
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The full job, including its result once it succeeded"""
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.cancel(job_id)
+        if job is None:
+            return None
+        if job['status'] == CANCELLED:
+            self._discard_audio(job)
+        return public_job(job)
+
+    async def events(self, job_id: str, interval: float = 0.5) -> AsyncIterator[Dict[str, Any]]:
+        """The job's state each time its status, stage or progress changes, until it finishes"""
+        async for kind, data, _ in self.stream(job_id, interval=interval):
+            if kind == 'job':
+                yield data
+
+    async def stream(self, job_id: str, after: int = 0,
+                     interval: float = 0.5) -> AsyncIterator[Tuple[str, Dict[str, Any], Optional[int]]]:
+        """
+        (kind, data, seq) until the job finishes: its partial results published
+        after ``after`` (``segment``, ``analysis``) with their sequence numbers,
+        and ``job`` states (seq None) as in ``events``. A ``reset`` tells the
+        reader that a retry discarded the partial results it has seen.
+        """
+        last = None
+        attempts = None
+        seen_partials = False
+        while True:
+            job = self.store.get(job_id)
+            if job is None:
+                return
+            if seen_partials and job['attempts'] != attempts:
+                seen_partials = False
+                yield 'reset', {'attempt': job['attempts']}, None
+            attempts = job['attempts']
+            for partial in self.store.partials(job_id, after):
+                after = partial['seq']
+                seen_partials = True
+                yield partial['kind'], partial['data'], partial['seq']
+            state = (job['status'], job['stage'], round(job['progress'], 3), job['attempts'], job['cancel_requested'])
+            if state != last:
+                last = state
+                yield 'job', public_job(job), None
+            if job['status'] in FINISHED:
+                return
+            await asyncio.sleep(interval)
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                job = self.store.claim(self.worker_id, self.lease_seconds)
+            except sqlite3.Error as e:
+                logging.error(f"Transcription job claim failed: {e}")
+                job = None
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+            self._running[job['id']] = threading.current_thread().name
+            try:
+                self._run(job)
+            except Exception as e:
+                # The lease lapses and the job is picked up again
+                logging.error(f"Transcription job {job['id']} could not be recorded: {e}")
+            finally:
+                self._running.pop(job['id'], None)
+
+    def _run(self, job: Dict[str, Any]):
+        job_id = job['id']
+
+        def progress(fraction: float, stage: str):
+            # Progress reports double as cancellation points
+            if self.store.get(job_id)['cancel_requested']:
+                raise JobCancelledError(job_id)
+            self.store.update(job_id, self.worker_id, progress=min(max(fraction, 0.0), 1.0), stage=stage)
+
+        def cancelled() -> bool:
+            # Polled during inference, which stops the worker process running it
+            return self.store.get(job_id)['cancel_requested']
+
+        def publish(kind: str, data: Dict[str, Any]):
+            self.store.publish(job_id, self.worker_id, kind, data)
+
+        try:
+            if job['cancel_requested']:
+                raise JobCancelledError(job_id)
+            result = self.runner(job, progress, cancelled, publish)
+            error, error_type = (None, None) if result.get('success') else (result.get('error'), result.get('error_type'))
+        except Exception as e:
+            result, error, error_type = None, str(e), type(e).__name__
+
+        now = time.time()
+        if error_type == 'JobCancelledError' or self.store.get(job_id)['cancel_requested']:
+            self.store.update(job_id, self.worker_id, status=CANCELLED, stage=CANCELLED, finished_at=now)
+            self._count('cancelled')
+        elif error is None:
+            self.store.update(job_id, self.worker_id, status=SUCCEEDED, stage=SUCCEEDED, progress=1.0,
+                              result=result, error=None, error_type=None, finished_at=now)
+            self._count('succeeded')
+        elif error_type not in PERMANENT_ERRORS and job['attempts'] < job['max_attempts']:
+            self.store.update(job_id, self.worker_id, status=QUEUED, stage='retrying', worker=None,
+                              error=error, error_type=error_type,
+                              available_at=now + self.retry_delay * job['attempts'])
+            self._count('retried')
+            return
+        else:
+            self.store.update(job_id, self.worker_id, status=FAILED, stage=FAILED,
+                              error=error, error_type=error_type, finished_at=now)
+            self._count('failed')
+        self._discard_audio(job)
+
+    def _keep_leases(self):
+        last_purge = 0.0
+        while not self._stopping.wait(self.lease_seconds / 3):
+            try:
+                if self._running:
+                    self.store.renew(list(self._running), self.worker_id, self.lease_seconds)
+                if time.time() - last_purge > 3600:
+                    last_purge = time.time()
+                    for audio_path in self.store.purge(last_purge - self.job_ttl):
+                        self._remove(audio_path)
+            except sqlite3.Error as e:
+                logging.error(f"Transcription job maintenance failed: {e}")
+
+    def _discard_audio(self, job: Dict[str, Any]):
+        self._remove(job['audio_path'])
+
+    @staticmethod
+    def _remove(audio_path: str):
+        try:
+            os.unlink(audio_path)
+        except OSError:
+            pass
+
+    def _count(self, metric: str):
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Jobs by status (all processes) and this process's counters and pool"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics['jobs'] = self.store.counts()
+        metrics['workers'] = self.workers
+        metrics['running_here'] = len(self._running)
+        metrics['max_pending'] = self.max_pending
+        return metrics
+
+
+_jobs: Optional[TranscriptionJobQueue] = None
+_jobs_lock = threading.Lock()
+
+
+def get_transcription_jobs() -> TranscriptionJobQueue:
+    """Process-wide transcription job queue; its workers pick up jobs left queued by earlier runs"""
+    global _jobs
+    if _jobs is None:
+        with _jobs_lock:
+            if _jobs is None:
+                _jobs = TranscriptionJobQueue(JobStore())
+    _jobs.start()
+    return _jobs
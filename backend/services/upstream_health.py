@@ -0,0 +1,277 @@
+"""
+Upstream Health
+===============
+
+Per-model circuit breakers, latency tracking and hedged requests for
+model calls, so an upstream brown-out costs a fast fallback instead of a
+worker held for the full request timeout.
+
+Circuit breaker (one per model):
+    closed     calls flow; CIRCUIT_FAILURE_THRESHOLD consecutive upstream
+               failures (timeouts, connection errors, 5xx) open the circuit
+    open       calls fail immediately with CircuitOpenError for
+               CIRCUIT_RESET_TIMEOUT seconds
+    half-open  up to CIRCUIT_HALF_OPEN_PROBES calls probe the upstream; a
+               success closes the circuit, a failure opens it again
+Client errors (4xx), cancellations and load shedding do not count.
+Breakers also keep the error rate of recent calls, which the provider
+router uses to rank providers.
+
+    with get_circuit_breaker(model).attempt() as attempt:
+        ...                      # acquire a slot, then
+        attempt.start()          # latency is measured from here
+        response = await client.chat.completions.create(...)
+
+Hedged requests (optional, HEDGE_REQUESTS=true): if a call has not
+finished after the model's observed p95 latency (at least HEDGE_MIN_DELAY
+seconds), a second identical call is sent and whichever succeeds first
+wins; the other is cancelled.
+
+Configuration (environment):
+    CIRCUIT_FAILURE_THRESHOLD   consecutive failures that open a circuit (default 5)
+    CIRCUIT_RESET_TIMEOUT       seconds a circuit stays open before probing (default 30)
+    CIRCUIT_HALF_OPEN_PROBES    concurrent probe calls when half-open (default 1)
+    HEDGE_REQUESTS              "true" enables hedged completions (default false)
+    HEDGE_MIN_DELAY             lower bound for the hedge delay in seconds (default 1.0)
+    HEDGE_MIN_SAMPLES           latencies needed before hedging starts (default 20)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+T = TypeVar('T')
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '5'))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_RESET_TIMEOUT', '30'))
+CIRCUIT_HALF_OPEN_PROBES = int(os.environ.get('CIRCUIT_HALF_OPEN_PROBES', '1'))
+HEDGE_REQUESTS = os.environ.get('HEDGE_REQUESTS', 'false').lower() == 'true'
+HEDGE_MIN_DELAY = float(os.environ.get('HEDGE_MIN_DELAY', '1.0'))
+HEDGE_MIN_SAMPLES = int(os.environ.get('HEDGE_MIN_SAMPLES', '20'))
+
+# Successful call latencies kept per model for percentiles
+LATENCY_WINDOW = 200
+
+# Recent success/failure outcomes kept per model for the error rate
+OUTCOME_WINDOW = 100
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """The model's circuit is open; the call was not sent"""
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"{model} is unavailable (circuit open), retry in {retry_after:.0f}s")
+        self.model = model
+        self.retry_after = retry_after
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Whether an error means the upstream is unhealthy (timeout, connection error or 5xx)"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return True
+    if openai is not None and isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    # openai.APIStatusError and providers.ProviderHTTPError
+    status_code = getattr(error, 'status_code', None)
+    return isinstance(status_code, int) and status_code >= 500
+
+
+class _Attempt:
+    """One guarded call; classifies its outcome for the breaker on exit"""
+
+    def __init__(self, breaker: 'CircuitBreaker'):
+        self.breaker = breaker
+        self.started = time.monotonic()
+
+    def start(self):
+        """Restart the latency clock (e.g. after waiting for a scheduler slot)"""
+        self.started = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is None:
+            self.breaker.record_success(time.monotonic() - self.started)
+        elif is_upstream_failure(exc):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_neutral()
+        return False
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker with a window of recent latencies"""
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT, half_open_probes: int = CIRCUIT_HALF_OPEN_PROBES):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self._outcomes: deque = deque(maxlen=OUTCOME_WINDOW)  # True for a failure
+        self._lock = threading.Lock()
+        self._metrics = {
+            'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0,
+            'hedges_sent': 0, 'hedges_won': 0,
+        }
+
+    def attempt(self) -> _Attempt:
+        """Guard one call; raises CircuitOpenError when the call may not be sent"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state, self._probes = HALF_OPEN, 0
+            if self.state == OPEN or (self.state == HALF_OPEN and self._probes >= self.half_open_probes):
+                self._metrics['rejected'] += 1
+                raise CircuitOpenError(self.name, self.retry_after())
+            if self.state == HALF_OPEN:
+                self._probes += 1
+        return _Attempt(self)
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit allows probe calls again"""
+        return max(self._opened_at + self.reset_timeout - time.monotonic(), 0.0) if self.state != CLOSED else 0.0
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._metrics['successes'] += 1
+            self._latencies.append(latency)
+            self._outcomes.append(False)
+            self._consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._metrics['failures'] += 1
+            self._outcomes.append(True)
+            self._consecutive_failures += 1
+            if self.state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self._metrics['opened'] += 1
+                self.state, self._opened_at = OPEN, time.monotonic()
+
+    def record_neutral(self):
+        """An outcome that says nothing about upstream health; frees a probe slot"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def count(self, metric: str):
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency percentile in seconds over the recent window, or None without samples"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(int(fraction * len(samples)), len(samples) - 1)]
+
+    def error_rate(self) -> Optional[float]:
+        """Share of upstream failures among recent calls, or None without samples"""
+        with self._lock:
+            outcomes = list(self._outcomes)
+        return sum(outcomes) / len(outcomes) if outcomes else None
+
+    def samples(self) -> int:
+        """Number of recent calls behind the error rate"""
+        return len(self._outcomes)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while hedging is not warranted"""
+        if self.state != CLOSED or len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(self.percentile(0.95), HEDGE_MIN_DELAY)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['state'] = self.state
+            metrics['consecutive_failures'] = self._consecutive_failures
+        metrics['retry_after'] = round(self.retry_after(), 1)
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        metrics['p50_ms'] = round(p50 * 1000, 1) if p50 is not None else None
+        metrics['p95_ms'] = round(p95 * 1000, 1) if p95 is not None else None
+        error_rate = self.error_rate()
+        metrics['error_rate'] = round(error_rate, 4) if error_rate is not None else None
+        return metrics
+
+
+async def hedged(factory: Callable[[], Awaitable[T]], delay: Optional[float],
+                 breaker: Optional[CircuitBreaker] = None) -> T:
+    """
+    Await ``factory()``; if it is still running after ``delay`` seconds, start a
+    second call and return whichever succeeds first. The loser is cancelled.
+    """
+    if delay is None:
+        return await factory()
+
+    first = asyncio.ensure_future(factory())
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return first.result()
+
+        second = asyncio.ensure_future(factory())
+        tasks.add(second)
+        if breaker is not None:
+            breaker.count('hedges_sent')
+
+        error = None
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second and breaker is not None:
+                        breaker.count('hedges_won')
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(model: str) -> CircuitBreaker:
+    """Process-wide breaker for a model"""
+    breaker = _breakers.get(model)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(model, CircuitBreaker(model))
+    return breaker
+
+
+def circuit_stats() -> Dict[str, Dict[str, Any]]:
+    """Breaker state, counters and latency percentiles per model"""
+    return {model: breaker.stats() for model, breaker in list(_breakers.items())}
@@ -0,0 +1,259 @@
+"""
+Upstream Request Scheduler
+==========================
+
+Admission control for model calls. Each model gets a bounded number of
+concurrent upstream requests; callers beyond that wait in one queue per
+workflow priority, and queues are served by smooth weighted round-robin
+so a surge in one priority (e.g. meditation streaming, "medium") cannot
+starve another ("high"):
+
+    async with get_upstream_scheduler().slot(model, priority="high"):
+        response = await client.chat.completions.create(...)
+
+Load is shed instead of queued without bound:
+    queue depth  a full priority queue rejects new callers at once
+                 (QueueFullError)
+    deadline     a caller still queued when its deadline passes is dropped
+                 (DeadlineExceededError), and expired callers are skipped
+                 when slots free up, so no slot is spent on a request whose
+                 client has already given up
+
+Schedulers hold asyncio futures, so there is one per event loop.
+
+Configuration (environment):
+    UPSTREAM_MAX_CONCURRENCY     concurrent requests per model (default 32)
+    UPSTREAM_MODEL_CONCURRENCY   per-model overrides, e.g. "gpt-4=8,gpt-3.5-turbo=48"
+    UPSTREAM_PRIORITY_WEIGHTS    dispatch weights (default "high=4,medium=2,low=1")
+    UPSTREAM_MAX_QUEUE_DEPTH     waiting callers per model and priority (default 64)
+    UPSTREAM_QUEUE_TIMEOUT       default seconds a caller may wait for a slot (default 10)
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+
+def _parse_mapping(text: str, cast: Callable[[str], Any]) -> Dict[str, Any]:
+    """Parse "name=value,name=value" settings"""
+    mapping = {}
+    for item in text.split(','):
+        name, _, value = item.partition('=')
+        if name.strip() and value.strip():
+            mapping[name.strip()] = cast(value.strip())
+    return mapping
+
+
+UPSTREAM_MAX_CONCURRENCY = int(os.environ.get('UPSTREAM_MAX_CONCURRENCY', '32'))
+UPSTREAM_MODEL_CONCURRENCY = _parse_mapping(os.environ.get('UPSTREAM_MODEL_CONCURRENCY', ''), int)
+UPSTREAM_PRIORITY_WEIGHTS = _parse_mapping(os.environ.get('UPSTREAM_PRIORITY_WEIGHTS', 'high=4,medium=2,low=1'), int)
+UPSTREAM_MAX_QUEUE_DEPTH = int(os.environ.get('UPSTREAM_MAX_QUEUE_DEPTH', '64'))
+UPSTREAM_QUEUE_TIMEOUT = float(os.environ.get('UPSTREAM_QUEUE_TIMEOUT', '10'))
+
+# Priority used for calls that do not name one (and for unknown names)
+DEFAULT_PRIORITY = 'medium'
+
+
+class UpstreamOverloadedError(Exception):
+    """An upstream call was shed by the scheduler instead of being sent"""
+
+    def __init__(self, message: str, model: str, priority: str):
+        super().__init__(message)
+        self.model = model
+        self.priority = priority
+
+
+class QueueFullError(UpstreamOverloadedError):
+    """The model's queue for this priority is at its depth limit"""
+
+
+class DeadlineExceededError(UpstreamOverloadedError):
+    """The caller's deadline passed before a slot became free"""
+
+
+class _Waiter:
+    __slots__ = ('future', 'deadline', 'enqueued_at', 'granted')
+
+    def __init__(self, future: asyncio.Future, deadline: float):
+        self.future = future
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class _ModelLane:
+    """Concurrency budget and per-priority queues of one model"""
+
+    def __init__(self, limit: int, priorities):
+        self.limit = limit
+        self.active = 0
+        self.queues: Dict[str, Deque[_Waiter]] = {priority: deque() for priority in priorities}
+        self.credit: Dict[str, int] = {priority: 0 for priority in priorities}
+
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+
+class UpstreamScheduler:
+    """Per-model concurrency limits with weighted fair priority queues"""
+
+    def __init__(self, max_concurrency: int = UPSTREAM_MAX_CONCURRENCY,
+                 model_concurrency: Optional[Dict[str, int]] = None,
+                 weights: Optional[Dict[str, int]] = None,
+                 max_queue_depth: int = UPSTREAM_MAX_QUEUE_DEPTH,
+                 queue_timeout: float = UPSTREAM_QUEUE_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = UPSTREAM_MODEL_CONCURRENCY if model_concurrency is None else model_concurrency
+        self.weights = dict(weights or UPSTREAM_PRIORITY_WEIGHTS)
+        self.weights.setdefault(DEFAULT_PRIORITY, 1)
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self._lanes: Dict[str, _ModelLane] = {}
+        self._metrics = {
+            'admitted': 0, 'queued': 0, 'rejected_queue_full': 0, 'dropped_deadline': 0,
+        }
+        self._wait_seconds = {priority: [0.0, 0] for priority in self.weights}  # total, count
+
+    def _lane(self, model: str) -> _ModelLane:
+        lane = self._lanes.get(model)
+        if lane is None:
+            limit = self.model_concurrency.get(model, self.max_concurrency)
+            lane = self._lanes[model] = _ModelLane(limit, self.weights)
+        return lane
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: str = DEFAULT_PRIORITY,
+                   deadline: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold one of the model's upstream slots for the duration of the block"""
+        await self.acquire(model, priority, deadline)
+        try:
+            yield
+        finally:
+            self.release(model)
+
+    async def acquire(self, model: str, priority: str = DEFAULT_PRIORITY, deadline: Optional[float] = None):
+        """
+        Wait for an upstream slot for ``model``.
+
+        ``deadline`` is a time.monotonic() value; by default a caller may wait
+        UPSTREAM_QUEUE_TIMEOUT seconds. Raises QueueFullError or
+        DeadlineExceededError when the call is shed.
+        """
+        priority = priority if priority in self.weights else DEFAULT_PRIORITY
+        lane = self._lane(model)
+        if lane.active < lane.limit and not lane.waiting():
+            lane.active += 1
+            self._metrics['admitted'] += 1
+            self._record_wait(priority, 0.0)
+            return
+
+        queue = lane.queues[priority]
+        if len(queue) >= self.max_queue_depth:
+            self._metrics['rejected_queue_full'] += 1
+            raise QueueFullError(f"{model} queue for {priority} priority is full", model, priority)
+
+        now = time.monotonic()
+        deadline = deadline if deadline is not None else now + self.queue_timeout
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop.create_future(), deadline)
+        queue.append(waiter)
+        self._metrics['queued'] += 1
+        timer = loop.call_later(max(deadline - now, 0), self._expire, queue, waiter, model, priority)
+        try:
+            await waiter.future
+        except BaseException:
+            if waiter.granted:
+                # Cancelled after a slot was handed over; pass it on
+                self.release(model)
+            elif waiter in queue:
+                queue.remove(waiter)
+            raise
+        finally:
+            timer.cancel()
+        self._record_wait(priority, time.monotonic() - waiter.enqueued_at)
+
+    def release(self, model: str):
+        """Return a slot and hand it to the next queued caller"""
+        lane = self._lanes[model]
+        lane.active -= 1
+        self._dispatch(lane, model)
+
+    def _expire(self, queue: Deque[_Waiter], waiter: _Waiter, model: str, priority: str):
+        if waiter.granted or waiter.future.done() or waiter not in queue:
+            return
+        queue.remove(waiter)
+        self._drop(waiter, model, priority)
+
+    def _drop(self, waiter: _Waiter, model: str, priority: str):
+        self._metrics['dropped_deadline'] += 1
+        waiter.future.set_exception(DeadlineExceededError(
+            f"no {model} slot became free before the request deadline", model, priority
+        ))
+
+    def _dispatch(self, lane: _ModelLane, model: str):
+        now = time.monotonic()
+        while lane.active < lane.limit:
+            ready = [priority for priority, queue in lane.queues.items() if queue]
+            if not ready:
+                return
+            # Smooth weighted round-robin: every ready queue earns its weight,
+            # the richest is served and pays back the total
+            total = sum(self.weights[priority] for priority in ready)
+            for priority in ready:
+                lane.credit[priority] += self.weights[priority]
+            chosen = max(ready, key=lane.credit.__getitem__)
+            lane.credit[chosen] -= total
+
+            waiter = lane.queues[chosen].popleft()
+            if waiter.future.done():
+                continue  # cancelled while queued
+            if waiter.deadline <= now:
+                self._drop(waiter, model, chosen)
+                continue
+            waiter.granted = True
+            lane.active += 1
+            self._metrics['admitted'] += 1
+            waiter.future.set_result(None)
+
+    def _record_wait(self, priority: str, seconds: float):
+        totals = self._wait_seconds[priority]
+        totals[0] += seconds
+        totals[1] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters, per-model occupancy and average queue wait per priority"""
+        metrics = dict(self._metrics)
+        metrics['models'] = {
+            model: {
+                'active': lane.active,
+                'limit': lane.limit,
+                'queued': {priority: len(queue) for priority, queue in lane.queues.items()},
+            }
+            for model, lane in list(self._lanes.items())
+        }
+        metrics['avg_wait_ms'] = {
+            priority: round(total / count * 1000, 2) if count else 0.0
+            for priority, (total, count) in self._wait_seconds.items()
+        }
+        metrics['weights'] = self.weights
+        metrics['max_queue_depth'] = self.max_queue_depth
+        return metrics
+
+
+_schedulers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, UpstreamScheduler]" = weakref.WeakKeyDictionary()
+_schedulers_lock = threading.Lock()
+
+
+def get_upstream_scheduler(loop: Optional[asyncio.AbstractEventLoop] = None) -> UpstreamScheduler:
+    """Scheduler of the given (default: running) event loop"""
+    loop = loop or asyncio.get_running_loop()
+    with _schedulers_lock:
+        scheduler = _schedulers.get(loop)
+        if scheduler is None:
+            scheduler = _schedulers[loop] = UpstreamScheduler()
+    return scheduler
@@ -7,16 +7,24 @@ capabilities for the AI Gurus spiritual platform using OpenAI Whisper.
 """
 
 import os
-import whisper
-import torch
 import tempfile
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Union, Callable, Tuple
 import json
 from datetime import datetime
 import asyncio
+import contextlib
 from flask import current_app
 import logging
+import time
+
+from .chunked_transcription import TranscriptStitcher, iter_transcription, transcribe_in_chunks
+from .transcription_cache import audio_sha256, get_transcription_cache, transcription_cache_key
+from .whisper_workers import get_whisper_inference
+
+# Each analysis pass reads the whole transcript so far, so while streaming it reruns at most this often
+# (in seconds) rather than after every chunk; the final result is always analyzed in full
+STREAM_ANALYSIS_INTERVAL = float(os.environ.get('WHISPER_STREAM_ANALYSIS_SECONDS', '10'))
 
 class WhisperContentCreationService:
     """
@@ -26,12 +34,11 @@ class WhisperContentCreationService:
     def __init__(self):
         """Initialize the Whisper service with optimal configuration"""
         
-        # Load Whisper model
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model_size = "base"  # Options: tiny, base, small, medium, large
+        # The model lives in the Whisper worker processes, which load it in the background
+        self.inference = get_whisper_inference()
+        self.model_size = self.inference.model_size
         
-        print(f"🎙️ Initializing Whisper model '{self.model_size}' on device: {self.device}")
-        self.model = whisper.load_model(self.model_size, device=self.device)
+        print(f"🎙️ Using Whisper model '{self.model_size}' in dedicated inference workers")
         
         # Supported audio formats
         self.supported_formats = [
@@ -82,7 +89,10 @@ class WhisperContentCreationService:
         audio_file_path: str, 
         content_type: str = "general",
         language: Optional[str] = None,
-        include_timestamps: bool = True
+        include_timestamps: bool = True,
+        progress: Optional[Callable[[float, str], None]] = None,
+        cancelled: Optional[Callable[[], bool]] = None,
+        partial: Optional[Callable[[str, Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
         """
         Transcribe audio file with content-specific processing
@@ -92,6 +102,10 @@ class WhisperContentCreationService:
             content_type: Type of spiritual content (meditation_guide, spiritual_teaching, etc.)
             language: Language code (auto-detect if None)
             include_timestamps: Whether to include word-level timestamps
+            progress: Optional callback receiving (fraction done, stage name)
+            cancelled: Optional predicate; once it returns True the running inference is stopped
+            partial: Optional callback receiving ("segment", segment) as each segment is
+                transcribed and ("analysis", content analysis so far) when it changes
             
         Returns:
             Dict containing transcription and metadata
@@ -108,18 +122,44 @@ class WhisperContentCreationService:
             if file_ext not in self.supported_formats:
                 raise ValueError(f"Unsupported audio format: {file_ext}")
             
-            # Transcribe with Whisper
-            result = self.model.transcribe(
-                audio_file_path,
-                language=language,
-                word_timestamps=include_timestamps,
-                verbose=True
-            )
+            if progress:
+                progress(0.05, "transcribing")
+            
+            transcribing = (lambda fraction: progress(0.05 + 0.8 * fraction, "transcribing")) if progress else None
+            if partial:
+                result, cache_hit = await self._stream_transcription(
+                    audio_file_path,
+                    content_type,
+                    partial,
+                    cancelled=cancelled,
+                    progress=transcribing,
+                    language=language,
+                    word_timestamps=include_timestamps
+                )
+            else:
+                # Transcribe with Whisper off the event loop, so other requests sharing it keep running
+                result, cache_hit = await asyncio.to_thread(
+                    self._cached_transcription,
+                    audio_file_path,
+                    cancelled=cancelled,
+                    progress=transcribing,
+                    language=language,
+                    word_timestamps=include_timestamps
+                )
+            
+            if progress:
+                progress(0.85, "analyzing")
             
             # Process based on content type
             processed_content = await self._process_transcription(
                 result, content_type, audio_file_path
             )
+            if partial:
+                # Streaming throttles its analyses, so the complete transcript's always goes out last
+                partial("analysis", {name: value for name, value in processed_content.items() if name != "raw_text"})
+            
+            if progress:
+                progress(0.95, "saving")
             
             # Save transcription
             transcription_file = await self._save_transcription(
@@ -140,7 +180,8 @@ class WhisperContentCreationService:
                 "transcription_file": str(transcription_file),
                 "timestamp": datetime.utcnow().isoformat(),
                 "model_used": self.model_size,
-                "device_used": self.device
+                "device_used": self.device,
+                "cache_hit": cache_hit
             }
             
         except Exception as e:
@@ -151,6 +192,103 @@ class WhisperContentCreationService:
                 "error_type": type(e).__name__
             }
     
+    @property
+    def device(self) -> str:
+        return self.inference.device
+
+    def _cached_transcription(self, audio_file_path: str, cancelled: Optional[Callable[[], bool]] = None,
+                              progress: Optional[Callable[[float], None]] = None,
+                              **options) -> Tuple[Dict[str, Any], bool]:
+        """Whisper result and whether it came from the cache of previously transcribed audio"""
+        cache = get_transcription_cache()
+        if cache is None:
+            return self._run_model(audio_file_path, cancelled=cancelled, progress=progress, **options), False
+        
+        key = transcription_cache_key(
+            audio_sha256(audio_file_path), self.model_size,
+            options.get("language"), options.get("word_timestamps", False)
+        )
+        result = cache.get(key)
+        if result is not None:
+            return result, True
+        
+        result = self._run_model(audio_file_path, cancelled=cancelled, progress=progress, **options)
+        cache.set(key, result)
+        return result, False
+
+    async def _stream_transcription(
+        self,
+        audio_file_path: str,
+        content_type: str,
+        partial: Callable[[str, Dict[str, Any]], None],
+        cancelled: Optional[Callable[[], bool]] = None,
+        progress: Optional[Callable[[float], None]] = None,
+        **options
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Transcribe chunk by chunk in order, publishing each chunk's segments
+        as it comes and the analysis of the transcript so far after the first
+        chunk and then every STREAM_ANALYSIS_INTERVAL seconds.
+        
+        A cached result of the same audio is replayed, but the streamed one
+        is not cached: it is stitched from short streaming chunks, and a
+        later upload should get its own one-pass or long-chunk transcript.
+        """
+        cache = get_transcription_cache()
+        cached = None
+        if cache is not None:
+            content_hash = await asyncio.to_thread(audio_sha256, audio_file_path)
+            key = transcription_cache_key(
+                content_hash, self.model_size, options.get("language"), options.get("word_timestamps", False)
+            )
+            cached = cache.get(key)
+        if cached is not None:
+            chunks = iter([(0.0, cached)])
+        else:
+            chunks = iter_transcription(
+                self.inference, audio_file_path, cancelled=cancelled, progress=progress, **options
+            )
+        
+        stitcher = TranscriptStitcher()
+        last_analysis = None
+        analyzed_at = None
+        try:
+            while True:
+                # Each step waits for the next chunk in a thread; later chunks keep transcribing meanwhile
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                for segment in stitcher.add(*chunk):
+                    partial("segment", {
+                        "id": segment["id"],
+                        "start": segment["start"],
+                        "end": segment["end"],
+                        "text": segment["text"]
+                    })
+                if analyzed_at is not None and time.monotonic() - analyzed_at < STREAM_ANALYSIS_INTERVAL:
+                    continue
+                processed = await self._process_transcription(stitcher.result(), content_type, audio_file_path)
+                analyzed_at = time.monotonic()
+                analysis = {name: value for name, value in processed.items() if name != "raw_text"}
+                if analysis != last_analysis:
+                    partial("analysis", analysis)
+                    last_analysis = analysis
+        finally:
+            # Stops the chunks still transcribing if publishing failed
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                with contextlib.suppress(ValueError):  # still advancing in its thread after a cancellation
+                    await asyncio.to_thread(close)
+        
+        if cached is not None:
+            return cached, True
+        return stitcher.result(options.get("language")), False
+
+    def _run_model(self, audio_file_path: str, cancelled: Optional[Callable[[], bool]] = None,
+                   progress: Optional[Callable[[float], None]] = None, **options) -> Dict[str, Any]:
+        """Blocking Whisper inference (waits in a thread for the inference workers; long audio is chunked)"""
+        return transcribe_in_chunks(self.inference, audio_file_path, cancelled=cancelled, progress=progress, **options)
+    
     async def _process_transcription(
         self, 
         whisper_result: Dict, 
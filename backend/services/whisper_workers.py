@@ -0,0 +1,514 @@
+"""
+Whisper Inference Workers
+=========================
+
+Whisper runs in dedicated worker processes instead of inside web
+workers. Each worker process loads the model once when it starts,
+warms it up on a second of silence, and then serves transcriptions one
+at a time with WHISPER_TORCH_THREADS intra-op threads, so memory (one
+model per worker process) and CPU use (processes x threads) are fixed
+by configuration:
+
+    result = get_whisper_inference().transcribe(audio_path, language="en", word_timestamps=True)
+
+``audio`` is a file path or a 16 kHz float32 numpy array, and options
+are those of ``whisper.transcribe``.
+
+Two deployments:
+    local   without WHISPER_WORKER_SOCKET, each web process starts its own
+            pool of WHISPER_WORKERS processes on first use
+    shared  one pool per host, serving every web process over a Unix socket:
+                WHISPER_WORKER_SOCKET=/run/ai-heart/whisper-workers.sock \\
+                WHISPER_WORKER_AUTHKEY=<random secret> \\
+                python -m backend.services.whisper_workers
+            Web processes with the same WHISPER_WORKER_SOCKET and
+            WHISPER_WORKER_AUTHKEY send their requests there; audio paths
+            must be readable by the pool.
+
+The socket speaks multiprocessing.connection, which unpickles what clients
+send, so anyone who can connect with the secret can run code as the pool's
+user. The pool and its clients refuse to run without WHISPER_WORKER_AUTHKEY,
+and the socket is made readable and writable by its owner only; run the web
+processes as the same user, in a directory other users cannot enter.
+
+A transcription can be cancelled while it runs: the worker process
+running it is terminated and replaced. A worker that dies fails its
+transcription with WorkerCrashedError and is restarted.
+
+Configuration (environment):
+    WHISPER_MODEL_SIZE       tiny, base, small, medium or large (default base)
+    WHISPER_DEVICE           cpu or cuda (default: cuda when available)
+    WHISPER_WORKERS          worker processes (default 1)
+    WHISPER_TORCH_THREADS    torch threads per worker (default: CPU cores / workers)
+    WHISPER_WARMUP           "false" skips the warmup transcription (default true)
+    WHISPER_WORKER_SOCKET    Unix socket of a shared pool (default: local pool)
+    WHISPER_WORKER_AUTHKEY   shared secret for the socket (required with WHISPER_WORKER_SOCKET)
+"""
+
+import atexit
+import concurrent.futures
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+WHISPER_MODEL_SIZE = os.environ.get('WHISPER_MODEL_SIZE', 'base')
+WHISPER_DEVICE = os.environ.get('WHISPER_DEVICE') or None
+WHISPER_WORKERS = int(os.environ.get('WHISPER_WORKERS', '1'))
+WHISPER_TORCH_THREADS = int(os.environ.get('WHISPER_TORCH_THREADS', '0'))
+WHISPER_WARMUP = os.environ.get('WHISPER_WARMUP', 'true').lower() != 'false'
+WHISPER_WORKER_SOCKET = os.environ.get('WHISPER_WORKER_SOCKET') or None
+WHISPER_WORKER_AUTHKEY = os.environ.get('WHISPER_WORKER_AUTHKEY', '').encode() or None
+
+# Seconds between cancellation checks while waiting for a transcription
+CANCEL_POLL_SECONDS = 0.5
+
+# Seconds before restarting a worker that died while loading its model
+WORKER_RESTART_DELAY = 5
+
+
+class InferenceError(Exception):
+    """Whisper failed in a worker process"""
+
+    def __init__(self, message: str, error_type: str = 'InferenceError'):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+class WorkerCrashedError(InferenceError):
+    """The worker process died while transcribing"""
+
+
+class WorkerUnavailableError(InferenceError):
+    """The shared worker pool could not be reached"""
+
+
+class InferenceCancelledError(Exception):
+    """The transcription was cancelled"""
+
+
+def default_torch_threads(workers: int) -> int:
+    """Share the machine's cores evenly between worker processes"""
+    return max((os.cpu_count() or 1) // max(workers, 1), 1)
+
+
+def _worker_main(conn, model_size: str, device: Optional[str], threads: int, warmup: bool):
+    """Worker process: load the model once, then transcribe requests from the pipe"""
+    import numpy as np
+    import torch
+    import whisper
+
+    torch.set_num_threads(threads)
+    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+    model = whisper.load_model(model_size, device=device)
+    fp16 = device == "cuda"
+    if warmup:
+        # The first inference pays for kernel selection and allocator growth
+        model.transcribe(np.zeros(whisper.audio.SAMPLE_RATE, dtype=np.float32), language="en", fp16=fp16)
+    conn.send(("ready", {"pid": os.getpid(), "device": device, "threads": torch.get_num_threads()}))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if message is None:
+            return
+        task_id, audio, options = message
+        options.setdefault("fp16", fp16)
+        options.setdefault("verbose", None)
+        try:
+            conn.send((task_id, "ok", model.transcribe(audio, **options)))
+        except Exception as e:
+            conn.send((task_id, "error", (type(e).__name__, str(e))))
+
+
+class _Task:
+    __slots__ = ('id', 'audio', 'options', 'future')
+
+    def __init__(self, task_id: int, audio: Any, options: Dict[str, Any]):
+        self.id = task_id
+        self.audio = audio
+        self.options = options
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+
+
+class _Worker:
+    """One worker process and the task it is running"""
+
+    def __init__(self, index: int, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.ready = False
+        self.retired = False
+        self.info: Dict[str, Any] = {}
+        self.task: Optional[_Task] = None
+        self.started_at = time.monotonic()
+
+
+class WhisperInferencePool:
+    """Worker processes with a preloaded Whisper model, fed from one queue"""
+
+    def __init__(self, workers: int = WHISPER_WORKERS, model_size: str = WHISPER_MODEL_SIZE,
+                 device: Optional[str] = WHISPER_DEVICE, threads: int = WHISPER_TORCH_THREADS,
+                 warmup: bool = WHISPER_WARMUP, target: Callable = _worker_main):
+        self.workers = workers
+        self.model_size = model_size
+        self.configured_device = device
+        self.threads = threads or default_torch_threads(workers)
+        self.warmup = warmup
+        self._target = target
+        # Spawned, not forked: the parent may hold threads and an event loop
+        self._context = multiprocessing.get_context('spawn')
+        self._workers: List[_Worker] = []
+        self._pending: Deque[_Task] = deque()
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._ready = threading.Condition(self._lock)
+        self._pid = None
+        self._stopping = False
+        self._metrics = {'completed': 0, 'failed': 0, 'cancelled': 0, 'crashed': 0, 'restarts': 0}
+
+    @property
+    def device(self) -> str:
+        """Device the workers run on (as reported by a ready worker)"""
+        for worker in self._workers:
+            if worker.info:
+                return worker.info['device']
+        return self.configured_device or 'auto'
+
+    def start(self) -> 'WhisperInferencePool':
+        """Start the worker processes; models load in the background"""
+        if self._pid == os.getpid():
+            return self
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._stopping = False
+                self._workers = [self._spawn(index) for index in range(self.workers)]
+                # Runs before multiprocessing terminates daemon processes, which would look like crashes
+                atexit.register(self.stop)
+        return self
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until every worker has loaded and warmed up its model"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._ready:
+            while not all(worker.ready for worker in self._workers):
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._ready.wait(remaining)
+        return True
+
+    def _spawn(self, index: int) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=self._target,
+            args=(child_conn, self.model_size, self.configured_device, self.threads, self.warmup),
+            name=f"whisper-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(index, process, parent_conn)
+        threading.Thread(target=self._read, args=(worker,), name=f"whisper-reader-{index}", daemon=True).start()
+        return worker
+
+    def _read(self, worker: _Worker):
+        """Collect a worker's messages until its process exits"""
+        while True:
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                self._worker_exited(worker)
+                return
+            with self._lock:
+                if message[0] == "ready":
+                    worker.ready, worker.info = True, message[1]
+                    logging.info(f"Whisper worker {worker.index} ready: {message[1]}")
+                    self._ready.notify_all()
+                else:
+                    task_id, status, payload = message
+                    task, worker.task = worker.task, None
+                    if task is not None and task.id == task_id and not task.future.done():
+                        if status == "ok":
+                            task.future.set_result(payload)
+                            self._metrics['completed'] += 1
+                        else:
+                            task.future.set_exception(InferenceError(payload[1], payload[0]))
+                            self._metrics['failed'] += 1
+                self._dispatch()
+
+    def _worker_exited(self, worker: _Worker):
+        with self._lock:
+            task, worker.task = worker.task, None
+            if not worker.retired:
+                self._metrics['crashed'] += 1
+                logging.error(f"Whisper worker {worker.index} exited with code {worker.process.exitcode}")
+                if task is not None and not task.future.done():
+                    task.future.set_exception(WorkerCrashedError(
+                        f"Whisper worker {worker.index} exited while transcribing", 'WorkerCrashedError'
+                    ))
+                if worker.ready:
+                    self._replace(worker)
+                else:
+                    # Died loading the model: back off, and fail queued work no other worker can take
+                    if not any(other.ready and not other.retired for other in self._workers):
+                        self._fail_pending(WorkerCrashedError(
+                            f"Whisper worker {worker.index} failed to start", 'WorkerCrashedError'
+                        ))
+                    worker.retired = True
+                    timer = threading.Timer(WORKER_RESTART_DELAY, self._restart, args=(worker,))
+                    timer.daemon = True
+                    timer.start()
+            worker.conn.close()
+
+    def _restart(self, worker: _Worker):
+        with self._lock:
+            self._replace(worker)
+
+    def _replace(self, worker: _Worker):
+        if self._stopping or self._pid != os.getpid() or worker not in self._workers:
+            return
+        worker.retired = True
+        self._workers[self._workers.index(worker)] = self._spawn(worker.index)
+        self._metrics['restarts'] += 1
+
+    def _fail_pending(self, error: Exception):
+        pending, self._pending = self._pending, deque()
+        for task in pending:
+            if not task.future.done():
+                task.future.set_exception(error)
+
+    def _dispatch(self):
+        with self._lock:
+            for worker in self._workers:
+                if not self._pending:
+                    return
+                if worker.ready and worker.task is None and not worker.retired:
+                    task = self._pending.popleft()
+                    worker.task = task
+                    try:
+                        worker.conn.send((task.id, task.audio, task.options))
+                    except (OSError, ValueError):
+                        # The reader notices the dead process and fails the task
+                        pass
+
+    def submit(self, audio: Any, **options) -> concurrent.futures.Future:
+        """Queue a transcription; the future resolves to Whisper's result dict"""
+        self.start()
+        task = _Task(next(self._ids), audio, options)
+        with self._lock:
+            self._pending.append(task)
+            self._dispatch()
+        return task.future
+
+    def cancel(self, future: concurrent.futures.Future) -> bool:
+        """Cancel a queued or running transcription; a running one costs its worker a restart"""
+        with self._lock:
+            if future.done():
+                return False
+            for task in self._pending:
+                if task.future is future:
+                    self._pending.remove(task)
+                    break
+            else:
+                for worker in self._workers:
+                    if worker.task is not None and worker.task.future is future:
+                        worker.task = None
+                        self._replace(worker)
+                        worker.process.terminate()
+                        break
+            future.set_exception(InferenceCancelledError("Transcription cancelled"))
+            self._metrics['cancelled'] += 1
+            return True
+
+    def transcribe(self, audio: Any, cancelled: Optional[Callable[[], bool]] = None, **options) -> Dict[str, Any]:
+        """Transcribe and wait; ``cancelled`` is polled and aborts the transcription once it returns True"""
+        future = self.submit(audio, **options)
+        while True:
+            try:
+                return future.result(CANCEL_POLL_SECONDS if cancelled else None)
+            except concurrent.futures.TimeoutError:
+                if cancelled():
+                    self.cancel(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Worker processes, queue length and counters"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['queued'] = len(self._pending)
+            metrics['workers'] = [
+                {
+                    'index': worker.index,
+                    'pid': worker.process.pid,
+                    'alive': worker.process.is_alive(),
+                    'ready': worker.ready,
+                    'busy': worker.task is not None,
+                    **worker.info
+                }
+                for worker in self._workers
+            ]
+        metrics['model_size'] = self.model_size
+        metrics['torch_threads'] = self.threads
+        return metrics
+
+    def stop(self, timeout: float = 5):
+        atexit.unregister(self.stop)
+        with self._lock:
+            self._stopping = True
+            workers, self._workers = self._workers, []
+            self._fail_pending(InferenceCancelledError("Worker pool stopped"))
+        for worker in workers:
+            worker.retired = True
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._pid = None
+
+
+def _require_authkey(authkey: Optional[bytes]) -> bytes:
+    if not authkey:
+        raise ValueError("WHISPER_WORKER_AUTHKEY must be set to a secret shared by the pool and its clients")
+    return authkey
+
+
+def serve(address: str = WHISPER_WORKER_SOCKET, pool: Optional[WhisperInferencePool] = None,
+          authkey: Optional[bytes] = WHISPER_WORKER_AUTHKEY):
+    """Serve a worker pool to the web processes on this host over a Unix socket"""
+    authkey = _require_authkey(authkey)
+    pool = (pool or WhisperInferencePool()).start()
+    if os.path.exists(address):
+        os.unlink(address)  # left behind by a previous run
+    listener = Listener(address, family='AF_UNIX', authkey=authkey)
+    # Connecting clients are unpickled, so only the pool's own user may reach the socket
+    os.chmod(address, 0o600)
+    logging.info(f"Whisper worker pool listening on {address}")
+    pool.wait_ready()
+    logging.info("Whisper workers ready")
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # e.g. a client with the wrong authkey
+                logging.warning(f"Rejected Whisper client: {e}")
+                continue
+            threading.Thread(target=_serve_connection, args=(pool, conn), daemon=True).start()
+    finally:
+        listener.close()
+        pool.stop()
+
+
+def _serve_connection(pool: WhisperInferencePool, conn):
+    with conn:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+            if message[0] == 'stats':
+                conn.send(('ok', pool.stats()))
+                continue
+            _, audio, options = message
+            future = pool.submit(audio, **options)
+            while not future.done():
+                # A client that goes away or asks to cancel stops the transcription
+                try:
+                    if conn.poll(CANCEL_POLL_SECONDS) and conn.recv() == ('cancel',):
+                        pool.cancel(future)
+                except (EOFError, OSError):
+                    pool.cancel(future)
+                    return
+            try:
+                reply = ('ok', future.result())
+            except InferenceCancelledError as e:
+                reply = ('error', ('InferenceCancelledError', str(e)))
+            except InferenceError as e:
+                reply = ('error', (e.error_type, str(e)))
+            try:
+                conn.send(reply)
+            except OSError:
+                return
+
+
+class WhisperInferenceClient:
+    """A web process's handle on the host's shared worker pool"""
+
+    def __init__(self, address: str = WHISPER_WORKER_SOCKET, authkey: Optional[bytes] = WHISPER_WORKER_AUTHKEY,
+                 model_size: str = WHISPER_MODEL_SIZE):
+        self.address = address
+        self.authkey = _require_authkey(authkey)
+        self.model_size = model_size
+        self.device = WHISPER_DEVICE or 'auto'
+        # Size of the shared pool, which runs with the same configuration
+        self.workers = WHISPER_WORKERS
+
+    def _connect(self):
+        try:
+            return Client(self.address, family='AF_UNIX', authkey=self.authkey)
+        except OSError as e:
+            raise WorkerUnavailableError(f"Whisper worker pool at {self.address} is unavailable: {e}",
+                                         'WorkerUnavailableError') from e
+
+    def transcribe(self, audio: Any, cancelled: Optional[Callable[[], bool]] = None, **options) -> Dict[str, Any]:
+        with self._connect() as conn:
+            try:
+                conn.send(('transcribe', audio, options))
+                while not conn.poll(CANCEL_POLL_SECONDS):
+                    if cancelled is not None and cancelled():
+                        conn.send(('cancel',))
+                        cancelled = None
+                status, payload = conn.recv()
+            except (EOFError, OSError) as e:
+                raise WorkerCrashedError(f"Whisper worker pool at {self.address} closed the connection "
+                                         f"while transcribing", 'WorkerCrashedError') from e
+        if status == 'ok':
+            return payload
+        error_type, message = payload
+        if error_type == 'InferenceCancelledError':
+            raise InferenceCancelledError(message)
+        raise InferenceError(message, error_type)
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self._connect() as conn:
+                conn.send(('stats',))
+                return conn.recv()[1]
+        except (WorkerUnavailableError, EOFError, OSError) as e:
+            return {'error': str(e)}
+
+
+_inference = None
+_inference_lock = threading.Lock()
+
+
+def get_whisper_inference():
+    """The shared pool's client when WHISPER_WORKER_SOCKET is set, else this process's pool (started)"""
+    global _inference
+    if _inference is None:
+        with _inference_lock:
+            if _inference is None:
+                _inference = WhisperInferenceClient() if WHISPER_WORKER_SOCKET else WhisperInferencePool()
+    if isinstance(_inference, WhisperInferencePool):
+        _inference.start()
+    return _inference
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    if not WHISPER_WORKER_SOCKET:
+        raise SystemExit("Set WHISPER_WORKER_SOCKET to the Unix socket the pool should listen on")
+    serve()
@@ -0,0 +1,191 @@
+"""
+Async Loop Bridge
+=================
+
+A long-lived asyncio event loop per worker process, running in a daemon
+thread, with a thread-safe bridge for synchronous Flask views:
+
+    result = run_async(ai_service.get_spiritual_guidance(...))
+
+    for chunk in iterate_async(ai_service.get_spiritual_guidance_stream(...)):
+        yield chunk
+
+    # HEARTBEAT is yielded whenever 15 seconds pass without an item
+    for chunk in iterate_async(generator, heartbeat=15):
+        ...
+
+Loop setup is paid once per process, and anything bound to the loop
+(pooled AsyncOpenAI/httpx clients, caches) survives across requests.
+The loop is recreated after a fork, so it also works with gunicorn --preload.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import os
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+# Seconds to wait for pending work when the process exits
+SHUTDOWN_TIMEOUT_SECONDS = 5
+
+# Yielded by iterate() when the generator has been idle for the heartbeat interval
+HEARTBEAT = object()
+
+
+class AsyncLoopBridge:
+    """Runs coroutines on a background event loop owned by this process"""
+
+    def __init__(self, name: str = "async-bridge"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running background loop, started on first use"""
+        loop = self._loop
+        if loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+            loop = self._start()
+        return loop
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # A forked child inherits the loop object but not the thread running it
+            if self._loop is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=run, name=self.name, daemon=True)
+            thread.start()
+            started.wait()
+
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            return loop
+
+    def run(self, coroutine: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        Run a coroutine on the background loop and wait for its result.
+
+        Raises the coroutine's exception, or TimeoutError (after cancelling
+        the coroutine) if it does not finish within ``timeout`` seconds.
+        """
+        if self._in_loop_thread():
+            raise RuntimeError("run() called from the bridge loop itself; await the coroutine instead")
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Timeouts and interrupted callers (e.g. a client disconnect) cancel the work
+            future.cancel()
+            raise
+
+    def iterate(self, generator: AsyncIterator[T], timeout: Optional[float] = None,
+                heartbeat: Optional[float] = None) -> Iterator[T]:
+        """
+        Drive an async generator from synchronous code, one item at a time.
+
+        Items are pulled only as the consumer asks for them, so a slow
+        client applies backpressure. Closing the returned iterator (as
+        Flask does when a streaming client disconnects) cancels the pending
+        pull and closes the async generator on the loop.
+
+        With ``heartbeat``, HEARTBEAT is yielded each time that many seconds
+        pass without an item, while the pull keeps waiting; ``timeout``
+        bounds the wait for each item.
+        """
+        future = None
+        try:
+            while True:
+                future = asyncio.run_coroutine_threadsafe(generator.__anext__(), self.loop)
+                deadline = time.monotonic() + timeout if timeout is not None else None
+                while True:
+                    wait = heartbeat
+                    if deadline is not None:
+                        wait = min(wait, deadline - time.monotonic()) if wait is not None else deadline - time.monotonic()
+                    try:
+                        item = future.result(max(wait, 0) if wait is not None else None)
+                        break
+                    except concurrent.futures.TimeoutError:
+                        if deadline is not None and time.monotonic() >= deadline:
+                            raise
+                        yield HEARTBEAT
+                    except StopAsyncIteration:
+                        return
+                future = None
+                yield item
+        finally:
+            if future is not None:
+                # Interrupted mid-pull (timeout or disconnect): stop waiting upstream at once
+                future.cancel()
+            if getattr(generator, "aclose", None) is not None:
+                try:
+                    self.run(_aclose(generator), SHUTDOWN_TIMEOUT_SECONDS)
+                except Exception:
+                    pass
+
+    def _in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def shutdown(self, timeout: float = SHUTDOWN_TIMEOUT_SECONDS):
+        """Cancel pending tasks and stop the loop"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid() or not thread.is_alive():
+                return
+
+            async def cancel_pending():
+                tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await loop.shutdown_asyncgens()
+
+            try:
+                asyncio.run_coroutine_threadsafe(cancel_pending(), loop).result(timeout)
+            except Exception:
+                pass
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
+            self._loop = self._thread = None
+
+
+async def _aclose(generator):
+    # A cancelled pull unwinds on a later loop iteration; the generator cannot be closed while it runs
+    while getattr(generator, "ag_running", False):
+        await asyncio.sleep(0)
+    await generator.aclose()
+
+
+_bridge = AsyncLoopBridge()
+atexit.register(_bridge.shutdown)
+
+
+def get_async_bridge() -> AsyncLoopBridge:
+    """The process-wide bridge"""
+    return _bridge
+
+
+def run_async(coroutine: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Run a coroutine on the worker's background loop and return its result"""
+    return _bridge.run(coroutine, timeout)
+
+
+def iterate_async(generator: AsyncIterator[T], timeout: Optional[float] = None,
+                  heartbeat: Optional[float] = None) -> Iterator[T]:
+    """Iterate an async generator on the worker's background loop"""
+    return _bridge.iterate(generator, timeout, heartbeat)
@@ -0,0 +1,64 @@
+"""
+Server-Sent Events
+==================
+
+Helpers for text/event-stream responses fed by async generators on the
+worker's event loop:
+
+    return sse_response(sse_stream(ai_service.get_spiritual_guidance_stream(...),
+                                   lambda chunk: sse_event({'chunk': chunk})))
+
+Each event is written as soon as the generator produces it. While the
+generator is idle a comment line is sent every SSE_HEARTBEAT_SECONDS,
+which keeps proxies from timing the connection out and lets the server
+notice a client that has gone away: the failed write closes the stream,
+and the pending upstream work is cancelled.
+
+Configuration (environment):
+    SSE_HEARTBEAT_SECONDS   idle seconds between heartbeat comments (default 15)
+"""
+
+import json
+import os
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from flask import Response
+
+from .async_bridge import HEARTBEAT, iterate_async
+
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+
+# Disable caching and proxy buffering (nginx) so every event is flushed to the client
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
+
+
+def sse_event(data: Any, event: Optional[str] = None, event_id: Optional[str] = None) -> str:
+    """One event; ``data`` that is not a string is sent as JSON"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    payload = data if isinstance(data, str) else json.dumps(data)
+    lines.extend(f"data: {line}" for line in payload.split('\n'))
+    return '\n'.join(lines) + '\n\n'
+
+
+def sse_comment(text: str = '') -> str:
+    """A comment line, ignored by clients"""
+    return f": {text}\n\n"
+
+
+def sse_stream(generator: AsyncIterator[Any], render: Callable[[Any], str],
+               heartbeat: float = SSE_HEARTBEAT_SECONDS) -> Iterator[str]:
+    """Render each item of an async generator as it arrives, with heartbeats while idle"""
+    for item in iterate_async(generator, heartbeat=heartbeat):
+        yield sse_comment('heartbeat') if item is HEARTBEAT else render(item)
+
+
+def sse_response(events: Iterator[str], status: int = 200) -> Response:
+    """A streaming text/event-stream response"""
+    return Response(events, status=status, mimetype='text/event-stream', headers=SSE_HEADERS)
@@ -31,7 +31,9 @@ class ChatGPTWorkflowManager:
                                   they are eternal souls, not temporary bodies. Provide profound 
                                   spiritual insights with compassion and wisdom.""",
                 "workflow_type": "deep_guidance",
-                "priority": "high"
+                "priority": "high",
+                "provider": "openai",          # Preferred model provider
+                "fallback_provider": "claude"
             },
             
             # 🕉️ SLOKA GURU WORKFLOW  
@@ -44,7 +46,9 @@ class ChatGPTWorkflowManager:
                                   from Bhagavad Gita, Upanishads, and Vedas. Provide authentic 
                                   slokas with transliteration, translation, and deep meanings.""",
                 "workflow_type": "scholarly_guidance",
-                "priority": "high"
+                "priority": "high",
+                "provider": "openai",          # Preferred model provider
+                "fallback_provider": "claude"
             },
             
             # 🧘‍♀️ MEDITATION GURU WORKFLOW
@@ -58,6 +62,8 @@ class ChatGPTWorkflowManager:
                                   emotional healing with gentle, soothing language.""",
                 "workflow_type": "guided_practice",
                 "priority": "medium",
+                "provider": "openai",          # Preferred model provider
+                "fallback_provider": "claude",
                 "streaming": True  # Enable real-time guidance
             },
             
@@ -71,7 +77,9 @@ class ChatGPTWorkflowManager:
                                   and gratitude. Teach the path of love and devotion to the Divine 
                                   with warmth and spiritual emotion.""",
                 "workflow_type": "devotional_guidance",
-                "priority": "high"
+                "priority": "high",
+                "provider": "openai",          # Preferred model provider
+                "fallback_provider": "claude"
             },
             
             # ⚖️ KARMA GURU WORKFLOW
@@ -84,7 +92,9 @@ class ChatGPTWorkflowManager:
                                   consequences, and dharmic path. Guide users in making ethical 
                                   decisions aligned with dharma and universal principles.""",
                 "workflow_type": "ethical_guidance", 
-                "priority": "high"
+                "priority": "high",
+                "provider": "openai",          # Preferred model provider
+                "fallback_provider": "claude"
             },
             
             # 🧘‍♀️ YOGA GURU WORKFLOW
@@ -97,7 +107,9 @@ class ChatGPTWorkflowManager:
                                   and energetic alignment. Teach physical practices, pranayama, 
                                   and chakra work with clear, practical instructions.""",
                 "workflow_type": "practical_guidance",
-                "priority": "medium"
+                "priority": "medium",
+                "provider": "openai",          # Preferred model provider
+                "fallback_provider": "claude"
             }
         }
         
@@ -149,6 +161,8 @@ class ChatGPTWorkflowManager:
             },
             "workflow_settings": {
                 "priority": base_config['priority'],
+                "provider": base_config.get('provider', 'openai'),
+                "fallback_provider": base_config.get('fallback_provider'),
                 "streaming": base_config.get('streaming', False),
                 "rate_limit": base_config['rate_limit']
             }
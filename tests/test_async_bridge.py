@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from backend.utils.async_bridge import HEARTBEAT, AsyncLoopBridge
+
+@pytest.fixture
+def bridge():
+    """A bridge with its own background loop, stopped after the test."""
+    bridge = AsyncLoopBridge(name='test-bridge')
+    yield bridge
+    bridge.shutdown()
+
+def test_run_reuses_one_loop(bridge):
+    """Test that coroutines from separate calls share the same long-lived loop."""
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    first = bridge.run(current_loop())
+    assert bridge.run(current_loop()) is first
+    assert first.is_running()
+
+def test_run_propagates_errors_and_timeouts(bridge):
+    """Test that exceptions reach the caller and timed-out coroutines are cancelled."""
+    async def fail():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        bridge.run(fail())
+
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        bridge.run(slow(), timeout=0.05)
+    bridge.run(asyncio.wait_for(cancelled.wait(), 1))
+
+def test_iterate_streams_and_closes_on_early_exit(bridge):
+    """Test that async generators are consumed lazily and closed when the consumer stops."""
+    closed = []
+
+    async def numbers():
+        try:
+            for number in range(100):
+                yield number
+        finally:
+            closed.append(True)
+
+    assert list(bridge.iterate(numbers()))[:3] == [0, 1, 2]
+    assert closed == [True]
+
+    stream = bridge.iterate(numbers())
+    assert [next(stream), next(stream)] == [0, 1]
+    stream.close()
+    assert closed == [True, True]
+
+def test_iterate_sends_heartbeats_and_cancels_pending_pull_on_close(bridge):
+    """Test that an idle stream yields heartbeats and closing it cancels the item being awaited."""
+    cancelled = []
+
+    async def slow():
+        yield 'first'
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        yield 'never'
+
+    stream = bridge.iterate(slow(), heartbeat=0.02)
+    assert next(stream) == 'first'
+    assert next(stream) is HEARTBEAT
+    assert next(stream) is HEARTBEAT
+    stream.close()
+    assert cancelled == [True]
@@ -0,0 +1,107 @@
+import threading
+import time
+import numpy as np
+import pytest
+from backend.services.chunked_transcription import (
+    SAMPLE_RATE, TranscriptStitcher, find_silences, frame_levels, iter_chunk_results, plan_chunks,
+    speech_mask, stitch_results, transcribe_samples
+)
+
+def talk(*parts):
+    """16-bit audio from (seconds, speaking) parts: a tone with some noise while speaking, faint noise otherwise."""
+    rng = np.random.default_rng(7)
+    pieces = []
+    for seconds, speaking in parts:
+        n = int(seconds * SAMPLE_RATE)
+        noise = rng.normal(0, 30, n)
+        tone = 8000 * np.sin(2 * np.pi * 220 * np.arange(n) / SAMPLE_RATE) if speaking else 0
+        pieces.append((noise + tone).astype(np.int16))
+    return np.concatenate(pieces)
+
+class FakeInference:
+    """Returns one segment per chunk, timed relative to the chunk like Whisper does."""
+    workers = 3
+
+    def __init__(self, fail_at=None):
+        self.calls = []
+        self.fail_at = fail_at
+        self.lock = threading.Lock()
+
+    def transcribe(self, audio, cancelled=None, **options):
+        seconds = len(audio) / SAMPLE_RATE
+        with self.lock:
+            self.calls.append((seconds, options))
+        if self.fail_at is not None and len(self.calls) == self.fail_at:
+            raise RuntimeError('worker failed')
+        return {
+            'text': f' chunk of {seconds:.0f}s',
+            'language': 'en',
+            'segments': [{
+                'id': 0, 'seek': 0, 'start': 0.5, 'end': seconds - 0.5, 'text': f' chunk of {seconds:.0f}s',
+                'words': [{'word': ' chunk', 'start': 0.5, 'end': 0.9, 'probability': 0.9}],
+            }],
+        }
+
+def test_pauses_are_found_and_chunks_cut_inside_them():
+    """Test that the detector finds pauses and every cut lands in one, keeping chunks under the limit."""
+    audio = talk((50, True), (1, False), (30, True), (2, False), (60, True), (0.5, False), (40, True))
+    frame = int(SAMPLE_RATE * 0.03)
+    silences = find_silences(speech_mask(frame_levels(audio, frame)), frame, 10)
+    assert [round(start / SAMPLE_RATE) for start, _ in silences] == [50, 81, 143]
+
+    chunks = plan_chunks(len(audio), silences, 100 * SAMPLE_RATE)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(audio)
+    for (_, end), (start, _) in zip(chunks, chunks[1:]):
+        assert end == start and any(a <= end <= b for a, b in silences)
+    assert all(end - start <= 100 * SAMPLE_RATE for start, end in chunks)
+
+def test_stitched_timestamps_are_offset_by_chunk_start():
+    """Test that segments and words from later chunks are shifted, renumbered and keep their fields."""
+    segment = {'id': 0, 'seek': 0, 'start': 1.0, 'end': 4.0, 'text': ' Om', 'tokens': [1],
+               'words': [{'word': ' Om', 'start': 1.0, 'end': 1.5, 'probability': 0.8}]}
+    result = stitch_results([
+        (60.0, {'text': ' shanti', 'language': 'sa', 'segments': [dict(segment, text=' shanti')]}),
+        (0.0, {'text': ' Om', 'language': 'sa', 'segments': [segment]}),
+    ])
+
+    assert result['text'] == 'Om shanti' and result['language'] == 'sa'
+    second = result['segments'][1]
+    assert (second['id'], second['start'], second['end'], second['seek']) == (1, 61.0, 64.0, 6000)
+    assert second['words'] == [{'word': ' Om', 'start': 61.0, 'end': 61.5, 'probability': 0.8}]
+    assert second['tokens'] == [1] and result['segments'][0]['start'] == 1.0
+
+def test_long_audio_is_transcribed_in_parallel_chunks_without_silent_ones():
+    """Test that speech chunks go to the workers with the caller's options and silent stretches are skipped."""
+    audio = talk((40, True), (1, False), (40, True), (1, False), (130, False), (30, True))
+    inference = FakeInference()
+    fractions = []
+
+    result = transcribe_samples(inference, audio, inference.workers, progress=fractions.append,
+                                max_chunk_seconds=60, language='en', word_timestamps=True)
+
+    assert result['chunks'] == len(inference.calls) == 3
+    assert all(options == {'language': 'en', 'word_timestamps': True} for _, options in inference.calls)
+    starts = [segment['start'] for segment in result['segments']]
+    assert starts == sorted(starts) and starts[0] == 0.5 and starts[-1] > 200
+    assert fractions[-1] == 1.0
+
+    with pytest.raises(RuntimeError):
+        transcribe_samples(FakeInference(fail_at=2), audio, 3, max_chunk_seconds=60)
+
+def test_chunks_are_yielded_in_order_as_soon_as_ready():
+    """Test that a slow first chunk holds back later ones, which are stitched incrementally on the timeline."""
+    audio = talk((25, True), (1, False), (25, True), (1, False), (25, True))
+
+    class SlowFirstChunk(FakeInference):
+        def transcribe(self, audio, cancelled=None, **options):
+            if not self.calls:
+                time.sleep(0.2)
+            return super().transcribe(audio, cancelled, **options)
+
+    stitcher = TranscriptStitcher()
+    added = []
+    for offset, result in iter_chunk_results(SlowFirstChunk(), audio, 3, max_chunk_seconds=30):
+        added.append([(segment['id'], round(segment['start'])) for segment in stitcher.add(offset, result)])
+
+    assert added == [[(0, 0)], [(1, 26)], [(2, 52)]]
+    assert stitcher.result()['chunks'] == 3
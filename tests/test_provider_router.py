@@ -0,0 +1,86 @@
+from backend.services.provider_router import ProviderRouter
+from backend.services.providers import ChatProvider, ClaudeProvider, ProviderHTTPError
+from backend.services.upstream_health import get_circuit_breaker, is_upstream_failure
+
+class FakeProvider(ChatProvider):
+    def __init__(self, name, model, cost=0.0):
+        self.name = name
+        self.model = model
+        self.cost = cost
+
+    def model_for(self, model):
+        return self.model
+
+    def cost_per_1k(self, model):
+        return self.cost
+
+def observe(model, latency, calls, failures=0):
+    breaker = get_circuit_breaker(model)
+    for _ in range(calls):
+        breaker.record_success(latency)
+    for _ in range(failures):
+        breaker.record_failure()
+
+def names(route):
+    return [provider.name for provider, _ in route]
+
+def test_preferred_provider_leads_until_another_is_clearly_better():
+    """Test that the workflow's provider stays first without enough evidence against it."""
+    router = ProviderRouter({
+        'openai': FakeProvider('openai', 'router-test-openai-1'),
+        'claude': FakeProvider('claude', 'router-test-claude-1'),
+    }, min_samples=5, stickiness=0.2)
+    assert names(router.route('gpt-4', 'openai', ['claude'])) == ['openai', 'claude']
+
+    observe('router-test-openai-1', 1.0, 10)
+    observe('router-test-claude-1', 0.9, 10)
+    assert names(router.route('gpt-4', 'openai', ['claude'])) == ['openai', 'claude']
+
+    observe('router-test-claude-1', 0.3, 100)
+    assert names(router.route('gpt-4', 'openai', ['claude'])) == ['claude', 'openai']
+    assert router.stats()['claude']['routed'] == 1
+
+def test_error_rate_and_cost_count_against_a_provider():
+    """Test that a fast provider loses to a slower one when it fails often or costs much more."""
+    router = ProviderRouter({
+        'openai': FakeProvider('openai', 'router-test-openai-2'),
+        'claude': FakeProvider('claude', 'router-test-claude-2'),
+    }, min_samples=5, error_penalty=4, stickiness=0.1)
+    observe('router-test-openai-2', 0.5, 6, failures=4)
+    observe('router-test-claude-2', 0.8, 10)
+    assert names(router.route('gpt-4', 'openai', ['claude'])) == ['claude', 'openai']
+
+    router = ProviderRouter({
+        'openai': FakeProvider('openai', 'router-test-openai-3', cost=0.1),
+        'claude': FakeProvider('claude', 'router-test-claude-3', cost=0.001),
+    }, min_samples=5, cost_weight=10, stickiness=0.1)
+    observe('router-test-openai-3', 0.5, 10)
+    observe('router-test-claude-3', 0.8, 10)
+    assert names(router.route('gpt-4', 'openai', ['claude'])) == ['claude', 'openai']
+
+def test_open_circuit_moves_provider_last_and_unconfigured_ones_are_skipped():
+    """Test that an unavailable provider is tried last and missing providers are left out."""
+    router = ProviderRouter({
+        'openai': FakeProvider('openai', 'router-test-openai-4'),
+        'claude': FakeProvider('claude', 'router-test-claude-4'),
+    })
+    breaker = get_circuit_breaker('router-test-openai-4')
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert names(router.route('gpt-4', 'openai', ['claude'])) == ['claude', 'openai']
+    assert names(router.route('gpt-4', 'claude', ['gemini'])) == ['claude']
+    assert names(router.route('gpt-4')) == ['claude', 'openai']
+
+def test_claude_payload_and_errors():
+    """Test that OpenAI-style messages map onto the Messages API and 5xx errors count as upstream failures."""
+    payload = ClaudeProvider._payload([
+        {'role': 'system', 'content': 'You are a guru.'},
+        {'role': 'system', 'content': 'User context: {}'},
+        {'role': 'user', 'content': 'What is karma?'},
+    ], 'claude-3-haiku-20240307', 0.7, 400)
+    assert payload['system'] == 'You are a guru.\n\nUser context: {}'
+    assert payload['messages'] == [{'role': 'user', 'content': 'What is karma?'}]
+    assert ClaudeProvider('key').model_for('gpt-4') != 'gpt-4'
+
+    assert is_upstream_failure(ProviderHTTPError('claude', 529, 'overloaded'))
+    assert not is_upstream_failure(ProviderHTTPError('claude', 400, 'bad request'))
@@ -0,0 +1,75 @@
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from backend.services.rate_limiter import (
+    Bucket, MemoryRateLimitBackend, RateLimiter, RedisRateLimitBackend, request_user_id
+)
+
+@pytest.fixture
+def limiter():
+    return RateLimiter(
+        backend=MemoryRateLimitBackend(),
+        workflow_limits={'yoga': {'per_hour': 3, 'per_day': 5}},
+        requests_per_minute=60, burst=10,
+    )
+
+def test_workflow_limit_rejects_with_retry_after(limiter):
+    """Test that the per-guru hourly limit sheds the fourth request with a Retry-After."""
+    decisions = [limiter.check('yoga', '10.0.0.1') for _ in range(4)]
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    rejected = decisions[-1]
+    assert rejected.limit == 'workflow:per_hour'
+    assert rejected.headers()['Retry-After'] == '1200'
+    assert rejected.headers()['X-RateLimit-Remaining'] == '0'
+    assert limiter.stats()['rejected'] == 1
+
+def test_limits_are_keyed_by_user_and_guru(limiter):
+    """Test that other users and other gurus keep their own workflow budget."""
+    for _ in range(3):
+        limiter.check('yoga', '10.0.0.1', user_id='a')
+    assert not limiter.check('yoga', '10.0.0.1', user_id='a').allowed
+    assert limiter.check('yoga', '10.0.0.1', user_id='b').allowed
+    assert limiter.check('karma', '10.0.0.1', user_id='a').allowed
+
+def test_api_burst_applies_per_ip_and_rejections_cost_nothing(limiter):
+    """Test the per-IP burst, and that a rejected request does not drain other buckets."""
+    backend = limiter.backend
+    buckets = [Bucket('api:ip', 2, 1.0, 'api'), Bucket('other', 100, 1.0, 'other')]
+    assert backend.acquire(buckets).allowed and backend.acquire(buckets).allowed
+    rejected = backend.acquire(buckets)
+    assert not rejected.allowed and rejected.limit == 'api'
+    assert 0 < rejected.retry_after <= 1
+    assert backend.acquire([buckets[1]]).remaining == pytest.approx(97, abs=0.1)
+
+class FailingRedis:
+    """Redis stand-in whose scripts always fail, as during an outage."""
+    def register_script(self, script):
+        def run(keys, args):
+            raise ConnectionError('redis is down')
+        return run
+
+def test_redis_outage_falls_back_to_process_buckets():
+    """Test that a Redis failure still enforces limits with the in-process buckets."""
+    backend = RedisRateLimitBackend(FailingRedis())
+    limiter = RateLimiter(backend=backend, workflow_limits={}, requests_per_minute=60, burst=1)
+    assert limiter.check(None, '10.0.0.1').allowed
+    assert not limiter.check(None, '10.0.0.1').allowed
+    assert backend.errors == 1
+    assert limiter.stats()['backend'] == 'redis'
+
+def test_user_bucket_comes_from_the_jwt_not_the_body():
+    """Test that only a valid token's subject identifies the user; anything else is limited by IP."""
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret'
+    JWTManager(app)
+    with app.app_context():
+        token = create_access_token(identity='seeker-1')
+
+    with app.test_request_context(headers={'Authorization': f'Bearer {token}'}, json={'user_id': 'other'}):
+        assert request_user_id() == 'seeker-1'
+    with app.test_request_context(json={'user_id': 'other'}):
+        assert request_user_id() is None
+    with app.test_request_context(headers={'Authorization': 'Bearer forged'}):
+        assert request_user_id() is None
+    with Flask(__name__).test_request_context(headers={'Authorization': f'Bearer {token}'}):
+        assert request_user_id() is None
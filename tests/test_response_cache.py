@@ -0,0 +1,53 @@
+import asyncio
+import time
+from backend.services.response_cache import ResponseCache, normalize_question, response_cache_key
+
+def test_normalized_questions_share_a_key():
+    """Test that case, spacing and trailing punctuation do not change the cache key."""
+    assert normalize_question('  What is   KARMA?? ') == 'what is karma'
+    key = response_cache_key('gpt-4', 'prompt', 0.7, 800, 'What is karma?')
+    assert response_cache_key('gpt-4', 'prompt', 0.7, 800, 'what is karma') == key
+    assert response_cache_key('gpt-4', 'prompt', 0.5, 800, 'What is karma?') != key
+    assert response_cache_key('gpt-4', 'prompt', 0.7, 800, 'What is karma?', user_context={'level': 1}) != key
+
+def test_lru_eviction_and_ttl():
+    """Test that the memory tier evicts least recently used entries and expires old ones."""
+    cache = ResponseCache(max_entries=2, ttl=60)
+    cache.set('a', {'response': 'A'})
+    cache.set('b', {'response': 'B'})
+    assert cache.get('a') == {'response': 'A'}
+    cache.set('c', {'response': 'C'})
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+
+    cache.set('short', {'response': 'S'}, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('short') is None
+
+    stats = cache.stats()
+    assert stats['evictions'] >= 1 and stats['expirations'] == 1
+    assert stats['hits'] == 2 and stats['misses'] == 2
+    assert stats['hit_rate'] == 0.5
+
+class FakeRedis:
+    """Minimal stand-in for the two Redis commands the cache uses."""
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+def test_redis_tier_is_shared_between_processes():
+    """Test that a second process-level cache is filled from the shared Redis tier."""
+    shared = FakeRedis()
+    first, second = ResponseCache(), ResponseCache()
+    first._redis = second._redis = shared
+
+    asyncio.run(first.aset('key', {'response': 'shared'}))
+    assert asyncio.run(second.aget('key')) == {'response': 'shared'}
+    assert second.stats()['redis_hits'] == 1
+    assert second.get('key') == {'response': 'shared'}
+    assert second.stats()['memory_hits'] == 1
@@ -0,0 +1,68 @@
+import time
+import pytest
+
+pytest.importorskip('numpy')
+
+from backend.services.semantic_cache import SemanticCache, embed_question, question_terms
+
+def similarity(first, second):
+    return float(embed_question(first) @ embed_question(second))
+
+def test_paraphrases_are_close_and_different_topics_are_not():
+    """Test that filler wording is ignored while the subject and negations are not."""
+    assert question_terms('How can I be peaceful?') == ['peace']
+    assert similarity('How do I find peace?', 'how can I be peaceful') > 0.99
+    assert similarity('What is karma?', 'explain karma to me') > 0.99
+    assert similarity('How do I find peace?', 'how do I find love') < 0.5
+    assert similarity('What is karma?', 'what is dharma') < 0.5
+    assert similarity('Should I leave my job?', "shouldn't I leave my job") < 0.85
+    assert embed_question('What is it?') is None
+
+@pytest.mark.parametrize('first, second', [
+    ('Who is Krishna?', 'Where is Krishna?'),
+    ('Why do we suffer?', 'How do we suffer?'),
+    ('What is suffering?', 'Why is there suffering?'),
+    ('When should I meditate?', 'Why should I meditate?'),
+    ('How should I meditate?', 'Should I meditate?'),
+    ('Can I eat meat?', 'Should I eat meat?'),
+])
+def test_different_kinds_of_question_do_not_match(first, second):
+    """Test that questions about the same subject asking different things never share an answer."""
+    assert similarity(first, second) < 0.85
+    cache = SemanticCache(threshold=0.85)
+    cache.add('guru', first, 'answer')
+    assert cache.lookup('guru', second) is None
+
+def test_lookup_is_scoped_to_a_namespace():
+    """Test that a paraphrase hits within its namespace only and reports the similarity."""
+    cache = SemanticCache(threshold=0.85)
+    cache.add('meditation', 'How do I meditate?', {'response': 'Sit and breathe.'})
+
+    value, score = cache.lookup('meditation', 'how to meditate')
+    assert value == {'response': 'Sit and breathe.'} and score > 0.99
+    assert cache.lookup('meditation', 'how do I deal with anger') is None
+    assert cache.lookup('karma', 'how to meditate') is None
+
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 2 and stats['entries'] == 1
+
+def test_entries_and_namespaces_are_bounded():
+    """Test LRU eviction of entries and namespaces, and TTL expiry."""
+    cache = SemanticCache(max_entries=2, max_namespaces=2, ttl=60)
+    cache.add('guru', 'karma', 'K')
+    cache.add('guru', 'dharma', 'D')
+    cache.lookup('guru', 'karma')
+    cache.add('guru', 'moksha', 'M')
+    assert cache.lookup('guru', 'dharma') is None
+    assert cache.lookup('guru', 'karma')[0] == 'K'
+    assert cache.stats()['evictions'] == 1
+
+    cache.add('other', 'karma', 'K2')
+    cache.add('third', 'karma', 'K3')
+    assert cache.lookup('guru', 'karma') is None
+    assert cache.stats()['namespaces'] == 2
+
+    cache.add('third', 'samsara', 'S', ttl=0.01)
+    time.sleep(0.02)
+    assert cache.lookup('third', 'samsara') is None
+    assert cache.stats()['expirations'] == 1
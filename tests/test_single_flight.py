@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from backend.services.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    """Test that identical concurrent calls run the work once and all get the result."""
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {'response': 'Be still.'}
+
+    async def main():
+        results = await asyncio.gather(*(flight.do('q', work) for _ in range(5)))
+        other = await flight.do('other', work)
+        return results, other
+
+    results, other = asyncio.run(main())
+    assert len(calls) == 2
+    assert [shared for _, shared in results].count(False) == 1
+    assert all(result == {'response': 'Be still.'} for result, _ in results)
+    assert other == ({'response': 'Be still.'}, False)
+    assert flight.stats()['shared_calls'] == 4 and flight.stats()['in_flight_calls'] == 0
+
+def test_errors_reach_every_caller_and_are_not_remembered():
+    """Test that a failure is raised to all joined callers and the next call runs again."""
+    flight = SingleFlight()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError('rate limited')
+
+    async def main():
+        results = await asyncio.gather(*(flight.do('q', failing) for _ in range(3)), return_exceptions=True)
+        with pytest.raises(RuntimeError):
+            await flight.do('q', failing)
+        return results
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(attempts) == 2
+
+def test_late_stream_subscriber_replays_earlier_chunks():
+    """Test that a subscriber joining mid-stream receives every chunk from the start."""
+    flight = SingleFlight()
+    started = []
+
+    async def chunks():
+        started.append(1)
+        for word in ['Act', ' without', ' attachment.']:
+            await asyncio.sleep(0.01)
+            yield word
+
+    async def collect(delay):
+        await asyncio.sleep(delay)
+        return [chunk async for chunk in flight.stream('q', chunks)]
+
+    async def main():
+        return await asyncio.gather(collect(0), collect(0.015))
+
+    first, late = asyncio.run(main())
+    assert first == late == ['Act', ' without', ' attachment.']
+    assert len(started) == 1
+    assert flight.stats()['joined_streams'] == 1
+
+def test_stream_is_cancelled_when_all_subscribers_leave():
+    """Test that the upstream stream is closed once nobody is listening."""
+    flight = SingleFlight()
+    closed = []
+
+    async def endless():
+        try:
+            while True:
+                await asyncio.sleep(0.005)
+                yield 'om'
+        finally:
+            closed.append(1)
+
+    async def main():
+        subscriber = flight.stream('q', endless)
+        assert await subscriber.__anext__() == 'om'
+        await subscriber.aclose()
+        await asyncio.sleep(0.02)
+
+    asyncio.run(main())
+    assert closed == [1]
+    assert flight.stats()['cancelled'] == 1 and flight.stats()['in_flight_streams'] == 0
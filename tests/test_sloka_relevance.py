@@ -0,0 +1,40 @@
+import pytest
+from backend.services.sloka_relevance import get_relevance_engine
+from backend.models.slokas_database import sloka_db
+
+@pytest.fixture
+def engine():
+    """The relevance engine for the bundled corpus."""
+    return get_relevance_engine()
+
+def test_question_matches_relevant_sloka(engine):
+    """Test that a question about duty and results finds Bhagavad Gita 2.47."""
+    matches = engine.top_k('What is my duty if I must let go of the fruits of my action?', k=3)
+    assert matches
+    assert 'BG_2_47' in [sloka['id'] for sloka, _score in matches]
+    scores = [score for _sloka, score in matches]
+    assert scores == sorted(scores, reverse=True)
+
+def test_batch_matches_single_questions(engine):
+    """Test that batch scoring returns the same matches as scoring questions one by one."""
+    questions = ['How do I find peace of mind?', 'What is devotion to God?', 'zzzz qqqq']
+    batch = engine.top_k_batch(questions, k=2)
+    assert len(batch) == len(questions)
+    for question, matches in zip(questions, batch):
+        assert [sloka['id'] for sloka, _ in matches] == [sloka['id'] for sloka, _ in engine.top_k(question, k=2)]
+    assert batch[2] == []
+
+def test_guru_filter_and_engine_reuse(engine):
+    """Test that guru filtering restricts candidates and the engine is cached per version."""
+    matches = engine.top_k('love and devotion', k=5, guru='bhakti_guru')
+    assert all(sloka['guru_assignment'] == 'bhakti_guru' for sloka, _ in matches)
+    assert get_relevance_engine() is engine
+    assert engine.version == sloka_db.version
+
+def test_unknown_guru_matches_nothing_and_is_not_cached(engine):
+    """Test that a guru no sloka is assigned to gets no matches without adding a cached mask."""
+    cached = set(engine._guru_masks)
+    assert engine.top_k('love and devotion', k=5, guru='no_such_guru') == []
+    assert set(engine._guru_masks) == cached
+    assert engine.top_k('love and devotion', k=5, guru=['bhakti_guru']) == []
+    assert sloka_db.snapshot.has_guru('bhakti_guru') and not sloka_db.snapshot.has_guru('no_such_guru')
@@ -0,0 +1,62 @@
+import pytest
+from backend.models.sloka_search import SlokaSearchIndex, fold_text, parse_query, stem
+
+SLOKAS = [
+    {
+        "translation": "Perform your duty without attachment to results",
+        "transliteration": "karmaṇy evādhikāras te",
+        "meaning": "Selfless action purifies the heart",
+        "related_concepts": ["selfless_service", "detachment"]
+    },
+    {
+        "translation": "The soul is eternal and never dies",
+        "meaning": "Peace comes from knowing your eternal nature",
+        "related_concepts": ["eternal_soul", "peace"]
+    },
+    {
+        "translation": "Love and devotion lead to peace",
+        "meaning": "Devotional love is the path of the heart",
+        "related_concepts": ["divine_love", "devotion"]
+    }
+]
+
+@pytest.fixture
+def search_index():
+    return SlokaSearchIndex(SLOKAS)
+
+def test_fold_text_removes_iast_diacritics():
+    """Test that IAST transliteration folds to plain ASCII."""
+    assert fold_text("Karmaṇy Evādhikāras") == "karmany evadhikaras"
+
+@pytest.mark.parametrize('word, expected', [
+    ('slokas', 'sloka'),
+    ('peaceful', 'peace'),
+    ('running', 'run'),
+    ('detachment', 'detach'),
+    ('selfless', 'selfless')
+])
+def test_stem(word, expected):
+    assert stem(word) == expected
+
+def test_parse_query_clauses():
+    """Test that terms are AND-ed and OR separates clauses."""
+    assert parse_query("eternal soul OR divine love") == [["eternal", "soul"], ["divine", "love"]]
+    assert parse_query("eternal soul", mode="or") == [["eternal"], ["soul"]]
+    assert parse_query("the and of") == []
+
+def test_search_matches_unaccented_transliteration(search_index):
+    """Test that "karmany" finds the verse transliterated as "karmaṇy"."""
+    assert [position for position, _ in search_index.search("karmany")] == [0]
+
+def test_search_and_or(search_index):
+    """Test multi-term AND and OR queries."""
+    assert [position for position, _ in search_index.search("eternal peace")] == [1]
+    assert sorted(position for position, _ in search_index.search("eternal OR devotion")) == [1, 2]
+    assert sorted(position for position, _ in search_index.search("soul love", mode="or")) == [1, 2]
+    assert search_index.search("soul devotion") == []
+
+def test_search_limit_returns_best_matches(search_index):
+    """Test that limited results are the top of the full ranking."""
+    full = search_index.search("peace OR love")
+    assert search_index.search("peace OR love", limit=2) == full[:2]
+    assert [score for _, score in full] == sorted((score for _, score in full), reverse=True)
@@ -0,0 +1,201 @@
+import pytest
+from backend.models.slokas_database import SlokaDatabase
+
+@pytest.fixture
+def sloka_database():
+    """A database loaded from the bundled comprehensive slokas file."""
+    return SlokaDatabase()
+
+def test_get_sloka_by_id(sloka_database):
+    """Test looking up a sloka by its ID."""
+    sloka = sloka_database.get_sloka_by_id('BG_2_47')
+    assert sloka['source'] == 'Bhagavad Gita Chapter 2, Verse 47'
+    assert sloka_database.get_sloka_by_id('missing') is None
+
+def test_indexed_lookups_match_scans(sloka_database):
+    """Test that indexed lookups return the same slokas, in order, as a full scan."""
+    slokas = sloka_database.slokas_data['slokas']
+
+    for category in {sloka['category'] for sloka in slokas}:
+        expected = [sloka for sloka in slokas if sloka['category'] == category]
+        assert sloka_database.get_slokas_by_category(category) == expected
+
+    for guru in {sloka['guru_assignment'] for sloka in slokas}:
+        expected = [sloka for sloka in slokas if sloka['guru_assignment'] == guru]
+        assert sloka_database.get_slokas_by_guru(guru) == expected
+
+@pytest.mark.parametrize('source', ['Bhagavad Gita', 'upanishad', 'Tradition', '1.', 'unknown text'])
+def test_source_lookup_matches_substrings(sloka_database, source):
+    """Test that source lookups keep case-insensitive substring semantics."""
+    slokas = sloka_database.slokas_data['slokas']
+    expected = [sloka for sloka in slokas if source.lower() in sloka['source'].lower()]
+    assert sloka_database.get_slokas_by_source(source) == expected
+    # Memoized lookups return the same result
+    assert sloka_database.get_slokas_by_source(source) == expected
+
+def test_formatted_sloka_is_memoized(sloka_database):
+    """Test that repeated renderings reuse the cached string for the current version."""
+    first = sloka_database.get_formatted_sloka('BG_2_47')
+    assert 'Bhagavad Gita Chapter 2, Verse 47' in first
+    assert sloka_database.get_formatted_sloka('BG_2_47') is first
+    assert (sloka_database.version, 'BG_2_47') in sloka_database.snapshot._render_cache
+
+def test_formatted_sloka_cache_evicts_least_recently_used(sloka_database, monkeypatch):
+    """Test that a rendering read again is kept over one rendered later but not reused."""
+    from backend.models import slokas_database
+    monkeypatch.setattr(slokas_database, 'RENDER_CACHE_SIZE', 2)
+    snapshot = sloka_database.snapshot
+    snapshot._render_cache.clear()
+    first, second, third = [sloka['id'] for sloka in sloka_database.slokas_data['slokas'][:3]]
+
+    snapshot.get_formatted_sloka(first)
+    snapshot.get_formatted_sloka(second)
+    snapshot.get_formatted_sloka(first)
+    snapshot.get_formatted_sloka(third)
+    assert [sloka_id for _, sloka_id in snapshot._render_cache] == [first, third]
+
+def test_daily_sloka_is_deterministic(sloka_database):
+    """Test that a date always maps to the same sloka, across instances too."""
+    from datetime import date
+    day = date(2025, 6, 13)
+    sloka = sloka_database.get_daily_sloka(for_date=day)
+    assert sloka_database.get_daily_sloka(for_date=day) is sloka
+    assert SlokaDatabase().get_daily_sloka(for_date=day)['id'] == sloka['id']
+
+def test_daily_sloka_survives_a_content_reload(tmp_path):
+    """Test that editing a verse keeps the day's sloka, which clients may have cached until tomorrow."""
+    import json
+    import shutil
+    database_file = tmp_path / 'slokas.json'
+    shutil.copy(SlokaDatabase().database_file, database_file)
+    database = SlokaDatabase(database_file)
+    before = {guru: database.get_daily_sloka(guru=guru)['id'] for guru in [None, 'bhakti_guru']}
+
+    corpus = json.loads(database_file.read_text())
+    corpus['slokas'][0]['translation'] += ' (revised)'
+    database_file.write_text(json.dumps(corpus))
+    assert database.reload()
+    assert {guru: database.get_daily_sloka(guru=guru)['id'] for guru in before} == before
+
+def test_daily_sloka_for_guru(sloka_database):
+    """Test that per-guru daily slokas come from that guru's assignments."""
+    sloka = sloka_database.get_daily_sloka(guru='bhakti_guru')
+    assert sloka['guru_assignment'] == 'bhakti_guru'
+    assert sloka_database.get_daily_sloka(guru='unknown_guru') is None
+
+def test_reload_swaps_snapshot_when_file_changes(tmp_path):
+    """Test that reload picks up new content and ignores unchanged or broken files."""
+    import json
+    database_file = tmp_path / 'slokas.json'
+    sloka = {'id': 'ONE', 'source': 'Test Source', 'category': 'test', 'guru_assignment': 'karma_guru'}
+    database_file.write_text(json.dumps({'metadata': {}, 'slokas': [sloka]}), encoding='utf-8')
+
+    sloka_database = SlokaDatabase(database_file)
+    original = sloka_database.snapshot
+    assert sloka_database.reload() is False
+
+    database_file.write_text(json.dumps({'metadata': {}, 'slokas': [sloka, dict(sloka, id='TWO')]}), encoding='utf-8')
+    assert sloka_database.reload(force=True) is True
+    assert sloka_database.snapshot is not original
+    assert sloka_database.version != original.version
+    assert sloka_database.get_sloka_by_id('TWO')['id'] == 'TWO'
+    assert sloka_database.last_reload['previous_version'] == original.version
+    assert sloka_database.last_reload['duration_ms'] >= 0
+
+    # A half-written file keeps the current snapshot
+    current = sloka_database.snapshot
+    database_file.write_text('{"slokas": [', encoding='utf-8')
+    assert sloka_database.reload(force=True) is False
+    assert sloka_database.snapshot is current
+    assert sloka_database.last_reload['success'] is False
+
+def test_mmap_backend_matches_json_backend(tmp_path):
+    """Test that the compiled memory-mapped store serves the same slokas as the JSON file."""
+    import shutil
+    from backend.models.sloka_store import compile_corpus, MappedSlokaStore
+    database_file = tmp_path / 'slokas.json'
+    shutil.copy(SlokaDatabase().database_file, database_file)
+
+    # Without a compiled store the mmap backend falls back to parsing JSON
+    assert SlokaDatabase(database_file, backend='mmap').version == SlokaDatabase(database_file).version
+
+    store = MappedSlokaStore(compile_corpus(database_file))
+    json_database = SlokaDatabase(database_file, backend='json')
+    mmap_database = SlokaDatabase(database_file, backend='mmap')
+
+    assert list(store) == json_database.slokas_data['slokas']
+    assert mmap_database.version == json_database.version
+    assert mmap_database.get_sloka_by_id('BG_2_47') == json_database.get_sloka_by_id('BG_2_47')
+    assert mmap_database.get_formatted_sloka('BG_2_47') == json_database.get_formatted_sloka('BG_2_47')
+    assert mmap_database.search_slokas('duty') == json_database.search_slokas('duty')
+    assert mmap_database.get_database_stats() == json_database.get_database_stats()
+    store.close()
+
+def test_cursor_pagination_walks_the_corpus(sloka_database):
+    """Test that following next_cursor visits every sloka exactly once, in order."""
+    slokas = list(sloka_database.slokas_data['slokas'])
+    assert sloka_database.snapshot.total_slokas == len(slokas)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = sloka_database.get_slokas_page(cursor, limit=7)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert seen == slokas
+    assert list(sloka_database.iter_slokas(slokas[2]['id'])) == slokas[3:]
+
+    with pytest.raises(ValueError):
+        sloka_database.iter_slokas('missing')
+
+def test_precomputed_stats_match_full_scan(sloka_database):
+    """Test that load-time statistics equal counts taken over the whole corpus."""
+    from collections import Counter
+    slokas = list(sloka_database.slokas_data['slokas'])
+    stats = sloka_database.get_database_stats()
+
+    assert stats['total_slokas'] == len(slokas)
+    assert stats['categories'] == Counter(sloka.get('category', 'unknown') for sloka in slokas)
+    assert stats['guru_assignments'] == Counter(sloka.get('guru_assignment', 'unassigned') for sloka in slokas)
+    assert stats['sources'] == Counter(sloka.get('source', 'unknown') for sloka in slokas)
+    assert sloka_database.get_database_stats() is stats
+
+def test_sharded_backend_loads_shards_on_demand(tmp_path):
+    """Test that shards load on first access and stay within the LRU byte budget."""
+    import shutil
+    from backend.models.sloka_shards import build_shards, ShardedSlokaStore
+    database_file = tmp_path / 'slokas.json'
+    shutil.copy(SlokaDatabase().database_file, database_file)
+    json_database = SlokaDatabase(database_file)
+
+    manifest_path = build_shards(database_file)
+    sharded_database = SlokaDatabase(database_file, backend='sharded')
+    store = sharded_database.snapshot.slokas
+    assert sharded_database.version == json_database.version
+    assert sharded_database.get_database_stats()['categories'] == json_database.get_database_stats()['categories']
+    assert store.cache_info()['loaded_shards'] == []
+
+    assert sharded_database.get_sloka_by_id('BG_2_47') == json_database.get_sloka_by_id('BG_2_47')
+    assert store.cache_info()['loaded_shards'] == ['Bhagavad Gita']
+
+    small = ShardedSlokaStore(manifest_path, cache_bytes=1)
+    assert list(small) == json_database.slokas_data['slokas']
+    assert len(small.cache_info()['loaded_shards']) == 1
+
+def test_sharded_backend_keeps_corpus_positions(tmp_path):
+    """Test that grouping by source does not move slokas, so one version means the same daily sloka and cursors."""
+    import shutil
+    from backend.models.sloka_shards import build_shards
+    database_file = tmp_path / 'slokas.json'
+    shutil.copy(SlokaDatabase().database_file, database_file)
+    json_database = SlokaDatabase(database_file)
+    build_shards(database_file)
+    sharded_database = SlokaDatabase(database_file, backend='sharded')
+
+    assert sharded_database.version == json_database.version
+    assert list(sharded_database.snapshot.slokas) == json_database.slokas_data['slokas']
+    assert sharded_database.get_slokas_page(limit=5) == json_database.get_slokas_page(limit=5)
+    for guru in [None, 'sloka_guru', 'meditation_guru']:
+        expected = json_database.get_daily_sloka(guru=guru)
+        assert expected is not None
+        assert sharded_database.get_daily_sloka(guru=guru) == expected
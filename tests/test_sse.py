@@ -0,0 +1,34 @@
+import asyncio
+from backend.utils.sse import sse_event, sse_response, sse_stream
+
+def test_sse_event_format():
+    """Test that events are framed as SSE lines, with JSON for non-string data."""
+    assert sse_event({'chunk': 'Om'}) == 'data: {"chunk": "Om"}\n\n'
+    assert sse_event('[DONE]') == 'data: [DONE]\n\n'
+    assert sse_event('a\nb', event='error', event_id='7') == 'id: 7\nevent: error\ndata: a\ndata: b\n\n'
+
+def test_sse_stream_flushes_chunks_with_heartbeats_and_cancels_on_close():
+    """Test that chunks are rendered as they arrive, idle gaps send heartbeats and closing cancels the source."""
+    cancelled = []
+
+    async def tokens():
+        yield 'Peace'
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        yield 'never'
+
+    events = sse_stream(tokens(), lambda chunk: sse_event({'chunk': chunk}), heartbeat=0.02)
+    assert next(events) == 'data: {"chunk": "Peace"}\n\n'
+    assert next(events) == ': heartbeat\n\n'
+    events.close()
+    assert cancelled == [True]
+
+def test_sse_response_disables_buffering():
+    """Test that responses are event streams that caches and proxies must not buffer."""
+    response = sse_response(iter(['data: x\n\n']))
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert response.headers['X-Accel-Buffering'] == 'no'
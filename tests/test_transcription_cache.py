@@ -0,0 +1,49 @@
+import os
+import time
+from backend.services.transcription_cache import (
+    TranscriptionCache, audio_sha256, transcription_cache_key
+)
+
+def test_key_follows_audio_content_and_whisper_options(tmp_path):
+    """Test that renamed copies share a key and any option that changes Whisper's output does not."""
+    original, copy, other = tmp_path / 'talk.mp3', tmp_path / 'talk (1).mp3', tmp_path / 'chant.mp3'
+    original.write_bytes(b'\x01' * 3000)
+    copy.write_bytes(b'\x01' * 3000)
+    other.write_bytes(b'\x02' * 3000)
+
+    digest = audio_sha256(str(original), block_size=1024)
+    assert digest == audio_sha256(str(copy)) != audio_sha256(str(other))
+    key = transcription_cache_key(digest, 'base', 'en', True)
+    assert key == transcription_cache_key(audio_sha256(str(copy)), 'base', 'en', True)
+    assert key != transcription_cache_key(digest, 'small', 'en', True)
+    assert key != transcription_cache_key(digest, 'base', None, True)
+    assert key != transcription_cache_key(digest, 'base', 'en', False)
+
+def test_results_round_trip_and_count_hits(tmp_path):
+    """Test that stored results are served from disk, including to another process's cache instance."""
+    cache = TranscriptionCache(str(tmp_path / 'cache'))
+    result = {'text': 'Om shanti', 'language': 'sa', 'segments': [{'start': 0.0, 'end': 2.5, 'text': 'Om shanti'}]}
+
+    assert cache.get('a' * 64) is None
+    cache.set('a' * 64, result)
+    assert cache.get('a' * 64) == result
+    assert TranscriptionCache(str(tmp_path / 'cache')).get('a' * 64) == result
+
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['hit_rate'] == 0.5
+    assert stats['bytes'] > 0
+
+def test_least_recently_used_entries_are_evicted_beyond_the_size_budget(tmp_path):
+    """Test that writes past max_bytes delete the entries that were used longest ago."""
+    cache = TranscriptionCache(str(tmp_path / 'cache'), max_bytes=2500)
+    payload = {'text': 'x' * 1000}
+    for n, key in enumerate(['a' * 64, 'b' * 64]):
+        cache.set(key, payload)
+        past = time.time() - 100 + n
+        os.utime(cache._path(key), (past, past))
+    assert cache.get('a' * 64) == payload  # now the most recently used
+
+    cache.set('c' * 64, payload)
+    assert cache.get('b' * 64) is None
+    assert cache.get('a' * 64) == payload and cache.get('c' * 64) == payload
+    assert cache.stats()['evictions'] == 1 and cache.stats()['bytes'] <= 2500
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import threading
+import time
+import pytest
+from backend.services.transcription_jobs import (
+    JobQueueFullError, JobStore, TranscriptionJobQueue
+)
+
+def wait_for(queue, job_id, *statuses, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job stayed {job['status']}")
+
+@pytest.fixture
+def upload(tmp_path):
+    def make(name='talk.wav'):
+        path = tmp_path / name
+        path.write_bytes(b'RIFF')
+        return str(path)
+    return make
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(runner, **options):
+        options.setdefault('poll_interval', 0.01)
+        options.setdefault('retry_delay', 0)
+        queue = TranscriptionJobQueue(JobStore(str(tmp_path / 'jobs.db')), runner, **options)
+        queues.append(queue)
+        return queue
+    yield make
+    for queue in queues:
+        queue.stop()
+
+def test_job_runs_in_background_and_removes_its_upload(make_queue, upload):
+    """Test that a submitted job reports progress, stores its result and deletes the audio file."""
+    def runner(job, progress, cancelled, publish):
+        progress(0.5, 'transcribing')
+        return {'success': True, 'transcription': {'text': job['options']['language']}}
+
+    queue = make_queue(runner)
+    queue.start()
+    path = upload()
+    job = queue.submit(path, 'talk.wav', 4, {'language': 'en'})
+    assert job['status'] in ('queued', 'running')
+
+    done = wait_for(queue, job['id'], 'succeeded')
+    assert done['progress'] == 1.0 and done['attempts'] == 1
+    assert queue.result(job['id'])['result']['transcription']['text'] == 'en'
+    assert not os.path.exists(path)
+
+def test_failed_attempts_are_retried_unless_permanent(make_queue, upload):
+    """Test that transient errors are retried up to max_attempts and permanent ones fail at once."""
+    calls = []
+
+    def runner(job, progress, cancelled, publish):
+        calls.append(job['filename'])
+        if job['filename'] == 'missing.wav':
+            return {'success': False, 'error': 'not found', 'error_type': 'FileNotFoundError'}
+        if calls.count(job['filename']) < 2:
+            raise RuntimeError('model crashed')
+        return {'success': True}
+
+    queue = make_queue(runner, max_attempts=3)
+    queue.start()
+    flaky = queue.submit(upload('flaky.wav'), 'flaky.wav', 4, {})
+    missing = queue.submit(upload('missing.wav'), 'missing.wav', 4, {})
+
+    assert wait_for(queue, flaky['id'], 'succeeded')['attempts'] == 2
+    failed = wait_for(queue, missing['id'], 'failed')
+    assert failed['attempts'] == 1 and failed['error_type'] == 'FileNotFoundError'
+    assert queue.stats()['retried'] == 1
+
+def test_cancel_queued_and_running_jobs(make_queue, upload):
+    """Test that queued jobs are cancelled at once and running jobs stop at their next progress report."""
+    started = threading.Event()
+
+    def runner(job, progress, cancelled, publish):
+        started.set()
+        while True:
+            progress(0.1, 'transcribing')
+            time.sleep(0.01)
+
+    queue = make_queue(runner, workers=1)
+    queue.start()
+    running = queue.submit(upload('a.wav'), 'a.wav', 4, {})
+    started.wait(5)
+    waiting = queue.submit(upload('b.wav'), 'b.wav', 4, {})
+
+    assert queue.cancel(waiting['id'])['status'] == 'cancelled'
+    assert queue.cancel(running['id'])['cancel_requested']
+    assert wait_for(queue, running['id'], 'cancelled')['attempts'] == 1
+    assert queue.cancel('unknown') is None
+
+def test_store_bounds_pending_jobs_and_requeues_lost_workers(tmp_path, upload):
+    """Test that the queue refuses work beyond max_pending and recovers jobs whose lease expired."""
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    first = store.create(upload(), 'talk.wav', 4, {}, max_attempts=2, max_pending=1)
+    with pytest.raises(JobQueueFullError):
+        store.create(upload(), 'talk.wav', 4, {}, max_attempts=2, max_pending=1)
+
+    assert store.claim('dead-worker', lease_seconds=-1)['id'] == first['id']
+    reclaimed = store.claim('live-worker', lease_seconds=60)
+    assert reclaimed['id'] == first['id'] and reclaimed['attempts'] == 2
+    assert not store.update(first['id'], 'dead-worker', progress=0.9)
+    assert store.update(first['id'], 'live-worker', progress=0.9)
+
+def test_events_follow_a_job_until_it_finishes(make_queue, upload):
+    """Test that subscribers see each state change and the stream ends with the final state."""
+    release = threading.Event()
+
+    def runner(job, progress, cancelled, publish):
+        progress(0.5, 'transcribing')
+        release.wait(5)
+        return {'success': True}
+
+    queue = make_queue(runner)
+    queue.start()
+    job = queue.submit(upload(), 'talk.wav', 4, {})
+
+    async def follow():
+        seen = []
+        async for state in queue.events(job['id'], interval=0.01):
+            seen.append((state['status'], state['stage']))
+            if state['stage'] == 'transcribing':
+                release.set()
+        return seen
+
+    seen = asyncio.run(follow())
+    assert ('running', 'transcribing') in seen
+    assert seen[-1] == ('succeeded', 'succeeded')
+
+def test_stream_publishes_partial_results_and_resets_on_retry(make_queue, upload):
+    """Test that readers get segments and analysis as they are published, and a reset when a retry starts over."""
+    seen_first_attempt = threading.Event()
+
+    def runner(job, progress, cancelled, publish):
+        publish('segment', {'id': 0, 'start': 0.0, 'end': 2.0, 'text': 'Breathe in'})
+        if job['attempts'] == 1:
+            seen_first_attempt.wait(5)
+            raise RuntimeError('worker crashed')
+        publish('analysis', {'total_phases': 1})
+        publish('segment', {'id': 1, 'start': 2.0, 'end': 4.0, 'text': 'Relax'})
+        publish('analysis', {'total_phases': 2})
+        return {'success': True}
+
+    queue = make_queue(runner, max_attempts=2)
+    queue.start()
+    job = queue.submit(upload(), 'talk.wav', 4, {'stream': True})
+
+    async def follow():
+        events = []
+        async for kind, data, seq in queue.stream(job['id'], interval=0.01):
+            events.append((kind, data, seq))
+            if kind == 'segment':
+                seen_first_attempt.set()
+        return events
+
+    events = asyncio.run(follow())
+    kinds = [kind for kind, _, _ in events]
+    assert kinds.index('segment') < kinds.index('reset') < kinds.index('analysis')
+    assert events[-1][0] == 'job' and events[-1][1]['status'] == 'succeeded'
+    seqs = [seq for _, _, seq in events if seq is not None]
+    assert seqs == sorted(seqs)
+
+    stored = queue.store.partials(job['id'])
+    assert [(p['kind'], p['data']) for p in stored] == [
+        ('segment', {'id': 0, 'start': 0.0, 'end': 2.0, 'text': 'Breathe in'}),
+        ('segment', {'id': 1, 'start': 2.0, 'end': 4.0, 'text': 'Relax'}),
+        ('analysis', {'total_phases': 2}),
+    ]
+    assert [p['kind'] for p in queue.store.partials(job['id'], after=stored[0]['seq'])] == ['segment', 'analysis']
+    assert not queue.store.publish(job['id'], queue.worker_id, 'segment', {})  # finished jobs take no more
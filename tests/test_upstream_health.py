@@ -0,0 +1,83 @@
+import asyncio
+import time
+import pytest
+from backend.services.upstream_health import CircuitBreaker, CircuitOpenError, hedged
+
+def fail(breaker, error=TimeoutError('upstream timed out')):
+    with pytest.raises(type(error)):
+        with breaker.attempt():
+            raise error
+
+def test_circuit_opens_after_consecutive_failures_and_fails_fast():
+    """Test that upstream failures open the circuit while client errors do not count."""
+    breaker = CircuitBreaker('gpt-4', failure_threshold=2, reset_timeout=60)
+    fail(breaker, ValueError('bad request'))
+    fail(breaker)
+    assert breaker.state == 'closed'
+    fail(breaker)
+    assert breaker.state == 'open'
+
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.attempt()
+    assert 0 < raised.value.retry_after <= 60
+    assert breaker.stats()['rejected'] == 1 and breaker.stats()['opened'] == 1
+
+def test_half_open_probe_closes_or_reopens_the_circuit():
+    """Test that after the reset timeout one probe is let through and decides the state."""
+    breaker = CircuitBreaker('gpt-4', failure_threshold=1, reset_timeout=0.01, half_open_probes=1)
+    fail(breaker)
+    time.sleep(0.02)
+
+    probe = breaker.attempt()
+    assert breaker.state == 'half_open'
+    with pytest.raises(CircuitOpenError):
+        breaker.attempt()
+    with pytest.raises(TimeoutError):
+        with probe:
+            raise TimeoutError()
+    assert breaker.state == 'open'
+
+    time.sleep(0.02)
+    with breaker.attempt():
+        pass
+    assert breaker.state == 'closed'
+    assert breaker.stats()['p50_ms'] is not None
+
+def test_hedged_request_returns_the_faster_attempt():
+    """Test that a slow call is raced by a second attempt after the hedge delay."""
+    breaker = CircuitBreaker('gpt-4')
+    delays = [1.0, 0.01]
+    cancelled = []
+
+    async def call():
+        delay = delays.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+
+    async def main():
+        started = time.monotonic()
+        result = await hedged(call, 0.02, breaker)
+        await asyncio.sleep(0)
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(main())
+    assert result == 0.01 and elapsed < 0.5
+    assert cancelled == [1.0]
+    assert breaker.stats()['hedges_sent'] == 1 and breaker.stats()['hedges_won'] == 1
+
+def test_hedged_request_survives_one_failed_attempt():
+    """Test that a failing attempt does not fail the call while the other can still succeed."""
+    outcomes = [0.05, 'error']
+
+    async def call():
+        outcome = outcomes.pop(0)
+        if outcome == 'error':
+            raise ConnectionError('reset')
+        await asyncio.sleep(outcome)
+        return 'ok'
+
+    assert asyncio.run(hedged(call, 0.01)) == 'ok'
@@ -0,0 +1,87 @@
+import asyncio
+import time
+import pytest
+from backend.services.upstream_scheduler import (
+    DeadlineExceededError, QueueFullError, UpstreamScheduler
+)
+
+def test_concurrency_is_bounded_per_model():
+    """Test that no more than the model's limit run at once while other models are unaffected."""
+    scheduler = UpstreamScheduler(max_concurrency=2, model_concurrency={'gpt-4': 1})
+    running = {'gpt-4': 0, 'gpt-3.5-turbo': 0}
+    peak = dict(running)
+
+    async def call(model):
+        async with scheduler.slot(model):
+            running[model] += 1
+            peak[model] = max(peak[model], running[model])
+            await asyncio.sleep(0.01)
+            running[model] -= 1
+
+    async def main():
+        await asyncio.gather(*(call('gpt-4') for _ in range(4)), *(call('gpt-3.5-turbo') for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == {'gpt-4': 1, 'gpt-3.5-turbo': 2}
+    assert scheduler.stats()['models']['gpt-4']['active'] == 0
+
+def test_high_priority_is_served_ahead_of_a_medium_surge():
+    """Test that queued high-priority calls get most slots while medium calls are not starved."""
+    scheduler = UpstreamScheduler(max_concurrency=1, weights={'high': 4, 'medium': 1})
+    order = []
+
+    async def call(priority):
+        async with scheduler.slot('gpt-4', priority):
+            order.append(priority)
+            await asyncio.sleep(0)
+
+    async def main():
+        await scheduler.acquire('gpt-4')  # occupy the only slot so everything queues
+        tasks = [asyncio.ensure_future(call('medium')) for _ in range(8)]
+        tasks += [asyncio.ensure_future(call('high')) for _ in range(8)]
+        await asyncio.sleep(0)
+        scheduler.release('gpt-4')
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order[:5].count('high') == 4 and 'medium' in order[:5]
+    assert sorted(order) == ['high'] * 8 + ['medium'] * 8
+
+def test_full_queue_and_deadline_shed_load():
+    """Test that a full queue rejects at once and a queued call is dropped at its deadline."""
+    scheduler = UpstreamScheduler(max_concurrency=1, max_queue_depth=1, queue_timeout=0.02)
+
+    async def main():
+        await scheduler.acquire('gpt-4')
+        waiting = asyncio.ensure_future(scheduler.acquire('gpt-4', 'high'))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            await scheduler.acquire('gpt-4', 'high')
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            await waiting
+        assert time.monotonic() - started < 0.5
+        scheduler.release('gpt-4')
+        await scheduler.acquire('gpt-4', deadline=time.monotonic() + 1)
+
+    asyncio.run(main())
+    stats = scheduler.stats()
+    assert stats['rejected_queue_full'] == 1 and stats['dropped_deadline'] == 1
+    assert stats['models']['gpt-4']['active'] == 1
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    """Test that cancelling a queued call frees its place and keeps the slot count right."""
+    scheduler = UpstreamScheduler(max_concurrency=1)
+
+    async def main():
+        await scheduler.acquire('gpt-4')
+        waiting = asyncio.ensure_future(scheduler.acquire('gpt-4'))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        scheduler.release('gpt-4')
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        await asyncio.wait_for(scheduler.acquire('gpt-4'), 1)
+
+    asyncio.run(main())
+    assert scheduler.stats()['models']['gpt-4'] == {'active': 1, 'limit': 1, 'queued': {'high': 0, 'medium': 0, 'low': 0}}
@@ -0,0 +1,124 @@
+import os
+import stat
+import threading
+import time
+import pytest
+from multiprocessing.connection import Listener
+from backend.services.whisper_workers import (
+    InferenceCancelledError, InferenceError, WhisperInferenceClient, WhisperInferencePool,
+    WorkerCrashedError, WorkerUnavailableError, serve
+)
+
+def fake_worker(conn, model_size, device, threads, warmup):
+    """Stands in for the Whisper worker process: echoes audio, or hangs, crashes or fails on request."""
+    conn.send(('ready', {'pid': os.getpid(), 'device': 'cpu', 'threads': threads}))
+    while True:
+        message = conn.recv()
+        if message is None:
+            return
+        task_id, audio, options = message
+        if audio == 'hang':
+            time.sleep(60)
+        elif audio == 'crash':
+            os._exit(1)
+        elif audio == 'boom':
+            conn.send((task_id, 'error', ('RuntimeError', 'ffmpeg failed')))
+        else:
+            conn.send((task_id, 'ok', {'text': audio, 'options': options, 'pid': os.getpid()}))
+
+@pytest.fixture
+def pool():
+    pool = WhisperInferencePool(workers=2, model_size='tiny', threads=2, target=fake_worker)
+    pool.start()
+    assert pool.wait_ready(30)
+    yield pool
+    pool.stop()
+
+def test_pool_spreads_transcriptions_over_preloaded_workers(pool):
+    """Test that ready workers serve transcriptions with their options and report their threads."""
+    futures = [pool.submit(f'talk-{n}.wav', language='en') for n in range(4)]
+    results = [future.result(10) for future in futures]
+
+    assert [result['text'] for result in results] == [f'talk-{n}.wav' for n in range(4)]
+    assert results[0]['options'] == {'language': 'en'}
+    stats = pool.stats()
+    assert stats['completed'] == 4 and stats['queued'] == 0
+    assert [worker['threads'] for worker in stats['workers']] == [2, 2]
+    assert pool.device == 'cpu'
+    with pytest.raises(InferenceError) as error:
+        pool.transcribe('boom')
+    assert error.value.error_type == 'RuntimeError'
+
+def test_cancel_and_crash_replace_the_worker(pool):
+    """Test that cancelling a running transcription or losing its process restarts that worker."""
+    calls = []
+
+    def cancelled():
+        calls.append(True)
+        return len(calls) > 1
+
+    with pytest.raises(InferenceCancelledError):
+        pool.transcribe('hang', cancelled=cancelled)
+    with pytest.raises(WorkerCrashedError):
+        pool.transcribe('crash')
+
+    assert pool.wait_ready(30)
+    assert pool.transcribe('after.wav')['text'] == 'after.wav'
+    stats = pool.stats()
+    assert stats['cancelled'] == 1 and stats['crashed'] == 1 and stats['restarts'] == 2
+    assert all(worker['alive'] for worker in stats['workers'])
+
+def test_client_uses_the_shared_pool_over_a_socket(pool, tmp_path):
+    """Test that web processes reach the host's pool through its Unix socket."""
+    address = str(tmp_path / 'whisper.sock')
+    threading.Thread(target=serve, args=(address, pool, b'secret'), daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not os.path.exists(address) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert stat.S_IMODE(os.stat(address).st_mode) == 0o600
+    client = WhisperInferenceClient(address, b'secret')
+    assert client.transcribe('talk.wav', word_timestamps=True)['options'] == {'word_timestamps': True}
+    with pytest.raises(InferenceError) as error:
+        client.transcribe('boom')
+    assert error.value.error_type == 'RuntimeError'
+    assert client.stats()['completed'] >= 1
+
+    with pytest.raises(WorkerUnavailableError):
+        WhisperInferenceClient(str(tmp_path / 'missing.sock'), b'secret').transcribe('talk.wav')
+
+def test_socket_requires_a_secret_and_reports_a_dead_server(tmp_path):
+    """Test that neither side runs without an authkey, and a server lost mid-transcription is a crash."""
+    address = str(tmp_path / 'whisper.sock')
+    with pytest.raises(ValueError):
+        WhisperInferenceClient(address, None)
+    with pytest.raises(ValueError):
+        serve(address, None, b'')
+
+    listener = Listener(address, family='AF_UNIX', authkey=b'secret')
+
+    def accept_and_die():
+        conn = listener.accept()
+        conn.recv()
+        conn.close()
+
+    threading.Thread(target=accept_and_die, daemon=True).start()
+    try:
+        with pytest.raises(WorkerCrashedError):
+            WhisperInferenceClient(address, b'secret').transcribe('talk.wav')
+    finally:
+        listener.close()
+
+def broken_worker(conn, model_size, device, threads, warmup):
+    """Dies before its model is loaded, like a worker with a missing model file."""
+    os._exit(3)
+
+def test_worker_that_fails_to_start_fails_queued_work():
+    """Test that queued transcriptions fail instead of waiting on a worker that cannot load its model."""
+    pool = WhisperInferencePool(workers=1, target=broken_worker)
+    try:
+        with pytest.raises(WorkerCrashedError):
+            pool.submit('talk.wav').result(30)
+        assert pool.stats()['crashed'] == 1 and pool.stats()['restarts'] == 0
+    finally:
+        pool.stop()